@@ -26,6 +26,8 @@ if sys.platform == 'win32':
 logger = logging.getLogger(__name__)
 
 import gradio as gr
+import uvicorn
+from fastapi import FastAPI
 
 from browser_use.agent.service import Agent
 from playwright.async_api import async_playwright
@@ -47,6 +49,8 @@ from src.controller.custom_controller import CustomController
 from gradio.themes import Citrus, Default, Glass, Monochrome, Ocean, Origin, Soft, Base
 from src.utils.default_config_settings import default_config, load_config_from_file, save_config_to_file, save_current_config, update_ui_from_config
 from src.utils.utils import update_model_dropdown, get_latest_files, capture_screenshot
+from src.utils.live_view import STREAM_PATH, get_live_view, mount_live_view
+from src.utils.ollama import warm_up_ollama_model
 
 
 # Global variables for persistence
@@ -772,50 +776,47 @@ async def run_with_stream(
             )
 
             # Initialize values for streaming
-            html_content = f"<h1 style='width:{stream_vw}vw; height:{stream_vh}vh'>Using browser...</h1>"
             final_result = errors = model_actions = model_thoughts = ""
             latest_videos = trace = history_file = None
 
+            # Frames are streamed by the UI app itself (see mount_live_view); the HTML only embeds the path once
+            live_view = get_live_view()
+            html_content = f'<img src="{STREAM_PATH}" style="width:{stream_vw}vw; height:{stream_vh}vh ; border:1px solid #ccc;">'
+            live_view_feed = asyncio.create_task(live_view.feed(lambda: _global_browser_context))
 
-            # Periodically update the stream while the agent task is running
-            while not agent_task.done():
-                try:
-                    encoded_screenshot = await capture_screenshot(_global_browser_context)
-                    if encoded_screenshot is not None:
-                        html_content = f'<img src="data:image/jpeg;base64,{encoded_screenshot}" style="width:{stream_vw}vw; height:{stream_vh}vh ; border:1px solid #ccc;">'
-                    else:
-                        html_content = f"<h1 style='width:{stream_vw}vw; height:{stream_vh}vh'>Waiting for browser session...</h1>"
-                except Exception as e:
-                    html_content = f"<h1 style='width:{stream_vw}vw; height:{stream_vh}vh'>Waiting for browser session...</h1>"
-
-                if _global_agent_state and _global_agent_state.is_stop_requested():
-                    yield [
-                        html_content,
-                        final_result,
-                        errors,
-                        model_actions,
-                        model_thoughts,
-                        latest_videos,
-                        trace,
-                        history_file,
-                        gr.update(value="Stopping...", interactive=False),  # stop_button
-                        gr.update(interactive=False),  # run_button
-                    ]
-                    break
-                else:
-                    yield [
-                        html_content,
-                        final_result,
-                        errors,
-                        model_actions,
-                        model_thoughts,
-                        latest_videos,
-                        trace,
-                        history_file,
-                        gr.update(value="Stop", interactive=True),  # Re-enable stop button
-                        gr.update(interactive=True)  # Re-enable run button
-                    ]
-                await asyncio.sleep(0.05)
+            yield [
+                html_content,
+                final_result,
+                errors,
+                model_actions,
+                model_thoughts,
+                latest_videos,
+                trace,
+                history_file,
+                gr.update(value="Stop", interactive=True),  # Re-enable stop button
+                gr.update(interactive=True)  # Re-enable run button
+            ]
+
+            # Only push a Gradio update when the stop state changes
+            try:
+                while not agent_task.done():
+                    if _global_agent_state and _global_agent_state.is_stop_requested():
+                        yield [
+                            html_content,
+                            final_result,
+                            errors,
+                            model_actions,
+                            model_thoughts,
+                            latest_videos,
+                            trace,
+                            history_file,
+                            gr.update(value="Stopping...", interactive=False),  # stop_button
+                            gr.update(interactive=False),  # run_button
+                        ]
+                        break
+                    await asyncio.sleep(0.1)
+            finally:
+                live_view_feed.cancel()
 
             # Once the agent task completes, get the results
             try:
@@ -908,6 +909,18 @@ async def run_deep_search(research_task, max_search_iteration_input, max_query_p
     return markdown_content, file_path, gr.update(value="Stop", interactive=True),  gr.update(interactive=True) 
     
 
+async def warm_up_llm(llm_provider, llm_model_name, llm_num_ctx, llm_base_url):
+    """Pre-load the selected Ollama model and report its load state"""
+    if llm_provider != "ollama" or not llm_model_name:
+        return gr.update(visible=False)
+    state = await warm_up_ollama_model(llm_model_name, llm_num_ctx, base_url=llm_base_url or None)
+    if state.get("loaded"):
+        message = f"🦙 `{llm_model_name}` loaded (until {state.get('expires_at')})"
+    else:
+        message = f"🦙 `{llm_model_name}` not loaded: {state.get('error', 'unknown error')}"
+    return gr.update(value=message, visible=True)
+
+
 def create_ui(config, theme_name="Ocean"):
     css = """
     .gradio-container {
@@ -1025,6 +1038,7 @@ def create_ui(config, theme_name="Ocean"):
                             value=config['llm_api_key'],
                             info="Your API key (leave blank to use .env)"
                         )
+                    ollama_status = gr.Markdown(visible=config['llm_provider'] == "ollama")
 
             # Change event to update context length slider
             def update_llm_num_ctx_visibility(llm_provider):
@@ -1037,6 +1051,21 @@ def create_ui(config, theme_name="Ocean"):
                 outputs=llm_num_ctx
             )
 
+            # Pre-load local Ollama models at startup and once a model setting is committed, not on every
+            # slider tick or keystroke (a new num_ctx makes Ollama reload the model)
+            for event in (llm_provider.change, llm_model_name.select, llm_model_name.blur, llm_num_ctx.release,
+                          llm_base_url.submit, llm_base_url.blur):
+                event(
+                    fn=warm_up_llm,
+                    inputs=[llm_provider, llm_model_name, llm_num_ctx, llm_base_url],
+                    outputs=ollama_status
+                )
+            demo.load(
+                fn=warm_up_llm,
+                inputs=[llm_provider, llm_model_name, llm_num_ctx, llm_base_url],
+                outputs=ollama_status
+            )
+
             with gr.TabItem("🌐 Browser Settings", id=3):
                 with gr.Group():
                     with gr.Row():
@@ -1319,6 +1348,9 @@ def main():
     # Check if running in Electron mode
     parser = argparse.ArgumentParser(description='Browser Use API')
     parser.add_argument('--electron', action='store_true', help='Run in Electron mode')
+    parser.add_argument('--ip', type=str, default='127.0.0.1', help='IP address to bind the web UI to')
+    parser.add_argument('--port', type=int, default=7788, help='Port to serve the web UI and live view on')
+    parser.add_argument('--theme', type=str, default='Ocean', help='Theme to use for the web UI')
     args = parser.parse_args()
     
     if args.electron:
@@ -1430,6 +1462,18 @@ def main():
                         }
                         send_to_electron(json_serialize(response))
                 
+                elif action == 'warm-up-llm':
+                    # Pre-load a local Ollama model so the first agent step does not wait for it
+                    if data.get('llm_provider') == 'ollama':
+                        state = await warm_up_ollama_model(
+                            data.get('llm_model_name', 'qwen2.5:7b'),
+                            data.get('llm_num_ctx', 32000),
+                            base_url=data.get('llm_base_url') or None,
+                        )
+                    else:
+                        state = {'loaded': False, 'error': 'Only Ollama models need warm-up'}
+                    send_to_electron(json_serialize({'result': state, 'id': request_id}))
+
                 # ... Handle other actions (other elif blocks)
                         
             except json.JSONDecodeError as e:
@@ -1452,8 +1496,12 @@ def main():
                 loop.run_until_complete(handle_message(line))
                 
     else:
-        # Run the Web UI
-        create_ui() 
+        # Run the Web UI; the live view stream is served by the same app, on the same host and port
+        demo = create_ui(default_config(), theme_name=args.theme)
+        app = FastAPI()
+        mount_live_view(app)
+        app = gr.mount_gradio_app(app, demo, path="/")
+        uvicorn.run(app, host=args.ip, port=args.port)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,80 @@
+import json
+import logging
+from typing import List, Optional
+
+from json_repair import repair_json
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalActionParser:
+    """Extract completed items of the top-level ``action`` array from a streamed JSON response.
+
+    Text is fed chunk by chunk; every call to ``feed`` returns the action
+    dicts that were completed by that chunk, in order. Strings, escapes and
+    nesting are tracked so that the word "action" inside ``current_state``
+    or inside an action's parameters is never mistaken for the array.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._pending_key: Optional[str] = None
+        self._action_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self.done = False
+
+    def feed(self, text: str) -> List[dict]:
+        self._buffer += text
+        completed = []
+        buffer = self._buffer
+        while self._pos < len(buffer) and not self.done:
+            c = buffer[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._last_string = buffer[self._string_start + 1:self._pos]
+            elif c == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif c in "{[":
+                if c == "[" and self._depth == 1 and self._pending_key == "action" and self._action_depth is None:
+                    self._action_depth = self._depth + 1
+                elif c == "{" and self._action_depth is not None and self._depth == self._action_depth:
+                    self._item_start = self._pos
+                self._depth += 1
+            elif c in "}]":
+                if c == "}" and self._item_start is not None and self._depth == self._action_depth + 1:
+                    item = self._parse_item(buffer[self._item_start:self._pos + 1])
+                    if item is not None:
+                        completed.append(item)
+                    self._item_start = None
+                elif c == "]" and self._action_depth is not None and self._depth == self._action_depth:
+                    self.done = True
+                self._depth -= 1
+            elif c == ":" and self._depth == 1:
+                self._pending_key = self._last_string
+            elif c == "," and self._depth == 1:
+                self._pending_key = None
+            self._pos += 1
+        return completed
+
+    @staticmethod
+    def _parse_item(text: str) -> Optional[dict]:
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            try:
+                return json.loads(repair_json(text))
+            except Exception as e:
+                logger.debug(f"Could not parse streamed action {text}: {e}")
+                return None
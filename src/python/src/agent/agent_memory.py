@@ -0,0 +1,140 @@
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from ..utils.llm import ainvoke_llm
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = (
+    "Condense the following notes collected by a browser agent into as few lines as possible. "
+    "Keep every concrete fact (names, numbers, urls, results) and drop repetition. "
+    "Answer with the condensed notes only."
+)
+EXTRACT_CHARS = 160
+# digests of condensed notes remembered so their facts are not collected again
+MAX_CONDENSED_HASHES = 4096
+
+
+@dataclass
+class MemoryEntry:
+    text: str
+    tokens: int
+    step: int
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def _digest(normalized: str) -> bytes:
+    return hashlib.blake2b(normalized.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+class AgentMemory:
+    """Important contents collected by the agent, deduplicated and kept within a token budget.
+
+    Notes are deduplicated line by line on a hash of their normalized text,
+    against the notes currently held and the most recently condensed ones.
+    When the budget is exceeded the older half of the notes is condensed into
+    a single note, with the LLM when one is given and extractively (first
+    sentence of every note) otherwise.
+    """
+
+    def __init__(
+            self,
+            token_budget: int = 2000,
+            count_tokens: Callable[[str], int] = lambda text: len(text) // 3,
+            summary_llm: Optional[BaseChatModel] = None,
+    ):
+        self.token_budget = token_budget
+        self.count_tokens = count_tokens
+        self.summary_llm = summary_llm
+        self.entries: list[MemoryEntry] = []
+        self._hashes: set[bytes] = set()
+        self._condensed_hashes: OrderedDict[bytes, None] = OrderedDict()
+        self.total_tokens = 0
+        self.compactions = 0
+        self._rendered: Optional[str] = ""
+
+    def add(self, text: str, step: int) -> list[str]:
+        """Add the new lines of text and return the ones that were not known yet"""
+        added = []
+        for line in text.splitlines():
+            normalized = _normalize(line)
+            if not normalized:
+                continue
+            digest = _digest(normalized)
+            if digest in self._hashes:
+                continue
+            if digest in self._condensed_hashes:
+                self._condensed_hashes.move_to_end(digest)
+                continue
+            self._hashes.add(digest)
+            line = line.strip()
+            self._append(MemoryEntry(text=line, tokens=self.count_tokens(line), step=step))
+            added.append(line)
+        return added
+
+    def _append(self, entry: MemoryEntry) -> None:
+        self.entries.append(entry)
+        self.total_tokens += entry.tokens
+        self._rendered = None
+
+    @property
+    def over_budget(self) -> bool:
+        return self.total_tokens > self.token_budget
+
+    async def compact(self) -> None:
+        """Condense older notes until the memory fits its budget"""
+        while self.over_budget and len(self.entries) > 1:
+            old, self.entries = self.entries[:len(self.entries) // 2], self.entries[len(self.entries) // 2:]
+            self.total_tokens = sum(entry.tokens for entry in self.entries)
+            summary = await self._summarize(old)
+            self._remember_condensed(old)
+            self.entries.insert(0, MemoryEntry(text=summary, tokens=self.count_tokens(summary), step=old[-1].step))
+            self.total_tokens += self.entries[0].tokens
+            self.compactions += 1
+            self._rendered = None
+            logger.info(f"🧠 Condensed {len(old)} memory notes, memory now {self.total_tokens}/{self.token_budget} tokens")
+            if len(old) == 1:
+                break
+        while self.over_budget and len(self.entries) > 1:
+            # nothing left to condense: drop the oldest note
+            self.total_tokens -= self.entries.pop(0).tokens
+            self._rendered = None
+        # dropped notes may be collected again, condensed ones are remembered in _condensed_hashes
+        self._hashes = {_digest(_normalize(entry.text)) for entry in self.entries}
+
+    def _remember_condensed(self, entries: list[MemoryEntry]) -> None:
+        for entry in entries:
+            digest = _digest(_normalize(entry.text))
+            self._condensed_hashes[digest] = None
+            self._condensed_hashes.move_to_end(digest)
+        while len(self._condensed_hashes) > MAX_CONDENSED_HASHES:
+            self._condensed_hashes.popitem(last=False)
+
+    async def _summarize(self, entries: list[MemoryEntry]) -> str:
+        notes = "\n".join(entry.text for entry in entries)
+        if self.summary_llm is not None:
+            try:
+                response = await ainvoke_llm(
+                    self.summary_llm, [SystemMessage(content=SUMMARY_PROMPT), HumanMessage(content=notes)]
+                )
+                summary = " ".join(str(response.content).split())
+                if summary and self.count_tokens(summary) < sum(entry.tokens for entry in entries):
+                    return summary
+            except Exception as e:
+                logger.warning(f"Memory summarization failed, condensing extractively: {e}")
+        return " | ".join(re.split(r"(?<=[.!?])\s", entry.text, maxsplit=1)[0][:EXTRACT_CHARS] for entry in entries)
+
+    def render(self) -> str:
+        if self._rendered is None:
+            self._rendered = "".join(entry.text + "\n" for entry in self.entries)
+        return self._rendered
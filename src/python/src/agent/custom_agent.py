@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import pdb
@@ -8,6 +9,7 @@ import os
 import base64
 import io
 import platform
+import time
 from browser_use.agent.prompts import SystemPrompt, AgentMessagePrompt
 from browser_use.agent.service import Agent
 from browser_use.agent.views import (
@@ -27,19 +29,33 @@ from browser_use.telemetry.views import (
     AgentStepTelemetryEvent,
 )
 from browser_use.utils import time_execution_async
+from langchain_anthropic import ChatAnthropic
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import (
     BaseMessage,
     HumanMessage,
-    AIMessage
+    AIMessage,
+    message_chunk_to_message,
 )
+from pydantic import ValidationError
 from browser_use.agent.prompts import PlannerPrompt
+from langchain_ollama import ChatOllama
+from langchain_openai import ChatOpenAI
 
 from json_repair import repair_json
+from src.browser.custom_context import CustomBrowserContext
 from src.utils.agent_state import AgentState
-
+from src.utils.hedging import LLMHedger
+from src.utils.prompt_stats import format_prompt_stats, summarize_prompt_stats
+from src.utils.ollama import size_num_ctx
+from src.utils.llm import DeepSeekR1ChatOllama, DeepSeekR1ChatOpenAI, ainvoke_llm
+from src.utils.rate_limiter import estimate_input_tokens, get_llm_scheduler
+
+from .action_stream import IncrementalActionParser
+from .agent_memory import AgentMemory
 from .custom_message_manager import CustomMessageManager
-from .custom_views import CustomAgentOutput, CustomAgentStepInfo
+from .custom_views import CustomAgentHistory, CustomAgentOutput, CustomAgentStepInfo
+from .step_latency import format_step_latency, summarize_state_timings, summarize_step_latency
 
 logger = logging.getLogger(__name__)
 
@@ -64,7 +80,8 @@ class CustomAgent(Agent):
             max_input_tokens: int = 128000,
             validate_output: bool = False,
             message_context: Optional[str] = None,
-            generate_gif: bool | str = True,
+            # opt-in, unlike browser_use: the GIF needs a screenshot every step, even with use_vision=False
+            generate_gif: bool | str = False,
             sensitive_data: Optional[Dict[str, str]] = None,
             available_file_paths: Optional[list[str]] = None,
             include_attributes: list[str] = [
@@ -90,6 +107,16 @@ class CustomAgent(Agent):
             page_extraction_llm: Optional[BaseChatModel] = None,
             planner_llm: Optional[BaseChatModel] = None,
             planner_interval: int = 1,  # Run planner every N steps
+            stream_actions: bool = False,
+            hedge_llm: Optional[BaseChatModel] = None,
+            max_history_images: int = 1,
+            summarize_old_states: bool = False,
+            dom_diff_interval: int = 0,
+            memory_token_budget: int = 2000,
+            summarize_memory_with_llm: bool = False,
+            max_element_tokens: int = 0,
+            concurrent_planner: bool = False,
+            native_structured_output: bool = False,
     ):
 
         # Load sensitive data from environment variables
@@ -103,7 +130,9 @@ class CustomAgent(Agent):
         if sensitive_data is None:
             sensitive_data = {}
         sensitive_data = {**env_sensitive_data, **sensitive_data}  # Provided data takes precedence
-
+        if max_element_tokens and hasattr(controller, "enable_element_paging"):
+            # the omitted elements are only reachable through show_more_elements, before the action model is built
+            controller.enable_element_paging()
 
         super().__init__(
             task=task,
@@ -142,9 +171,51 @@ class CustomAgent(Agent):
             self.max_input_tokens = 64000
         else:
             self.use_deepseek_r1 = False
+        if isinstance(self.llm, ChatOllama) and self.llm.num_ctx:
+            # Anything beyond num_ctx is silently truncated by Ollama, so keep the prompt inside it,
+            # and size the KV cache for the prompt budget instead of the configured maximum
+            num_ctx, self.max_input_tokens = size_num_ctx(self.max_input_tokens, self.llm.num_predict,
+                                                          self.llm.num_ctx)
+            if num_ctx != self.llm.num_ctx:
+                logger.info(f"🦙 num_ctx {self.llm.num_ctx} -> {num_ctx} for a {self.max_input_tokens} token prompt")
+                sized_llm = self.llm.model_copy(update={"num_ctx": num_ctx})
+                # the same model used elsewhere keeps one num_ctx, so Ollama does not reload between calls
+                if self.page_extraction_llm is self.llm:
+                    self.page_extraction_llm = sized_llm
+                if self.planner_llm is self.llm:
+                    self.planner_llm = sized_llm
+                self.llm = sized_llm
+
+        # Stream the response and start executing actions while later ones are still generated
+        self.stream_actions = (
+                stream_actions
+                # DeepSeekR1ChatOllama streams the answer without the <think> part, other R1 clients do not
+                and (not self.use_deepseek_r1 or isinstance(self.llm, DeepSeekR1ChatOllama))
+                and hasattr(self.controller, "multi_act_stream")
+        )
+
+        # Opt-in: with native_structured_output, tool_calling_method selects provider-native
+        # structured output (see _structured_output_method); otherwise the answer is parsed as text
+        self.native_structured_output = native_structured_output
+        self.structured_output_setting = tool_calling_method
+        self.parse_stats = {"native": 0, "native_failures": 0, "native_seconds": 0.0,
+                            "repair": 0, "repair_failures": 0, "repair_seconds": 0.0}
+
+        # Run the planner next to the model call and apply its plan to the following step
+        self.concurrent_planner = concurrent_planner and planner_llm is not None
+        self._planner_task: Optional[asyncio.Task] = None
+        # seconds per phase of every step, summarized at the end of the run
+        self.step_latencies: list[dict] = []
+
+        # Optionally hedge slow responses of the main model with a second model
+        self.hedger = LLMHedger(hedge_llm) if hedge_llm else None
 
         # record last actions
         self._last_actions = None
+        # largest prompt sent during the run, used to size local context windows
+        self.peak_input_tokens = 0
+        # provider prompt-cache usage over the run
+        self.prompt_cache_usage = {"input_tokens": 0, "cached_tokens": 0}
         # record extract content
         self.extracted_content = ""
         # custom new info
@@ -162,7 +233,20 @@ class CustomAgent(Agent):
             max_error_length=self.max_error_length,
             max_actions_per_step=self.max_actions_per_step,
             message_context=self.message_context,
-            sensitive_data=self.sensitive_data
+            sensitive_data=self.sensitive_data,
+            max_history_images=max_history_images,
+            summarize_old_states=summarize_old_states,
+            dom_diff_interval=dom_diff_interval,
+            max_element_tokens=max_element_tokens,
+        )
+        if self.message_manager.element_budgeter is not None:
+            # The show_more_elements action reads the omitted elements through the browser context
+            self.browser_context.element_pager = self.message_manager.element_budgeter
+        # important contents gathered over the run, rendered into step_info.memory
+        self.memory = AgentMemory(
+            token_budget=memory_token_budget,
+            count_tokens=self.message_manager.token_counter.count,
+            summary_llm=self.page_extraction_llm if summarize_memory_with_llm else None,
         )
 
     def _setup_action_models(self) -> None:
@@ -203,12 +287,12 @@ class CustomAgent(Agent):
 
         step_info.step_number += 1
         important_contents = model_output.current_state.important_contents
-        if (
-                important_contents
-                and "None" not in important_contents
-                and important_contents not in step_info.memory
-        ):
-            step_info.memory += important_contents + "\n"
+        if important_contents and "None" not in important_contents:
+            new_notes = self.memory.add(important_contents, step_info.step_number - 1)
+            if new_notes:
+                step_info.memory = self.memory.render()
+                logger.info(f"🧠 Memory +{len(new_notes)} notes "
+                            f"({self.memory.total_tokens}/{self.memory.token_budget} tokens)")
 
         task_progress = model_output.current_state.task_progress
         if task_progress and "None" not in task_progress:
@@ -218,34 +302,68 @@ class CustomAgent(Agent):
         if future_plans and "None" not in future_plans:
             step_info.future_plans = future_plans
 
-        logger.info(f"🧠 All Memory: \n{step_info.memory}")
+    async def _astream_next_action(
+            self, input_messages: list[BaseMessage], action_queue: asyncio.Queue
+    ) -> AIMessage:
+        """Stream the LLM response and queue each action as soon as it is complete and valid"""
+        parser = IncrementalActionParser()
+        full_chunk = None
+        n_queued = 0
+        async with get_llm_scheduler(self.llm).slot(estimate_input_tokens(self.llm, input_messages)):
+            async for chunk in self.llm.astream(input_messages):
+                full_chunk = chunk if full_chunk is None else full_chunk + chunk
+                if isinstance(chunk.content, list):
+                    text = "".join(part.get("text", "") for part in chunk.content if isinstance(part, dict))
+                else:
+                    text = chunk.content
+                if parser.done or n_queued >= self.max_actions_per_step:
+                    continue
+                for action in parser.feed(text):
+                    try:
+                        action_model = self.ActionModel(**action)
+                    except ValidationError as e:
+                        # keep the order intact: nothing after an invalid action is dispatched early
+                        logger.debug(f"Streamed action failed validation: {e}")
+                        parser.done = True
+                        break
+                    await action_queue.put(action_model)
+                    n_queued += 1
+                    if n_queued >= self.max_actions_per_step:
+                        break
+        if full_chunk is None:
+            raise ValueError('Empty response from LLM stream.')
+        ai_message = message_chunk_to_message(full_chunk)
+        reasoning = ai_message.additional_kwargs.pop("reasoning_content", None)
+        if reasoning is not None:
+            # same shape as DeepSeekR1ChatOllama.ainvoke, so the reasoning is logged and not sent back
+            ai_message = AIMessage(content=ai_message.content, reasoning_content=reasoning)
+        return ai_message
 
     @time_execution_async("--get_next_action")
-    async def get_next_action(self, input_messages: list[BaseMessage]) -> AgentOutput:
-        """Get next action from LLM based on current state"""
+    async def get_next_action(
+            self, input_messages: list[BaseMessage], action_queue: Optional[asyncio.Queue] = None
+    ) -> AgentOutput:
+        """Get next action from LLM based on current state.
+
+        When an action_queue is given the response is streamed and validated
+        actions are put on the queue while the rest is still being generated.
+        """
 
-        ai_message = self.llm.invoke(input_messages)
+        if action_queue is not None:
+            ai_message = await self._astream_next_action(input_messages, action_queue)
+            parsed = self._parse_model_output(ai_message)
+        elif self.hedger:
+            ai_message, parsed = await self.hedger.ainvoke(self.llm, input_messages, self._invoke_and_parse)
+        else:
+            ai_message, parsed = await self._invoke_and_parse(self.llm, input_messages)
         self.message_manager._add_message_with_tokens(ai_message)
+        self._record_prompt_cache_usage(ai_message)
 
         if hasattr(ai_message, "reasoning_content"):
             logger.info("🤯 Start Deep Thinking: ")
             logger.info(ai_message.reasoning_content)
             logger.info("🤯 End Deep Thinking")
 
-        if isinstance(ai_message.content, list):
-            ai_content = ai_message.content[0]
-        else:
-            ai_content = ai_message.content
-
-        ai_content = ai_content.replace("```json", "").replace("```", "")
-        ai_content = repair_json(ai_content)
-        parsed_json = json.loads(ai_content)
-        parsed: AgentOutput = self.AgentOutput(**parsed_json)
-
-        if parsed is None:
-            logger.debug(ai_message.content)
-            raise ValueError('Could not parse response.')
-
         # Limit actions to maximum allowed per step
         parsed.action = parsed.action[: self.max_actions_per_step]
         self._log_response(parsed)
@@ -253,13 +371,93 @@ class CustomAgent(Agent):
 
         return parsed
 
-    async def _run_planner(self) -> Optional[str]:
-        """Run the planner to analyze state and suggest next steps"""
-        # Skip planning if no planner_llm is set
-        if not self.planner_llm:
+    def _structured_output_method(self, llm: BaseChatModel) -> Optional[str]:
+        """Provider-native structured output method for llm, or None to parse free text"""
+        if not self.native_structured_output:
             return None
+        if self.use_deepseek_r1 or isinstance(llm, (DeepSeekR1ChatOpenAI, DeepSeekR1ChatOllama)):
+            return None
+        if self.structured_output_setting == "auto":
+            return "function_calling" if isinstance(llm, (ChatOpenAI, ChatAnthropic)) else None
+        if self.structured_output_setting in ("function_calling", "json_schema", "json_mode"):
+            return self.structured_output_setting
+        return None
+
+    async def _invoke_and_parse(
+            self, llm: BaseChatModel, input_messages: list[BaseMessage]
+    ) -> tuple[BaseMessage, AgentOutput]:
+        """Invoke llm and validate its answer into CustomAgentOutput.
+
+        With native_structured_output it uses provider-native tool calling / JSON
+        schema and only falls back to the repair_json path when native parsing fails.
+        """
+        method = self._structured_output_method(llm)
+        if method is None:
+            ai_message = await ainvoke_llm(llm, input_messages)
+            return ai_message, self._parse_model_output(ai_message)
+
+        # the model call and the output parser run separately, so parsing is timed like the repair path
+        structured_llm = llm.with_structured_output(self.AgentOutput, method=method)
+        raw_message = await ainvoke_llm(llm, input_messages, runnable=structured_llm.first)
+        start = time.perf_counter()
+        try:
+            parsed = structured_llm.last.invoke(raw_message)
+            parsing_error = None if parsed is not None else "no structured output in the response"
+        except Exception as e:
+            parsed, parsing_error = None, e
+        finally:
+            self.parse_stats["native_seconds"] += time.perf_counter() - start
+        if parsed is None:
+            self.parse_stats["native_failures"] += 1
+            logger.debug(f"Native structured output failed, repairing raw output: {parsing_error}")
+            if getattr(raw_message, "tool_calls", None):
+                raw_message = AIMessage(content=json.dumps(raw_message.tool_calls[0]["args"]),
+                                        usage_metadata=raw_message.usage_metadata)
+            parsed = self._parse_model_output(raw_message)
+        else:
+            self.parse_stats["native"] += 1
+
+        # Keep plain JSON in the history so later requests carry no unanswered tool calls
+        ai_message = AIMessage(content=parsed.model_dump_json(exclude_unset=True),
+                               usage_metadata=getattr(raw_message, "usage_metadata", None))
+        return ai_message, parsed
+
+    def _parse_model_output(self, ai_message: BaseMessage) -> AgentOutput:
+        """Parse the raw LLM response into the dynamic CustomAgentOutput"""
+        start = time.perf_counter()
+        self.parse_stats["repair"] += 1
+        try:
+            if isinstance(ai_message.content, list):
+                ai_content = ai_message.content[0]
+            else:
+                ai_content = ai_message.content
+
+            ai_content = ai_content.replace("```json", "").replace("```", "")
+            ai_content = repair_json(ai_content)
+            parsed_json = json.loads(ai_content)
+            parsed: AgentOutput = self.AgentOutput(**parsed_json)
+        except Exception:
+            self.parse_stats["repair_failures"] += 1
+            raise
+        finally:
+            self.parse_stats["repair_seconds"] += time.perf_counter() - start
+
+        if parsed is None:
+            logger.debug(ai_message.content)
+            raise ValueError('Could not parse response.')
+        return parsed
 
-        # Create planner message history using full message history
+    def _record_prompt_cache_usage(self, ai_message: BaseMessage) -> None:
+        """Accumulate how many input tokens the provider served from its prompt cache"""
+        usage = getattr(ai_message, "usage_metadata", None)
+        if not usage:
+            return
+        input_details = usage.get("input_token_details") or {}
+        self.prompt_cache_usage["input_tokens"] += usage.get("input_tokens", 0)
+        self.prompt_cache_usage["cached_tokens"] += input_details.get("cache_read", 0) or 0
+
+    def _planner_messages(self) -> list[BaseMessage]:
+        """Planner prompt over the full message history, without the screenshot unless requested"""
         planner_messages = [
             PlannerPrompt(self.action_descriptions).get_system_message(),
             *self.message_manager.get_messages()[1:],  # Use full message history except the first
@@ -279,18 +477,12 @@ class CustomAgent(Agent):
                 new_msg = last_state_message.content
 
             planner_messages[-1] = HumanMessage(content=new_msg)
+        return planner_messages
 
-        # Get planner output
-        response = await self.planner_llm.ainvoke(planner_messages)
+    async def _plan(self, planner_messages: list[BaseMessage]) -> str:
+        """Get and log the planner output"""
+        response = await ainvoke_llm(self.planner_llm, planner_messages)
         plan = response.content
-        last_state_message = planner_messages[-1]
-        # remove image from last state message
-        if isinstance(last_state_message.content, list):
-            for msg in last_state_message.content:
-                if msg['type'] == 'text':
-                    msg['text'] += f"\nPlanning Agent outputs plans:\n {plan}\n"
-        else:
-            last_state_message.content += f"\nPlanning Agent outputs plans:\n {plan}\n "
 
         try:
             plan_json = json.loads(plan.replace("```json", "").replace("```", ""))
@@ -306,52 +498,150 @@ class CustomAgent(Agent):
         except Exception as e:
             logger.debug(f'Error parsing planning analysis: {e}')
             logger.info(f'📋 Plans: {plan}')
+        return plan
+
+    async def _plan_in_background(self, planner_messages: list[BaseMessage], latency: dict) -> str:
+        start = time.perf_counter()
+        try:
+            return await self._plan(planner_messages)
+        finally:
+            latency["planner"] = round(time.perf_counter() - start, 3)
+
+    async def _run_planner(self) -> Optional[str]:
+        """Run the planner to analyze state and suggest next steps"""
+        # Skip planning if no planner_llm is set
+        if not self.planner_llm:
+            return None
+
+        plan = await self._plan(self._planner_messages())
+        self.message_manager.append_to_state_message(f"\nPlanning Agent outputs plans:\n {plan}\n")
+        return plan
+
+    async def _apply_background_plan(self, latency: dict) -> None:
+        """Wait for the plan started in the previous step and add it to the current state message"""
+        planner_task, self._planner_task = self._planner_task, None
+        start = time.perf_counter()
+        try:
+            plan = await planner_task
+        except Exception as e:
+            logger.warning(f"📋 Planner failed: {e}")
+            return
+        finally:
+            latency["plan_wait"] = round(time.perf_counter() - start, 3)
+        self.message_manager.append_to_state_message(
+            f"\nPlanning Agent outputs plans (made before the previous actions were executed):\n {plan}\n"
+        )
+
+    @staticmethod
+    async def _drain_act_task(act_task: asyncio.Task) -> list[ActionResult]:
+        """Let the streamed actions in flight finish and return the results of those that ran"""
+        try:
+            return await act_task
+        except Exception as e:
+            logger.debug(f"Streamed actions failed after the model call failed: {e}")
+            return []
 
     @time_execution_async("--step")
     async def step(self, step_info: Optional[CustomAgentStepInfo] = None) -> None:
         """Execute one step of the task"""
         logger.info(f"\n📍 Step {self.n_steps}")
         state = None
+        step_prompt_stats = None
         model_output = None
         result: list[ActionResult] = []
+        executed: list[ActionResult] = []
         actions: list[ActionModel] = []
+        step_start = time.perf_counter()
+        latency = {"step": self.n_steps, "planning": False, "model": 0.0, "planner": 0.0, "plan_wait": 0.0}
 
         try:
-            state = await self.browser_context.get_state()
+            if isinstance(self.browser_context, CustomBrowserContext):
+                # without vision the screenshot is only taken when a GIF was asked for
+                state = await self.browser_context.get_state(use_vision=self.use_vision or bool(self.generate_gif))
+                latency["state_phases"] = dict(self.browser_context.last_state_timings)
+            else:
+                state = await self.browser_context.get_state()
             self._check_if_stopped_or_paused()
 
             self.message_manager.add_state_message(state, self._last_actions, self._last_result, step_info,
                                                    self.use_vision)
-
+            step_prompt_stats = self.message_manager.last_prompt_stats
+            if step_prompt_stats:
+                logger.info("📏 Prompt: " + ", ".join(
+                    f"{name} {section['tokens']}" for name, section in step_prompt_stats["sections"].items()
+                ) + f" tokens; history {step_prompt_stats['history_tokens']} tokens")
+
+            if self._planner_task is not None:
+                await self._apply_background_plan(latency)
             # Run planner at specified intervals if planner is configured
             if self.planner_llm and self.n_steps % self.planning_interval == 0:
-                await self._run_planner()
+                latency["planning"] = True
+                if self.concurrent_planner:
+                    # plans from the same state as the model call below; applied in the next step
+                    self._planner_task = asyncio.create_task(
+                        self._plan_in_background(self._planner_messages(), latency)
+                    )
+                else:
+                    planner_start = time.perf_counter()
+                    await self._run_planner()
+                    latency["planner"] = round(time.perf_counter() - planner_start, 3)
+            # keep the prompt inside max_input_tokens
+            self.message_manager.cut_messages()
             input_messages = self.message_manager.get_messages()
+            self.peak_input_tokens = max(self.peak_input_tokens, self.message_manager.history.total_tokens)
             self._check_if_stopped_or_paused()
+            action_queue = None
+            act_task = None
+            if self.stream_actions:
+                action_queue = asyncio.Queue()
+                act_task = asyncio.create_task(self.controller.multi_act_stream(
+                    action_queue,
+                    self.browser_context,
+                    max_actions=self.max_actions_per_step,
+                    page_extraction_llm=self.page_extraction_llm,
+                    sensitive_data=self.sensitive_data,
+                    check_break_if_paused=lambda: self._check_if_stopped_or_paused(),
+                    available_file_paths=self.available_file_paths,
+                ))
             try:
-                model_output = await self.get_next_action(input_messages)
+                model_start = time.perf_counter()
+                try:
+                    model_output = await self.get_next_action(input_messages, action_queue)
+                finally:
+                    latency["model"] = round(time.perf_counter() - model_start, 3)
+                    if action_queue is not None:
+                        action_queue.put_nowait(None)
                 if self.register_new_step_callback:
                     self.register_new_step_callback(state, model_output, self.n_steps)
                 self.update_step_info(model_output, step_info)
+                if self.memory.over_budget and step_info is not None:
+                    await self.memory.compact()
+                    step_info.memory = self.memory.render()
                 self._save_conversation(input_messages, model_output)
                 if self.model_name != "deepseek-reasoner":
-                    # remove prev message
-                    self.message_manager._remove_state_message_by_index(-1)
+                    # remove prev message, a full element list that later diffs refer to stays
+                    self.message_manager.remove_state_message()
                 self._check_if_stopped_or_paused()
             except Exception as e:
                 # model call failed, remove last state message from history
                 self.message_manager._remove_state_message_by_index(-1)
+                if act_task is not None:
+                    # streamed actions may already have run, keep their results
+                    executed = await self._drain_act_task(act_task)
                 raise e
 
             actions: list[ActionModel] = model_output.action
-            result: list[ActionResult] = await self.controller.multi_act(
-                actions,
-                self.browser_context,
-                page_extraction_llm=self.page_extraction_llm,
-                sensitive_data=self.sensitive_data,
-                check_break_if_paused=lambda: self._check_if_stopped_or_paused(),
-                available_file_paths=self.available_file_paths,
-            )
+            if act_task is not None:
+                result: list[ActionResult] = await act_task
+            else:
+                result: list[ActionResult] = await self.controller.multi_act(
+                    actions,
+                    self.browser_context,
+                    page_extraction_llm=self.page_extraction_llm,
+                    sensitive_data=self.sensitive_data,
+                    check_break_if_paused=lambda: self._check_if_stopped_or_paused(),
+                    available_file_paths=self.available_file_paths,
+                )
             if len(result) != len(actions):
                 # I think something changes, such information should let LLM know
                 for ri in range(len(result), len(actions)):
@@ -375,7 +665,7 @@ class CustomAgent(Agent):
             self.consecutive_failures = 0
 
         except Exception as e:
-            result = await self._handle_step_error(e)
+            result = executed + await self._handle_step_error(e)
             self._last_result = result
 
         finally:
@@ -393,7 +683,13 @@ class CustomAgent(Agent):
                 return
 
             if state:
+                latency["total"] = round(time.perf_counter() - step_start, 3)
+                self.step_latencies.append(latency)
                 self._make_history_item(model_output, state, result)
+                self.history.history[-1] = CustomAgentHistory.model_construct(
+                    **dict(self.history.history[-1]), prompt_stats=step_prompt_stats,
+                    state_timings=latency.get("state_phases"),
+                )
 
     async def run(self, max_steps: int = 100) -> AgentHistoryList:
         """Execute the task with maximum number of steps"""
@@ -448,6 +744,34 @@ class CustomAgent(Agent):
             return self.history
 
         finally:
+            if self._planner_task is not None:
+                self._planner_task.cancel()
+                self._planner_task = None
+            if self.planner_llm and self.step_latencies:
+                logger.info(f"⏱️ Step latency: {format_step_latency(summarize_step_latency(self.step_latencies))}")
+            state_timings = summarize_state_timings(self.step_latencies)
+            if state_timings:
+                logger.info(f"📸 State capture (mean s): {state_timings}")
+            llm_cache = getattr(self.llm, "cache", None)
+            if hasattr(llm_cache, "stats"):
+                logger.info(f"🗄️ LLM cache: {llm_cache.stats()}")
+            if self.hedger:
+                logger.info(f"🏎️ Hedged requests: {self.hedger.stats()}")
+            logger.info(f"🧩 Output parsing: {self.parse_stats}")
+            step_prompt_stats = [item.prompt_stats for item in self.history.history
+                                 if getattr(item, "prompt_stats", None)]
+            if step_prompt_stats:
+                logger.info(f"📏 Prompt composition:\n{format_prompt_stats(summarize_prompt_stats(step_prompt_stats))}")
+            if self.message_manager.element_encoder is not None:
+                logger.info(f"🌳 DOM diff: {self.message_manager.element_encoder.stats()}")
+            if isinstance(self.llm, ChatOllama) and self.llm.num_ctx:
+                logger.info(f"🦙 Peak prompt {self.peak_input_tokens} tokens, trimmed to at most "
+                            f"{self.max_input_tokens} tokens for num_ctx={self.llm.num_ctx}")
+            if self.prompt_cache_usage["input_tokens"]:
+                cached_ratio = self.prompt_cache_usage["cached_tokens"] / self.prompt_cache_usage["input_tokens"]
+                logger.info(f"🗄️ Prompt cache: {self.prompt_cache_usage['cached_tokens']}/"
+                            f"{self.prompt_cache_usage['input_tokens']} input tokens cached ({cached_ratio:.1%})")
+
             self.telemetry.capture(
                 AgentEndTelemetryEvent(
                     agent_id=self.agent_id,
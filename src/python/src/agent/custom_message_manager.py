@@ -4,7 +4,7 @@ import logging
 from typing import List, Optional, Type, Dict
 
 from browser_use.agent.message_manager.service import MessageManager
-from browser_use.agent.message_manager.views import MessageHistory
+from browser_use.agent.message_manager.views import ManagedMessage, MessageHistory
 from browser_use.agent.prompts import SystemPrompt, AgentMessagePrompt
 from browser_use.agent.views import ActionResult, AgentStepInfo, ActionModel
 from browser_use.browser.views import BrowserState
@@ -19,7 +19,10 @@ from langchain_core.messages import (
 )
 from langchain_openai import ChatOpenAI
 from ..utils.llm import DeepSeekR1ChatOpenAI
-from .custom_prompts import CustomAgentMessagePrompt
+from ..utils.token_counter import TokenCounter
+from .custom_prompts import CustomAgentMessagePrompt, summarize_state_description
+from .dom_diff import ElementDiffEncoder, get_tab_key
+from .element_budget import ElementBudgeter
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +43,13 @@ class CustomMessageManager(MessageManager):
             max_actions_per_step: int = 10,
             message_context: Optional[str] = None,
             sensitive_data: Optional[Dict[str, str]] = None,
+            max_history_images: int = 1,
+            summarize_old_states: bool = False,
+            dom_diff_interval: int = 0,
+            max_element_tokens: int = 0,
     ):
+        # Set before the base class counts the system prompt
+        self.token_counter = TokenCounter(llm, estimated_characters_per_token)
         super().__init__(
             llm=llm,
             task=task,
@@ -56,6 +65,25 @@ class CustomMessageManager(MessageManager):
             sensitive_data=sensitive_data
         )
         self.agent_prompt_class = agent_prompt_class
+        self.last_prompt_stats: Optional[dict] = None
+        # Only the newest screenshots stay in retained history, older ones become a text placeholder
+        self.max_history_images = max_history_images
+        self.summarize_old_states = summarize_old_states
+        # Send element lists as diffs against a full snapshot taken every dom_diff_interval steps
+        self.element_encoder = (
+            ElementDiffEncoder(dom_diff_interval, count_tokens=self.token_counter.count)
+            if dom_diff_interval else None
+        )
+        self._snapshot_messages: dict[str, ManagedMessage] = {}
+        # arguments of the current state message, to rebuild it as a full list when its diff base is trimmed
+        self._current_state_args: Optional[dict] = None
+        self._current_base_step: Optional[int] = None
+        self._appended_text = ""
+        # Cap the element list of huge pages, the rest can be paged through with show_more_elements
+        self.element_budgeter = (
+            ElementBudgeter(max_element_tokens, count_tokens=self.token_counter.count)
+            if max_element_tokens else None
+        )
         # Custom: Move Task info to state_message
         self.history = MessageHistory()
         self._add_message_with_tokens(self.system_prompt)
@@ -65,14 +93,67 @@ class CustomMessageManager(MessageManager):
             self._add_message_with_tokens(context_message)
 
     def cut_messages(self):
-        """Get current message list, potentially trimmed to max tokens"""
+        """Trim history to max_input_tokens, dropping the oldest messages before shortening the current state"""
         diff = self.history.total_tokens - self.max_input_tokens
+        if diff <= 0:
+            return
         min_message_len = 2 if self.message_context is not None else 1
-        
-        while diff > 0 and len(self.history.messages) > min_message_len:
-            self.history.remove_message(min_message_len)  # always remove the oldest message
-            diff = self.history.total_tokens - self.max_input_tokens
-        
+
+        # Find the cut point in one pass over the running token counts, then drop the oldest messages at once.
+        # The newest message is the current state and is never dropped.
+        messages = self.history.messages
+        cut = min_message_len
+        removed_tokens = 0
+        while cut < len(messages) - 1 and removed_tokens < diff:
+            removed_tokens += messages[cut].metadata.input_tokens
+            cut += 1
+        del messages[min_message_len:cut]
+        self.history.total_tokens -= removed_tokens
+        if self.element_encoder is not None and self._resync_current_diff():
+            return
+
+        if self.history.total_tokens > self.max_input_tokens:
+            self._shorten_current_state()
+
+    def _resync_current_diff(self) -> bool:
+        """Rebuild the current state message as a full list if the snapshot its diff refers to was trimmed"""
+        forgotten = self._forget_evicted_snapshots()
+        if self._current_base_step is None or get_tab_key(self._current_state_args["state"]) not in forgotten:
+            return False
+        logger.debug("Element snapshot trimmed from history, sending the full element list again")
+        appended_text = self._appended_text
+        self.history.remove_message(-1)
+        self.add_state_message(**self._current_state_args)
+        if appended_text:
+            self.append_to_state_message(appended_text)
+        self.cut_messages()
+        return True
+
+    def _shorten_current_state(self) -> None:
+        """Drop the screenshot of the current state message, then cut its text to fit max_input_tokens"""
+        managed = self.history.messages[-1]
+        content = managed.message.content
+        if isinstance(content, list):
+            content = "".join(part["text"] for part in content if isinstance(part, dict) and part.get("type") == "text")
+            self._replace_message(managed, managed.message.model_copy(update={"content": content}))
+        excess_tokens = self.history.total_tokens - self.max_input_tokens
+        if excess_tokens <= 0:
+            return
+        proportion_to_remove = excess_tokens / max(1, managed.metadata.input_tokens)
+        if proportion_to_remove > 0.99:
+            raise ValueError(
+                f'Max token limit reached - history is too long - reduce the system prompt or task. '
+                f'proportion_to_remove: {proportion_to_remove}'
+            )
+        logger.debug(f"Cutting {proportion_to_remove:.1%} of the current state message to fit max_input_tokens")
+        for tab_key, snapshot in list(self._snapshot_messages.items()):
+            if snapshot is managed:
+                # the model never sees this list in full, so it cannot be a diff base
+                self.element_encoder.forget(tab_key)
+                del self._snapshot_messages[tab_key]
+        content = content[:int(len(content) * (1 - proportion_to_remove))]
+        self._replace_message(managed, managed.message.model_copy(update={"content": content}))
+
     def add_state_message(
             self,
             state: BrowserState,
@@ -83,29 +164,154 @@ class CustomMessageManager(MessageManager):
     ) -> None:
         """Add browser state as human message"""
         # otherwise add state message and result to next message (which will not stay in memory)
-        state_message = self.agent_prompt_class(
+        encoder_kwargs = {}
+        if self.element_encoder is not None:
+            self._forget_evicted_snapshots()
+            encoder_kwargs["element_encoder"] = self.element_encoder
+        if self.element_budgeter is not None:
+            encoder_kwargs["element_budgeter"] = self.element_budgeter
+        prompt = self.agent_prompt_class(
             state,
             actions,
             result,
             include_attributes=self.include_attributes,
             max_error_length=self.max_error_length,
             step_info=step_info,
-        ).get_user_message(use_vision)
+            **encoder_kwargs,
+        )
+        state_message = prompt.get_user_message(use_vision)
         self._add_message_with_tokens(state_message)
+        self._current_state_args = dict(state=state, actions=actions, result=result, step_info=step_info,
+                                        use_vision=use_vision)
+        self._current_base_step = prompt.element_base_step
+        self._appended_text = ""
+        self.last_prompt_stats = self._prompt_stats(prompt)
+        if self.element_encoder is not None and prompt.element_base_step is None:
+            self._snapshot_messages[get_tab_key(state)] = self.history.messages[-1]
+        self.compact_state_messages()
+
+    def _prompt_stats(self, prompt: AgentMessagePrompt) -> Optional[dict]:
+        """Characters, estimated tokens and image bytes per part of the state message just added"""
+        sections = getattr(prompt, "sections", None)
+        if not sections:
+            return None
+        stats = {name: {"chars": len(text), "tokens": self._count_text_tokens(text)}
+                 for name, text in sections.items() if text}
+        image_bytes = getattr(prompt, "image_bytes", 0)
+        if image_bytes:
+            stats["screenshot"] = {"bytes": image_bytes, "tokens": self.IMG_TOKENS}
+        return {
+            "sections": stats,
+            "state_message_tokens": self.history.messages[-1].metadata.input_tokens,
+            "history_tokens": self.history.total_tokens,
+        }
+
+    def _forget_evicted_snapshots(self) -> set[str]:
+        """Diffs are only meaningful while the full list they refer to is still in history"""
+        retained = {id(managed) for managed in self.history.messages}
+        forgotten = set()
+        for tab_key, managed in list(self._snapshot_messages.items()):
+            if id(managed) not in retained:
+                self.element_encoder.forget(tab_key)
+                del self._snapshot_messages[tab_key]
+                forgotten.add(tab_key)
+        return forgotten
+
+    def remove_state_message(self) -> None:
+        """Remove the state message once the model answered, unless later diffs refer to its element list"""
+        for managed in reversed(self.history.messages):
+            if isinstance(managed.message, HumanMessage):
+                if any(managed is snapshot for snapshot in self._snapshot_messages.values()):
+                    return
+                break
+        self._remove_state_message_by_index(-1)
+
+    def compact_state_messages(self) -> None:
+        """Drop screenshots beyond the newest max_history_images and, optionally, older element dumps.
+
+        Only matters when state messages are kept in history (deepseek-reasoner, element snapshots),
+        where every retained screenshot is re-sent with each request.
+        """
+        min_message_len = 2 if self.message_context is not None else 1
+        images_seen = 0
+        newest_state = True
+        snapshot_ids = {id(managed) for managed in self._snapshot_messages.values()}
+        for managed in reversed(self.history.messages[min_message_len:]):
+            message = managed.message
+            if not isinstance(message, HumanMessage):
+                continue
+            content = message.content
+            if isinstance(content, list):
+                has_image = any(isinstance(part, dict) and part.get("type") == "image_url" for part in content)
+                images_seen += has_image
+                if has_image and images_seen > self.max_history_images:
+                    content = [
+                        part if not (isinstance(part, dict) and part.get("type") == "image_url")
+                        else {"type": "text", "text": "[screenshot of an earlier step omitted]"}
+                        for part in content
+                    ]
+            if self.summarize_old_states and not newest_state and id(managed) not in snapshot_ids:
+                if isinstance(content, str):
+                    content = summarize_state_description(content)
+                else:
+                    content = [
+                        {**part, "text": summarize_state_description(part["text"])}
+                        if isinstance(part, dict) and part.get("type") == "text" else part
+                        for part in content
+                    ]
+            newest_state = False
+            if content != message.content:
+                self._replace_message(managed, message.model_copy(update={"content": content}))
+
+    def append_to_state_message(self, text: str) -> None:
+        """Append text, e.g. the planner's plan, to the current state message"""
+        self._appended_text += text
+        managed = self.history.messages[-1]
+        content = managed.message.content
+        if isinstance(content, str):
+            content += text
+        else:
+            content = [
+                {**part, "text": part["text"] + text}
+                if isinstance(part, dict) and part.get("type") == "text" else part
+                for part in content
+            ]
+        self._replace_message(managed, managed.message.model_copy(update={"content": content}))
+
+    def _replace_message(self, managed, message: BaseMessage) -> None:
+        tokens = self._count_tokens(message)
+        self.history.total_tokens += tokens - managed.metadata.input_tokens
+        managed.message = message
+        managed.metadata.input_tokens = tokens
     
-    def _count_text_tokens(self, text: str) -> int:
-        if isinstance(self.llm, (ChatOpenAI, ChatAnthropic, DeepSeekR1ChatOpenAI)):
-            try:
-                tokens = self.llm.get_num_tokens(text)
-            except Exception:
-                tokens = (
-					len(text) // self.estimated_characters_per_token
-				)  # Rough estimate if no tokenizer available
+    def get_messages(self) -> List[BaseMessage]:
+        """Get current message list with provider prompt-cache hints on the stable prefix"""
+        messages = super().get_messages()
+        if isinstance(self.llm, ChatAnthropic):
+            messages = list(messages)
+            # The system prompt with the action descriptions never changes during a run
+            messages[0] = self._with_cache_control(messages[0])
+            # Everything before the current state message was already sent in the previous request
+            if len(messages) > 2:
+                messages[-2] = self._with_cache_control(messages[-2])
+        # OpenAI-compatible providers cache byte-identical prefixes automatically
+        return messages
+
+    @staticmethod
+    def _with_cache_control(message: BaseMessage) -> BaseMessage:
+        """Return a copy of the message whose last content block is an Anthropic cache breakpoint"""
+        if isinstance(message.content, str):
+            blocks = [{"type": "text", "text": message.content}] if message.content else []
         else:
-            tokens = (
-				len(text) // self.estimated_characters_per_token
-			)  # Rough estimate if no tokenizer available
-        return tokens
+            blocks = [dict(block) if isinstance(block, dict) else {"type": "text", "text": block}
+                      for block in message.content]
+        if not blocks:
+            return message
+        blocks[-1] = {**blocks[-1], "cache_control": {"type": "ephemeral"}}
+        return message.model_copy(update={"content": blocks})
+
+    def _count_text_tokens(self, text: str) -> int:
+        return self.token_counter.count(text)
 
     def _remove_state_message_by_index(self, remove_ind=-1) -> None:
         """Remove last state message from history"""
@@ -1,4 +1,5 @@
 import pdb
+import re
 from typing import List, Optional
 
 from browser_use.agent.prompts import SystemPrompt, AgentMessagePrompt
@@ -8,9 +9,24 @@ from langchain_core.messages import HumanMessage, SystemMessage
 from datetime import datetime
 
 from .custom_views import CustomAgentStepInfo
+from .dom_diff import ElementDiffEncoder, get_tab_key
+from .element_budget import ElementBudgeter
 
 
 class CustomSystemPrompt(SystemPrompt):
+    # (prompt class, action description, max actions) -> rendered system message
+    _system_messages: dict[tuple, SystemMessage] = {}
+
+    def get_system_message(self) -> SystemMessage:
+        """Render the system prompt once per prompt class and action set"""
+        key = (type(self), self.default_action_description, self.max_actions_per_step)
+        message = self._system_messages.get(key)
+        if message is None:
+            message = super().get_system_message()
+            self._system_messages[key] = message
+        # the message manager filters sensitive data in place, so every agent gets its own copy
+        return message.model_copy()
+
     def important_rules(self) -> str:
         """
         Returns the important rules for the agent.
@@ -124,6 +140,8 @@ class CustomAgentMessagePrompt(AgentMessagePrompt):
             include_attributes: list[str] = [],
             max_error_length: int = 400,
             step_info: Optional[CustomAgentStepInfo] = None,
+            element_encoder: Optional[ElementDiffEncoder] = None,
+            element_budgeter: Optional[ElementBudgeter] = None,
     ):
         super(CustomAgentMessagePrompt, self).__init__(state=state,
                                                        result=result,
@@ -132,6 +150,13 @@ class CustomAgentMessagePrompt(AgentMessagePrompt):
                                                        step_info=step_info
                                                        )
         self.actions = actions
+        self.element_encoder = element_encoder
+        self.element_budgeter = element_budgeter
+        # step of the full element list the message is a diff against, None for a full list
+        self.element_base_step: Optional[int] = None
+        # text of each part of the last user message, for prompt composition telemetry
+        self.sections: dict[str, str] = {}
+        self.image_bytes = 0
 
     def get_user_message(self, use_vision: bool = True) -> HumanMessage:
         if self.step_info:
@@ -139,10 +164,23 @@ class CustomAgentMessagePrompt(AgentMessagePrompt):
         else:
             step_info_description = ''
 
-        time_str = datetime.now().strftime("%Y-%m-%d %H:%M")
-        step_info_description += f"Current date and time: {time_str}"
-
         elements_text = self.state.element_tree.clickable_elements_to_string(include_attributes=self.include_attributes)
+        elements_header = "6. Interactive elements:"
+        if self.element_budgeter is not None and elements_text != '':
+            elements_text = self.element_budgeter.budget(
+                elements_text, self.state.selector_map, self.step_info.task if self.step_info else ""
+            )
+        if self.element_encoder is not None and elements_text != '':
+            elements_text, self.element_base_step = self.element_encoder.encode(
+                get_tab_key(self.state),
+                self.state.url,
+                elements_text,
+                self.step_info.step_number if self.step_info else 0,
+            )
+            if self.element_base_step is not None:
+                elements_header = (f"6. Interactive elements (changes since the full list of step "
+                                   f"{self.element_base_step}: + added, ~ changed, - removed; "
+                                   f"all other elements are unchanged):")
 
         has_content_above = (self.state.pixels_above or 0) > 0
         has_content_below = (self.state.pixels_below or 0) > 0
@@ -173,27 +211,47 @@ class CustomAgentMessagePrompt(AgentMessagePrompt):
 4. Current url: {self.state.url}
 5. Available tabs:
 {self.state.tabs}
-6. Interactive elements:
+{elements_header}
 {elements_text}
         """
 
+        self.sections = {
+            "task": self.step_info.task,
+            "hints": self.step_info.add_infos,
+            "memory": self.step_info.memory,
+            "tabs": f"{self.state.url}\n{self.state.tabs}",
+            "elements": elements_text,
+            "previous_actions": "",
+            "action_results": "",
+            "action_errors": "",
+        }
         if self.actions and self.result:
             state_description += "\n **Previous Actions** \n"
             state_description += f'Previous step: {self.step_info.step_number-1}/{self.step_info.max_steps} \n'
             for i, result in enumerate(self.result):
                 action = self.actions[i]
-                state_description += f"Previous action {i + 1}/{len(self.result)}: {action.model_dump_json(exclude_unset=True)}\n"
+                action_text = f"Previous action {i + 1}/{len(self.result)}: {action.model_dump_json(exclude_unset=True)}\n"
+                state_description += action_text
+                self.sections["previous_actions"] += action_text
                 if result.include_in_memory:
                     if result.extracted_content:
-                        state_description += f"Result of previous action {i + 1}/{len(self.result)}: {result.extracted_content}\n"
+                        result_text = f"Result of previous action {i + 1}/{len(self.result)}: {result.extracted_content}\n"
+                        state_description += result_text
+                        self.sections["action_results"] += result_text
                     if result.error:
                         # only use last 300 characters of error
                         error = result.error[-self.max_error_length:]
-                        state_description += (
-                            f"Error of previous action {i + 1}/{len(self.result)}: ...{error}\n"
-                        )
+                        error_text = f"Error of previous action {i + 1}/{len(self.result)}: ...{error}\n"
+                        state_description += error_text
+                        self.sections["action_errors"] += error_text
+
+        # Volatile details go last so the start of the message stays cacheable
+        time_str = datetime.now().strftime("%Y-%m-%d %H:%M")
+        state_description += f"\nCurrent date and time: {time_str}\n"
 
         if self.state.screenshot and use_vision == True:
+            # decoded size of the base64 screenshot, without the padding
+            self.image_bytes = len(self.state.screenshot) * 3 // 4 - self.state.screenshot[-2:].count("=")
             # Format message for vision model
             return HumanMessage(
                 content=[
@@ -206,3 +264,21 @@ class CustomAgentMessagePrompt(AgentMessagePrompt):
             )
 
         return HumanMessage(content=state_description)
+
+
+ELEMENTS_HEADER = "6. Interactive elements:\n"
+ELEMENT_LINE = re.compile(r"^\s*\[\d+\]", re.MULTILINE)
+ELEMENTS_END_MARKERS = ("\n **Previous Actions** \n", "\nCurrent date and time:")
+
+
+def summarize_state_description(text: str) -> str:
+    """Replace the interactive element dump of an older state message with a one-line descriptor"""
+    start = text.find(ELEMENTS_HEADER)
+    if start == -1:
+        return text
+    body_start = start + len(ELEMENTS_HEADER)
+    ends = [i for i in (text.find(marker, body_start) for marker in ELEMENTS_END_MARKERS) if i != -1]
+    end = min(ends) if ends else len(text)
+    n_elements = len(ELEMENT_LINE.findall(text, body_start, end))
+    descriptor = f"6. Interactive elements: ({n_elements} elements of an earlier page state omitted)\n"
+    return text[:start] + descriptor + text[end:]
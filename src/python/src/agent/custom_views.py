@@ -1,7 +1,8 @@
+import weakref
 from dataclasses import dataclass
-from typing import Type
+from typing import Any, Dict, Optional, Type
 
-from browser_use.agent.views import AgentOutput
+from browser_use.agent.views import AgentHistory, AgentOutput
 from browser_use.controller.registry.views import ActionModel
 from pydantic import BaseModel, ConfigDict, Field, create_model
 
@@ -17,6 +18,22 @@ class CustomAgentStepInfo:
     future_plans: str
 
 
+class CustomAgentHistory(AgentHistory):
+    """History item that also records the prompt composition and state capture timings of the step"""
+
+    prompt_stats: Optional[dict] = None
+    # seconds per get_state phase (dom, screenshot, scroll, title, tabs, total)
+    state_timings: Optional[dict] = None
+
+    def model_dump(self, **kwargs) -> Dict[str, Any]:
+        data = super().model_dump(**kwargs)
+        if self.prompt_stats:
+            data["prompt_stats"] = self.prompt_stats
+        if self.state_timings:
+            data["state_timings"] = self.state_timings
+        return data
+
+
 class CustomAgentBrain(BaseModel):
     """Current state of the agent"""
 
@@ -44,12 +61,20 @@ class CustomAgentOutput(AgentOutput):
         custom_actions: Type[ActionModel],
     ) -> Type["CustomAgentOutput"]:
         """Extend actions with custom actions"""
-        return create_model(
-            "CustomAgentOutput",
-            __base__=CustomAgentOutput,
-            action=(
-                list[custom_actions],
-                Field(...),
-            ),  # Properly annotated field with no default
-            __module__=CustomAgentOutput.__module__,
-        )
+        output_model = _custom_output_models.get(custom_actions)
+        if output_model is None:
+            output_model = create_model(
+                "CustomAgentOutput",
+                __base__=CustomAgentOutput,
+                action=(
+                    list[custom_actions],
+                    Field(...),
+                ),  # Properly annotated field with no default
+                __module__=CustomAgentOutput.__module__,
+            )
+            _custom_output_models[custom_actions] = output_model
+        return output_model
+
+
+# Action model -> output model; action models are shared between agents by CachedRegistry
+_custom_output_models: "weakref.WeakKeyDictionary[Type[ActionModel], Type[CustomAgentOutput]]" = weakref.WeakKeyDictionary()
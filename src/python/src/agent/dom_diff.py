@@ -0,0 +1,112 @@
+import logging
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from browser_use.browser.views import BrowserState
+
+from .element_list import element_index, split_elements
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ElementSnapshot:
+    url: str
+    step: int
+    # highlight index -> element text
+    elements: dict[int, str]
+    # free text and markers, which have no index
+    other: list[str]
+
+
+def get_tab_key(state: BrowserState) -> str:
+    """Identify the tab the state belongs to, falling back to its url"""
+    for tab in state.tabs:
+        if tab.url == state.url:
+            return str(tab.page_id)
+    return state.url
+
+
+class ElementDiffEncoder:
+    """Encode interactive element lists as changes against the last full snapshot of the tab.
+
+    A full list is sent on the first visit of a tab, after navigation, every
+    ``full_snapshot_interval`` steps and whenever the diff would not be much
+    smaller than the list itself. Elements are compared by highlight index as
+    a whole, including the text lines that follow their ``[index]<tag>`` line,
+    so every change names the element it belongs to.
+    """
+
+    def __init__(
+            self,
+            full_snapshot_interval: int = 5,
+            max_diff_ratio: float = 0.5,
+            count_tokens: Callable[[str], int] = len,
+    ):
+        self.full_snapshot_interval = full_snapshot_interval
+        self.max_diff_ratio = max_diff_ratio
+        self.count_tokens = count_tokens
+        self._snapshots: dict[str, ElementSnapshot] = {}
+        self.full_tokens = 0
+        self.sent_tokens = 0
+        self.full_snapshots = 0
+        self.diffs = 0
+
+    def encode(self, tab_key: str, url: str, elements_text: str, step: int) -> tuple[str, Optional[int]]:
+        """Return (text, base step); the base step is None when text is a full snapshot"""
+        self.full_tokens += self.count_tokens(elements_text)
+        snapshot = self._snapshots.get(tab_key)
+        if snapshot is None or snapshot.url != url or step - snapshot.step >= self.full_snapshot_interval:
+            return self._full(tab_key, url, elements_text, step), None
+
+        elements, other = _split(elements_text)
+        diff_entries = []
+        for index, element in elements.items():
+            if index not in snapshot.elements:
+                diff_entries.append(f"+ {element}")
+            elif snapshot.elements[index] != element:
+                diff_entries.append(f"~ {element}")
+        other_set, snapshot_other_set = set(other), set(snapshot.other)
+        diff_entries += [f"+ {text}" for text in other if text not in snapshot_other_set]
+        # a removed element is named by its first line
+        diff_entries += [f"- {element.splitlines()[0]}" for index, element in snapshot.elements.items()
+                         if index not in elements]
+        diff_entries += [f"- {text}" for text in snapshot.other if text not in other_set]
+        diff_text = "\n".join(diff_entries) if diff_entries else "(no changes)"
+        if len(diff_text) > self.max_diff_ratio * len(elements_text):
+            return self._full(tab_key, url, elements_text, step), None
+
+        self.diffs += 1
+        self.sent_tokens += self.count_tokens(diff_text)
+        return diff_text, snapshot.step
+
+    def _full(self, tab_key: str, url: str, elements_text: str, step: int) -> str:
+        elements, other = _split(elements_text)
+        self._snapshots[tab_key] = ElementSnapshot(url=url, step=step, elements=elements, other=other)
+        self.full_snapshots += 1
+        self.sent_tokens += self.count_tokens(elements_text)
+        return elements_text
+
+    def forget(self, tab_key: str) -> None:
+        """Drop the snapshot of a tab, e.g. once the model can no longer see it"""
+        self._snapshots.pop(tab_key, None)
+
+    def stats(self) -> dict:
+        return {
+            "full_snapshots": self.full_snapshots,
+            "diffs": self.diffs,
+            "element_tokens": self.full_tokens,
+            "sent_tokens": self.sent_tokens,
+            "saved_ratio": round(1 - self.sent_tokens / self.full_tokens, 3) if self.full_tokens else 0.0,
+        }
+
+
+def _split(elements_text: str) -> tuple[dict[int, str], list[str]]:
+    elements, other = {}, []
+    for element in split_elements(elements_text):
+        index = element_index(element)
+        if index is None:
+            other.append(element)
+        else:
+            elements[index] = element
+    return elements, other
@@ -0,0 +1,100 @@
+import logging
+import re
+from typing import Callable
+
+from browser_use.dom.views import SelectorMap
+
+from .element_list import split_elements
+
+logger = logging.getLogger(__name__)
+
+ELEMENT_LINE = re.compile(r"^\[(\d+)\]<(\w+)")
+TAG_WEIGHTS = {"input": 1.5, "textarea": 1.5, "select": 1.5, "button": 1.0, "a": 0.5}
+STOPWORDS = {"the", "and", "for", "with", "from", "that", "this", "then", "into", "on", "what", "find", "please",
+             "you", "your", "all", "are", "can", "how", "get", "out", "about", "use", "using", "page", "website"}
+
+
+def task_keywords(task: str) -> set[str]:
+    return {word for word in re.findall(r"[a-z0-9]{3,}", task.lower()) if word not in STOPWORDS}
+
+
+class ElementBudgeter:
+    """Fit the interactive element list of a page into a token budget.
+
+    Elements, with the text lines that follow their ``[index]<tag>`` line, are
+    ranked by task-keyword relevance, distance to the viewport and
+    interactivity; the best ones are emitted in page order until the budget
+    is used, followed by a marker for the rest. The omitted elements are kept
+    in pages the model can list with the ``show_more_elements`` action.
+    """
+
+    def __init__(self, token_budget: int, count_tokens: Callable[[str], int]):
+        self.token_budget = token_budget
+        self.count_tokens = count_tokens
+        self.overflow_pages: list[str] = []
+
+    def budget(self, elements_text: str, selector_map: SelectorMap, task: str) -> str:
+        total_tokens = self.count_tokens(elements_text)
+        self.overflow_pages = []
+        if total_tokens <= self.token_budget:
+            return elements_text
+
+        elements = split_elements(elements_text)
+        tokens_per_char = total_tokens / max(1, len(elements_text))
+        element_tokens = [len(element) * tokens_per_char + 1 for element in elements]
+        keywords = task_keywords(task)
+        ranked = sorted(range(len(elements)),
+                        key=lambda i: self._score(elements[i], i, len(elements), selector_map, keywords), reverse=True)
+
+        selected = set()
+        used = 0.0
+        for i in ranked:
+            if used + element_tokens[i] <= self.token_budget:
+                selected.add(i)
+                used += element_tokens[i]
+
+        page, page_tokens = [], 0.0
+        for i in range(len(elements)):
+            if i in selected:
+                continue
+            if page and page_tokens + element_tokens[i] > self.token_budget:
+                self.overflow_pages.append("\n".join(page))
+                page, page_tokens = [], 0.0
+            page.append(elements[i])
+            page_tokens += element_tokens[i]
+        if page:
+            self.overflow_pages.append("\n".join(page))
+
+        n_omitted = len(elements) - len(selected)
+        logger.debug(f"Element list of {total_tokens} tokens cut to {int(used)} tokens, {n_omitted} elements omitted")
+        shown = "\n".join(elements[i] for i in sorted(selected))
+        return (f"{shown}\n... {n_omitted} more elements not shown - use show_more_elements with page "
+                f"1-{len(self.overflow_pages)} to list them ...")
+
+    @staticmethod
+    def _score(element: str, position: int, n_elements: int, selector_map: SelectorMap, keywords: set[str]) -> float:
+        score = 0.0
+        match = ELEMENT_LINE.match(element)
+        if match:
+            score += 2.0 + TAG_WEIGHTS.get(match.group(2), 0.0)
+        if keywords:
+            lowered = element.lower()
+            score += 5.0 * sum(1 for keyword in keywords if keyword in lowered)
+
+        element = selector_map.get(int(match.group(1))) if match else None
+        if element is not None and element.viewport_coordinates and element.viewport_info:
+            top = element.viewport_coordinates.top_left.y
+            height = element.viewport_info.height or 1
+            distance = max(0, -top, top - height)
+            score += 2.0 / (1 + distance / height)
+        else:
+            # no coordinates: elements earlier in the page are usually closer to the viewport
+            score += 2.0 * (1 - position / n_elements)
+        return score
+
+    def get_page(self, page: int) -> str:
+        if not self.overflow_pages:
+            return "All elements of the current page are already listed."
+        if not 1 <= page <= len(self.overflow_pages):
+            return f"Page {page} does not exist, choose a page between 1 and {len(self.overflow_pages)}."
+        return f"More elements (page {page}/{len(self.overflow_pages)}):\n{self.overflow_pages[page - 1]}"
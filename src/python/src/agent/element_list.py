@@ -0,0 +1,27 @@
+import re
+from typing import Optional
+
+ELEMENT_START = re.compile(r"^\[(\d*)\]")
+
+
+def split_elements(elements_text: str) -> list[str]:
+    """Split an interactive element list into one entry per element.
+
+    browser_use joins the text nodes of an element with newlines, so an element
+    often spans several lines. Lines that do not start with ``[index]``, ``[]``
+    or a ``... text ...`` marker continue the element before them.
+    """
+    elements: list[str] = []
+    for line in elements_text.splitlines():
+        starts_entry = ELEMENT_START.match(line) or (line.startswith("... ") and line.endswith(" ..."))
+        if starts_entry or not elements:
+            elements.append(line)
+        else:
+            elements[-1] += "\n" + line
+    return elements
+
+
+def element_index(element: str) -> Optional[int]:
+    """Highlight index of an entry from split_elements, None for free text and markers"""
+    match = ELEMENT_START.match(element)
+    return int(match.group(1)) if match and match.group(1) else None
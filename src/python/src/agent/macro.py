@@ -0,0 +1,254 @@
+"""Record successful agent runs as parameterized macros and replay them without the LLM.
+
+Usage: python -m src.agent.macro <history.json> <macro.json> [--param name=recorded value ...]
+"""
+import argparse
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional, Union
+from urllib.parse import urlparse
+
+from browser_use.agent.views import ActionResult, AgentHistoryList
+from browser_use.browser.context import BrowserContext
+from browser_use.controller.service import Controller
+from browser_use.dom.history_tree_processor.service import DOMHistoryElement, HistoryTreeProcessor
+from browser_use.dom.views import DOMElementNode, SelectorMap
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from src.agent.custom_agent import CustomAgent
+from src.browser.custom_context import CustomBrowserContext
+
+logger = logging.getLogger(__name__)
+
+# attributes that identify an element on their own and usually survive re-renders
+IDENTIFYING_ATTRIBUTES = ("id", "name", "aria-label", "placeholder", "title", "href", "alt", "data-testid")
+# actions whose outcome belongs to the recorded run only
+SKIPPED_ACTIONS = {"done"}
+# free-text fields of input actions; parameters are only substituted inside these
+PARAMETER_FIELDS = {"input_text": ("text",), "select_dropdown_option": ("text",), "search_google": ("query",)}
+# shorter recorded values would match unrelated text
+MIN_PARAMETER_LENGTH = 3
+LOCATOR_FIELDS = ("tag_name", "xpath", "highlight_index", "entire_parent_branch_path", "attributes", "shadow_root",
+                  "css_selector")
+
+
+@dataclass
+class MacroStep:
+    url: str
+    actions: list[dict]
+    # locator of the element each action targets, None for actions without an index
+    elements: list[Optional[dict]]
+
+
+@dataclass
+class Macro:
+    task: str
+    # parameter name -> value used in the recorded run
+    parameters: dict[str, str] = field(default_factory=dict)
+    steps: list[MacroStep] = field(default_factory=list)
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "Macro":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(task=data["task"], parameters=data.get("parameters", {}),
+                   steps=[MacroStep(**step) for step in data.get("steps", [])])
+
+
+@dataclass
+class MacroReplayResult:
+    success: bool
+    steps_replayed: int
+    results: list[ActionResult] = field(default_factory=list)
+    error: Optional[str] = None
+    # history of the LLM agent when it had to take over
+    history: Optional[AgentHistoryList] = None
+
+
+def _parameterize(action: dict, parameters: dict[str, str]) -> dict:
+    """Replace recorded parameter values by ``{name}`` in the free-text fields of an input action"""
+    name, params = next(iter(action.items()))
+    fields = PARAMETER_FIELDS.get(name, ())
+    if not fields or not isinstance(params, dict):
+        return action
+    params = dict(params)
+    for key in fields:
+        value = params.get(key)
+        if not isinstance(value, str):
+            continue
+        for parameter, literal in sorted(parameters.items(), key=lambda item: len(item[1]), reverse=True):
+            value = value.replace(literal, "{" + parameter + "}")
+        params[key] = value
+    return {name: params}
+
+
+def _fill(value: Any, values: dict[str, str]) -> Any:
+    if isinstance(value, str):
+        for name, literal in values.items():
+            value = value.replace("{" + name + "}", literal)
+        return value
+    if isinstance(value, dict):
+        return {key: _fill(item, values) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fill(item, values) for item in value]
+    return value
+
+
+def record_macro(history: Union[AgentHistoryList, str], parameters: Optional[dict[str, str]] = None,
+                 task: str = "") -> Macro:
+    """Build a macro from a successful run, given as history or history file written by save_history.
+
+    Actions that failed are left out. A parameter's recorded value is replaced
+    by a ``{name}`` placeholder in the text fields of input actions only;
+    values shorter than MIN_PARAMETER_LENGTH are not parameterized.
+    """
+    if isinstance(history, str):
+        with open(history, "r", encoding="utf-8") as f:
+            items = json.load(f)["history"]
+    else:
+        items = history.model_dump()["history"]
+    parameters = dict(parameters or {})
+    for name, literal in list(parameters.items()):
+        if len(literal) < MIN_PARAMETER_LENGTH:
+            logger.warning(f"Parameter {name}={literal!r} is too short to be recorded unambiguously, skipped")
+            del parameters[name]
+    last_results = items[-1]["result"] if items else []
+    if not last_results or not last_results[-1].get("is_done"):
+        raise ValueError("Only runs that finished with done can be recorded as a macro")
+
+    macro = Macro(task=task, parameters=parameters)
+    for item in items:
+        model_output = item.get("model_output")
+        if not model_output:
+            continue
+        results = item.get("result") or []
+        elements = item["state"].get("interacted_element") or [None] * len(model_output["action"])
+        step = MacroStep(url=item["state"].get("url", ""), actions=[], elements=[])
+        for action, element, result in zip(model_output["action"], elements, results):
+            if result.get("error") or next(iter(action)) in SKIPPED_ACTIONS:
+                continue
+            step.actions.append(_parameterize(action, parameters))
+            step.elements.append({key: element[key] for key in LOCATOR_FIELDS if key in element} if element else None)
+        if step.actions:
+            macro.steps.append(step)
+    logger.info(f"Recorded macro with {len(macro.steps)} steps, "
+                f"{sum(len(step.actions) for step in macro.steps)} actions")
+    return macro
+
+
+def locate_element(locator: dict, selector_map: SelectorMap) -> Optional[DOMElementNode]:
+    """Find the recorded element by DOM hash, then by xpath, then by its identifying attributes"""
+    history_element = DOMHistoryElement(**locator)
+    elements = list(selector_map.values())
+    for element in elements:
+        if HistoryTreeProcessor.compare_history_element_and_dom_element(history_element, element):
+            return element
+    same_tag = [element for element in elements if element.tag_name == locator["tag_name"]]
+    for element in same_tag:
+        if element.xpath == locator["xpath"]:
+            return element
+    identifying = {key: value for key, value in locator.get("attributes", {}).items() if key in IDENTIFYING_ATTRIBUTES}
+    if identifying:
+        matches = [element for element in same_tag
+                   if all(element.attributes.get(key) == value for key, value in identifying.items())]
+        if len(matches) == 1:
+            return matches[0]
+    return None
+
+
+def _same_page(url: str, recorded_url: str) -> bool:
+    if not recorded_url or recorded_url == "about:blank":
+        return True
+    current, recorded = urlparse(url), urlparse(recorded_url)
+    return (current.netloc, current.path.rstrip("/")) == (recorded.netloc, recorded.path.rstrip("/"))
+
+
+class MacroReplayer:
+    """Replay a macro through the controller, checking the page and each target element before acting"""
+
+    def __init__(self, controller: Controller, browser_context: BrowserContext,
+                 page_extraction_llm: Optional[BaseChatModel] = None,
+                 sensitive_data: Optional[dict[str, str]] = None,
+                 available_file_paths: Optional[list[str]] = None):
+        self.controller = controller
+        self.browser_context = browser_context
+        self.page_extraction_llm = page_extraction_llm
+        self.sensitive_data = sensitive_data
+        self.available_file_paths = available_file_paths
+
+    async def replay(self, macro: Macro, values: Optional[dict[str, str]] = None) -> MacroReplayResult:
+        values = {**macro.parameters, **(values or {})}
+        action_model = self.controller.registry.create_action_model()
+        results: list[ActionResult] = []
+        for n, step in enumerate(macro.steps):
+            page = await self.browser_context.get_current_page()
+            recorded_url = _fill(step.url, values)
+            if not _same_page(page.url, recorded_url):
+                return MacroReplayResult(False, n, results, f"Step {n + 1}: expected {recorded_url}, on {page.url}")
+            for action_data, locator in zip(step.actions, step.elements):
+                action = action_model(**_fill(action_data, values))
+                if locator is not None:
+                    if isinstance(self.browser_context, CustomBrowserContext):
+                        state = await self.browser_context.get_state(use_vision=False)
+                    else:
+                        state = await self.browser_context.get_state()
+                    element = locate_element(locator, state.selector_map)
+                    if element is None:
+                        return MacroReplayResult(False, n, results,
+                                                 f"Step {n + 1}: <{locator['tag_name']}> {locator['xpath']} not found")
+                    action.set_index(element.highlight_index)
+                result = await self.controller.multi_act(
+                    [action],
+                    self.browser_context,
+                    check_break_if_paused=lambda: None,
+                    check_for_new_elements=False,
+                    page_extraction_llm=self.page_extraction_llm,
+                    sensitive_data=self.sensitive_data,
+                    available_file_paths=self.available_file_paths,
+                )
+                results.extend(result)
+                if result and result[-1].error:
+                    return MacroReplayResult(False, n, results, f"Step {n + 1}: {result[-1].error}")
+            logger.info(f"🎬 Replayed macro step {n + 1}/{len(macro.steps)}")
+        return MacroReplayResult(True, len(macro.steps), results)
+
+
+async def replay_or_run(macro: Macro, agent: CustomAgent, values: Optional[dict[str, str]] = None,
+                        max_steps: int = 100) -> MacroReplayResult:
+    """Replay macro in the agent's browser and let the agent finish the task if verification fails.
+
+    The agent must be created with an injected browser context, so the replay
+    and the fallback act on the same pages.
+    """
+    replayer = MacroReplayer(agent.controller, agent.browser_context, agent.page_extraction_llm,
+                             agent.sensitive_data, agent.available_file_paths)
+    replay = await replayer.replay(macro, values)
+    if replay.success:
+        return replay
+    logger.warning(f"🎬 Macro replay stopped, falling back to the agent: {replay.error}")
+    if replay.steps_replayed:
+        agent.add_infos += (f"\nThe first {replay.steps_replayed} steps of this task were already done, "
+                            f"continue from the current page.")
+    replay.history = await agent.run(max_steps=max_steps)
+    return replay
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Record a saved agent history as a replayable macro")
+    parser.add_argument("history_file", help="agent history JSON file of a successful run")
+    parser.add_argument("macro_file", help="where to write the macro JSON")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUE",
+                        help="turn VALUE in the text of input actions into the parameter NAME")
+    parser.add_argument("--task", default="", help="task description stored with the macro")
+    args = parser.parse_args(argv)
+    parameters = dict(param.split("=", 1) for param in args.param)
+    record_macro(args.history_file, parameters, task=args.task).save(args.macro_file)
+
+
+if __name__ == "__main__":
+    main()
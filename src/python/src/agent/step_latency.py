@@ -0,0 +1,33 @@
+import statistics
+
+
+def summarize_step_latency(latencies: list[dict]) -> dict:
+    """Mean seconds per phase, separately for planning steps and the other steps"""
+    summary = {}
+    for kind, planning in (("planning_steps", True), ("other_steps", False)):
+        steps = [latency for latency in latencies if latency["planning"] == planning]
+        if steps:
+            summary[kind] = {"count": len(steps)} | {
+                phase: round(statistics.mean(step[phase] for step in steps), 3)
+                for phase in ("total", "model", "planner", "plan_wait")
+            }
+    return summary
+
+
+def summarize_state_timings(latencies: list[dict]) -> dict:
+    """Mean seconds per state capture phase, over the steps that recorded them"""
+    samples: dict[str, list[float]] = {}
+    for latency in latencies:
+        for phase, seconds in latency.get("state_phases", {}).items():
+            samples.setdefault(phase, []).append(seconds)
+    return {phase: round(statistics.mean(values), 3) for phase, values in samples.items()}
+
+
+def format_step_latency(summary: dict) -> str:
+    parts = []
+    for kind, label in (("planning_steps", "planning steps"), ("other_steps", "other steps")):
+        steps = summary.get(kind)
+        if steps:
+            parts.append(f"{steps['count']} {label} {steps['total']}s (model {steps['model']}s, "
+                         f"planner {steps['planner']}s, waiting for plan {steps['plan_wait']}s)")
+    return "; ".join(parts)
@@ -1,15 +1,53 @@
+import asyncio
 import json
 import logging
 import os
+import time
+from typing import Optional
 
 from browser_use.browser.browser import Browser
 from browser_use.browser.context import BrowserContext, BrowserContextConfig
+from browser_use.browser.views import BrowserError, BrowserState, TabInfo
+from browser_use.dom.service import DomService
 from playwright.async_api import Browser as PlaywrightBrowser
 from playwright.async_api import BrowserContext as PlaywrightBrowserContext
+from playwright.async_api import Page
 
 logger = logging.getLogger(__name__)
 
 
+class ActivePageTracker:
+    """Keeps track of the page the agent is currently working on.
+
+    The browser context publishes the page returned by ``get_current_page``
+    here, so consumers like the live view can look it up in O(1) instead of
+    scanning every context and page on each frame.
+    """
+
+    def __init__(self):
+        self._page: Optional[Page] = None
+
+    def publish(self, page: Optional[Page]) -> None:
+        if page is self._page:
+            return
+        self._page = page
+        if page is not None:
+            # Forget the page as soon as it goes away so we never hand out a closed page
+            page.once("close", lambda closed_page: self._on_close(closed_page))
+
+    def _on_close(self, page: Page) -> None:
+        if page is self._page:
+            self._page = None
+
+    def get(self) -> Optional[Page]:
+        if self._page is not None and self._page.is_closed():
+            self._page = None
+        return self._page
+
+    def clear(self) -> None:
+        self._page = None
+
+
 class CustomBrowserContext(BrowserContext):
     def __init__(
         self,
@@ -17,6 +55,12 @@ class CustomBrowserContext(BrowserContext):
         config: BrowserContextConfig = BrowserContextConfig()
     ):
         super(CustomBrowserContext, self).__init__(browser=browser, config=config)
+        self.active_page_tracker = ActivePageTracker()
+        # ElementBudgeter of the agent using this context, set by CustomAgent
+        self.element_pager = None
+        self._capture_screenshot = True
+        # seconds spent in each phase of the last state capture
+        self.last_state_timings: dict[str, float] = {}
 
     async def _init_context(self):
         """Initialize the browser context and set default settings"""
@@ -72,4 +116,120 @@ class CustomBrowserContext(BrowserContext):
             return page
         except Exception as e:
             logger.error(f"Error creating new page: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    async def get_current_page(self) -> Page:
+        """Get the current agent page and publish it to the active page tracker"""
+        page = await super().get_current_page()
+        self.active_page_tracker.publish(page)
+        return page
+
+    async def switch_to_tab(self, page_id: int) -> None:
+        """Switch tabs and publish the newly focused page"""
+        await super().switch_to_tab(page_id)
+        await self.get_current_page()
+
+    async def create_new_tab(self, url: str | None = None) -> None:
+        """Open a new tab and publish it as the active page"""
+        await super().create_new_tab(url)
+        await self.get_current_page()
+
+    async def get_state(self, use_vision: bool = True) -> BrowserState:
+        """Get the current state of the browser; the screenshot is skipped when use_vision is False"""
+        self._capture_screenshot = use_vision
+        try:
+            return await super().get_state()
+        finally:
+            self._capture_screenshot = True
+
+    async def _update_state(self, focus_element: int = -1) -> BrowserState:
+        """Collect the DOM, screenshot, tabs and scroll position concurrently"""
+        session = await self.get_session()
+
+        # Check if current page is still valid, if not switch to another available page
+        try:
+            page = await self.get_current_page()
+            await page.evaluate('1')
+        except Exception as e:
+            logger.debug(f'Current page is no longer accessible: {str(e)}')
+            pages = session.context.pages
+            if not pages:
+                raise BrowserError('Browser closed: no valid pages available')
+            session.current_page = pages[-1]
+            page = session.current_page
+
+        timings = {}
+
+        async def timed(phase, coro):
+            start = time.perf_counter()
+            try:
+                return await coro
+            finally:
+                timings[phase] = round(time.perf_counter() - start, 3)
+
+        start = time.perf_counter()
+        try:
+            await self.remove_highlights()
+            dom_task = timed("dom", DomService(page).get_clickable_elements(
+                focus_element=focus_element,
+                viewport_expansion=self.config.viewport_expansion,
+                highlight_elements=self.config.highlight_elements,
+            ))
+            page_info_task = asyncio.gather(
+                timed("scroll", self.get_scroll_info(page)),
+                timed("title", page.title()),
+                timed("tabs", self.get_tabs_info()),
+            )
+            if self._capture_screenshot and not self.config.highlight_elements:
+                content, screenshot_b64, page_info = await asyncio.gather(
+                    dom_task, timed("screenshot", self.take_screenshot()), page_info_task
+                )
+            else:
+                content, page_info = await asyncio.gather(dom_task, page_info_task)
+                # Highlights are drawn by the DOM walk and have to be in the screenshot
+                screenshot_b64 = await timed("screenshot", self.take_screenshot()) if self._capture_screenshot else None
+            (pixels_above, pixels_below), title, tabs = page_info
+
+            self.current_state = BrowserState(
+                element_tree=content.element_tree,
+                selector_map=content.selector_map,
+                url=page.url,
+                title=title,
+                tabs=tabs,
+                screenshot=screenshot_b64,
+                pixels_above=pixels_above,
+                pixels_below=pixels_below,
+            )
+            timings["total"] = round(time.perf_counter() - start, 3)
+            self.last_state_timings = timings
+            logger.debug(f"State captured in {timings['total']}s: {timings}")
+            return self.current_state
+        except Exception as e:
+            logger.error(f'Failed to update state: {str(e)}')
+            # Return last known good state if available
+            if hasattr(self, 'current_state'):
+                return self.current_state
+            raise
+
+    async def get_tabs_info(self) -> list[TabInfo]:
+        """Get information about all tabs, reading the titles concurrently"""
+        session = await self.get_session()
+        pages = session.context.pages
+        titles = await asyncio.gather(*(page.title() for page in pages))
+        return [TabInfo(page_id=page_id, url=page.url, title=title)
+                for page_id, (page, title) in enumerate(zip(pages, titles))]
+
+    async def get_scroll_info(self, page: Page) -> tuple[int, int]:
+        """Get scroll position information for the current page in a single round trip"""
+        scroll_y, viewport_height, total_height = await page.evaluate(
+            '() => [window.scrollY, window.innerHeight, document.documentElement.scrollHeight]'
+        )
+        return scroll_y, total_height - (scroll_y + viewport_height)
+
+    def get_active_page(self) -> Optional[Page]:
+        """Return the last page published by the agent without touching the browser"""
+        return self.active_page_tracker.get()
+
+    async def close(self):
+        self.active_page_tracker.clear()
+        await super().close()
@@ -0,0 +1,63 @@
+import hashlib
+import logging
+import threading
+from typing import Type
+
+from browser_use.controller.registry.service import Registry
+from browser_use.controller.registry.views import ActionModel
+
+logger = logging.getLogger(__name__)
+
+
+class CachedRegistry(Registry):
+    """Registry whose prompt description and action model are built once per action set.
+
+    Registries are fingerprinted by their actions' names, descriptions and
+    parameter fields, so every controller set up the same way (one per deep
+    research run, agent, ...) shares the same rendered artifacts.
+    """
+
+    _prompt_descriptions: dict[str, str] = {}
+    _action_models: dict[str, Type[ActionModel]] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, exclude_actions: list[str] = []):
+        super().__init__(exclude_actions=exclude_actions)
+        self._fingerprint: tuple[tuple[str, ...], str] = ((), "")
+
+    @classmethod
+    def from_registry(cls, registry: Registry) -> "CachedRegistry":
+        """Take over the actions already registered on registry"""
+        cached_registry = cls(exclude_actions=registry.exclude_actions)
+        cached_registry.registry = registry.registry
+        return cached_registry
+
+    def fingerprint(self) -> str:
+        names = tuple(self.registry.actions)
+        if self._fingerprint[0] == names:
+            return self._fingerprint[1]
+        digest = hashlib.sha256()
+        for name, action in self.registry.actions.items():
+            digest.update(f"{name}\0{action.description}\0{action.param_model.__name__}\0".encode())
+            digest.update(repr(action.param_model.model_fields).encode())
+        self._fingerprint = (names, digest.hexdigest())
+        return self._fingerprint[1]
+
+    def get_prompt_description(self) -> str:
+        fingerprint = self.fingerprint()
+        with self._lock:
+            description = self._prompt_descriptions.get(fingerprint)
+            if description is None:
+                description = super().get_prompt_description()
+                self._prompt_descriptions[fingerprint] = description
+        return description
+
+    def create_action_model(self) -> Type[ActionModel]:
+        fingerprint = self.fingerprint()
+        with self._lock:
+            action_model = self._action_models.get(fingerprint)
+            if action_model is None:
+                action_model = super().create_action_model()
+                self._action_models[fingerprint] = action_model
+                logger.debug(f"Created action model for registry {fingerprint[:12]}")
+        return action_model
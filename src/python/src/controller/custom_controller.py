@@ -1,9 +1,11 @@
+import asyncio
 import pdb
 
 import pyperclip
-from typing import Optional, Type
+from typing import Callable, Optional, Type
 from pydantic import BaseModel
 from browser_use.agent.views import ActionResult
+from browser_use.controller.registry.views import ActionModel
 from browser_use.browser.context import BrowserContext
 from browser_use.controller.service import Controller, DoneAction
 from main_content_extractor import MainContentExtractor
@@ -21,15 +23,22 @@ from browser_use.controller.views import (
 )
 import logging
 
+from .cached_registry import CachedRegistry
+
 logger = logging.getLogger(__name__)
 
 
 class CustomController(Controller):
     def __init__(self, exclude_actions: list[str] = [],
-                 output_model: Optional[Type[BaseModel]] = None
+                 output_model: Optional[Type[BaseModel]] = None,
+                 element_paging: bool = False
                  ):
         super().__init__(exclude_actions=exclude_actions, output_model=output_model)
+        # Share the prompt description and action model with identically configured controllers
+        self.registry = CachedRegistry.from_registry(self.registry)
         self._register_custom_actions()
+        if element_paging:
+            self.enable_element_paging()
 
     def _register_custom_actions(self):
         """Register all custom browser actions"""
@@ -47,3 +56,69 @@ class CustomController(Controller):
             await page.keyboard.type(text)
 
             return ActionResult(extracted_content=text)
+
+    def enable_element_paging(self):
+        """Register show_more_elements, only useful when the agent caps the element list (max_element_tokens)"""
+        if "show_more_elements" in self.registry.registry.actions:
+            return
+
+        @self.registry.action("Show more interactive elements of the current page when the list was cut off")
+        async def show_more_elements(page: int, browser: BrowserContext):
+            element_pager = getattr(browser, "element_pager", None)
+            if element_pager is None:
+                return ActionResult(extracted_content="All elements of the current page are already listed.")
+            return ActionResult(extracted_content=element_pager.get_page(page), include_in_memory=True)
+
+    async def multi_act_stream(
+            self,
+            action_queue: asyncio.Queue,
+            browser_context: BrowserContext,
+            max_actions: int,
+            page_extraction_llm=None,
+            sensitive_data: Optional[dict] = None,
+            check_break_if_paused: Callable[[], bool] = lambda: False,
+            available_file_paths: Optional[list[str]] = None,
+    ) -> list[ActionResult]:
+        """Execute actions as they arrive on the queue, until a None sentinel.
+
+        Mirrors multi_act: stops after done or an error, and stops before an
+        indexed action if new elements appeared on the page. Actions that are
+        not executed are drained from the queue and dropped.
+        """
+        results: list[ActionResult] = []
+        session = await browser_context.get_session()
+        cached_selector_map = session.cached_state.selector_map
+        cached_path_hashes = set(e.hash.branch_path_hash for e in cached_selector_map.values())
+
+        check_break_if_paused()
+        await browser_context.remove_highlights()
+
+        i = 0
+        stream_ended = False
+        while True:
+            action: Optional[ActionModel] = await action_queue.get()
+            if action is None:
+                stream_ended = True
+                break
+            if i > 0:
+                await asyncio.sleep(browser_context.config.wait_between_actions)
+
+            check_break_if_paused()
+            if action.get_index() is not None and i != 0:
+                new_state = await browser_context.get_state()
+                new_path_hashes = set(e.hash.branch_path_hash for e in new_state.selector_map.values())
+                if not new_path_hashes.issubset(cached_path_hashes):
+                    logger.info(f'Something new appeared after action {i}')
+                    break
+
+            check_break_if_paused()
+            results.append(await self.act(action, browser_context, page_extraction_llm, sensitive_data, available_file_paths))
+            logger.debug(f'Executed streamed action {i + 1}')
+            i += 1
+            if results[-1].is_done or results[-1].error or i >= max_actions:
+                break
+
+        # Discard whatever the model still produces for this step
+        while not stream_ended:
+            stream_ended = await action_queue.get() is None
+        return results
@@ -10,9 +10,11 @@ import logging
 from pprint import pprint
 from uuid import uuid4
 from src.utils import utils
+from src.utils.llm import ainvoke_llm
 from src.agent.custom_agent import CustomAgent
 import json
 import re
+import time
 from browser_use.agent.service import Agent
 from browser_use.browser.browser import BrowserConfig, Browser
 from browser_use.agent.views import ActionResult
@@ -192,7 +194,7 @@ Provide your output as a JSON formatted list. Each item in the list must adhere
             history_infos_ = json.dumps(history_infos, indent=4)
             query_prompt = f"This is search {search_iteration} of {max_search_iterations} maximum searches allowed.\n User Instruction:{task} \n Previous Queries:\n {history_query_} \n Previous Search Results:\n {history_infos_}\n"
             search_messages.append(HumanMessage(content=query_prompt))
-            ai_query_msg = llm.invoke(search_messages[:1] + search_messages[1:][-1:])
+            ai_query_msg = await ainvoke_llm(llm, search_messages[:1] + search_messages[1:][-1:])
             search_messages.append(ai_query_msg)
             if hasattr(ai_query_msg, "reasoning_content"):
                 logger.info("🤯 Start Search Deep Thinking: ")
@@ -252,8 +254,22 @@ Provide your output as a JSON formatted list. Each item in the list must adhere
                     max_actions_per_step=5,
                     controller=controller,
                 ) for task in query_tasks]
-                query_results = await asyncio.gather(
-                    *[agent.run(max_steps=kwargs.get("max_steps", 10)) for agent in agents])
+                agent_durations = []
+
+                async def run_timed(agent):
+                    agent_start = time.perf_counter()
+                    try:
+                        return await agent.run(max_steps=kwargs.get("max_steps", 10))
+                    finally:
+                        agent_durations.append(time.perf_counter() - agent_start)
+
+                batch_start = time.perf_counter()
+                query_results = await asyncio.gather(*[run_timed(agent) for agent in agents])
+                batch_duration = time.perf_counter() - batch_start
+                # overlap close to the number of agents means they really ran in parallel
+                logger.info(f"Ran {len(agents)} agents in {batch_duration:.1f}s "
+                            f"(sum of agent times {sum(agent_durations):.1f}s, "
+                            f"overlap {sum(agent_durations) / max(batch_duration, 1e-6):.2f}x)")
 
             if agent_state and agent_state.is_stop_requested():
                 # Stop
@@ -281,7 +297,7 @@ Provide your output as a JSON formatted list. Each item in the list must adhere
                     history_infos_ = json.dumps(history_infos, indent=4)
                     record_prompt = f"User Instruction:{task}. \nPrevious Recorded Information:\n {history_infos_}\n Current Search Iteration: {search_iteration}\n Current Search Plan:\n{query_plan}\n Current Search Query:\n {query_tasks[i]}\n Current Search Results: {query_result_}\n "
                     record_messages.append(HumanMessage(content=record_prompt))
-                    ai_record_msg = llm.invoke(record_messages[:1] + record_messages[-1:])
+                    ai_record_msg = await ainvoke_llm(llm, record_messages[:1] + record_messages[-1:])
                     record_messages.append(ai_record_msg)
                     if hasattr(ai_record_msg, "reasoning_content"):
                         logger.info("🤯 Start Record Deep Thinking: ")
@@ -304,6 +320,9 @@ Provide your output as a JSON formatted list. Each item in the list must adhere
         logger.error(f"Deep research Error: {e}")
         return await generate_final_report(task, history_infos, save_dir, llm, str(e))
     finally:
+        llm_cache = getattr(llm, "cache", None)
+        if hasattr(llm_cache, "stats"):
+            logger.info(f"LLM cache: {llm_cache.stats()}")
         if browser:
             await browser.close()
         if browser_context:
@@ -354,7 +373,7 @@ async def generate_final_report(task, history_infos, save_dir, llm, error_msg=No
         report_prompt = f"User Instruction:{task} \n Search Information:\n {history_infos_}"
         report_messages = [SystemMessage(content=writer_system_prompt),
                            HumanMessage(content=report_prompt)]  # New context for report generation
-        ai_report_msg = llm.invoke(report_messages)
+        ai_report_msg = await ainvoke_llm(llm, report_messages)
         if hasattr(ai_report_msg, "reasoning_content"):
             logger.info("🤯 Start Report Deep Thinking: ")
             logger.info(ai_report_msg.reasoning_content)
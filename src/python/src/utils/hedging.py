@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+
+logger = logging.getLogger(__name__)
+
+
+class LLMHedger:
+    """Hedge slow primary requests with a secondary model.
+
+    If the primary has not produced a valid response within a threshold
+    derived from its own latency percentile, the same request is sent to the
+    secondary; the first response that parses wins and the other request is
+    cancelled. A failed primary falls back to the secondary right away.
+
+    A primary cancelled because the hedge won is recorded with its elapsed
+    time as a lower bound of its latency. Dropping it would keep only the
+    primaries that beat the threshold, pulling the percentile down over time.
+    """
+
+    def __init__(
+            self,
+            secondary_llm: BaseChatModel,
+            percentile: float = 0.9,
+            min_samples: int = 5,
+            initial_delay: float = 20.0,
+            window: int = 100,
+    ):
+        self.secondary_llm = secondary_llm
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.primary_latencies: deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.saved_seconds = 0.0
+
+    def threshold(self) -> float:
+        if len(self.primary_latencies) < self.min_samples:
+            return self.initial_delay
+        latencies = sorted(self.primary_latencies)
+        return latencies[min(len(latencies) - 1, int(self.percentile * len(latencies)))]
+
+    def _expected_primary_latency(self, threshold: float) -> float:
+        """Mean primary latency among requests that were slower than the threshold.
+
+        Cancelled primaries only contribute a lower bound, so this underestimates.
+        """
+        slow = [latency for latency in self.primary_latencies if latency > threshold]
+        return sum(slow) / len(slow) if slow else threshold
+
+    async def ainvoke(
+            self,
+            primary_llm: BaseChatModel,
+            input_messages: list[BaseMessage],
+            invoke: Callable[[BaseChatModel, list[BaseMessage]], Awaitable[tuple[BaseMessage, Any]]],
+    ) -> tuple[BaseMessage, Any]:
+        """Return the first (message, parsed output) produced by the primary or the hedge.
+
+        ``invoke`` calls a model and raises unless its answer parses.
+        """
+        self.requests += 1
+        start = time.monotonic()
+
+        primary = asyncio.create_task(invoke(primary_llm, input_messages))
+        threshold = self.threshold()
+        done, _ = await asyncio.wait({primary}, timeout=threshold)
+        if primary in done and primary.exception() is None:
+            self.primary_latencies.append(time.monotonic() - start)
+            return primary.result()
+
+        self.hedged += 1
+        hedge = asyncio.create_task(invoke(self.secondary_llm, input_messages))
+        pending = {hedge} if primary in done else {primary, hedge}
+        last_error: Optional[BaseException] = primary.exception() if primary in done else None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    elapsed = time.monotonic() - start
+                    if task is primary:
+                        self.primary_latencies.append(elapsed)
+                    else:
+                        self.hedge_wins += 1
+                        self.saved_seconds += max(0.0, self._expected_primary_latency(threshold) - elapsed)
+                        if primary in pending:
+                            # the primary would have taken at least this long
+                            self.primary_latencies.append(elapsed)
+                    logger.info(f"Hedged request answered by {'primary' if task is primary else 'secondary'} "
+                                f"after {elapsed:.1f}s (threshold {threshold:.1f}s)")
+                    return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise last_error
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "hedge_rate": self.hedged / self.requests if self.requests else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "estimated_saved_seconds": round(self.saved_seconds, 1),
+            "threshold_seconds": round(self.threshold(), 1),
+        }
@@ -0,0 +1,176 @@
+"""Re-execute the actions of saved agent histories against a browser and report browser-side timings.
+
+The recorded model outputs stand in for the LLM, so runs are deterministic and
+cost no tokens. Usage:
+python -m src.utils.history_replay <history.json> [<history.json> ...] [--repeat N] [--output timings.json]
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import statistics
+import time
+from typing import Optional
+
+from browser_use.agent.views import ActionResult
+from browser_use.browser.browser import BrowserConfig
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+
+from src.agent.macro import locate_element
+from src.browser.custom_browser import CustomBrowser
+from src.controller.custom_controller import CustomController
+
+logger = logging.getLogger(__name__)
+
+
+def load_recorded_steps(history_path: str) -> list[dict]:
+    """Steps of a history file written by save_history that have a model output"""
+    with open(history_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    steps = []
+    for item in data.get("history", []):
+        if not item.get("model_output"):
+            continue
+        actions = item["model_output"]["action"]
+        steps.append({
+            "url": item["state"].get("url", ""),
+            "actions": actions,
+            "elements": item["state"].get("interacted_element") or [None] * len(actions),
+            "results": item.get("result") or [],
+        })
+    return steps
+
+
+class HistoryReplayer:
+    """Replay recorded steps like the agent would, timing the state capture and every action"""
+
+    def __init__(self, controller: CustomController, browser_context: BrowserContext):
+        self.controller = controller
+        self.browser_context = browser_context
+        self.action_model = controller.registry.create_action_model()
+
+    def _needs_llm(self, action_name: str) -> bool:
+        action = self.controller.registry.registry.actions.get(action_name)
+        return action is not None and "page_extraction_llm" in inspect.signature(action.function).parameters
+
+    async def replay_step(self, step_number: int, step: dict) -> dict:
+        start = time.perf_counter()
+        state = await self.browser_context.get_state()
+        report = {"step": step_number, "url": state.url, "recorded_url": step["url"],
+                  "state": round(time.perf_counter() - start, 3),
+                  "state_phases": getattr(self.browser_context, "last_state_timings", {}),
+                  "actions": [], "unresolved": 0, "errors": []}
+
+        for i, action_data in enumerate(step["actions"]):
+            name = next(iter(action_data))
+            action = self.action_model(**action_data)
+            locator = step["elements"][i] if i < len(step["elements"]) else None
+            if locator is not None:
+                element = locate_element(locator, state.selector_map)
+                if element is not None:
+                    action.set_index(element.highlight_index)
+                else:
+                    # keep the recorded index; the page may have drifted since the recording
+                    report["unresolved"] += 1
+            action_start = time.perf_counter()
+            if self._needs_llm(name):
+                recorded = step["results"][i] if i < len(step["results"]) else {}
+                result = ActionResult(extracted_content=recorded.get("extracted_content"), include_in_memory=True)
+                substituted = True
+            else:
+                substituted = False
+                try:
+                    result = await self.controller.act(action, self.browser_context)
+                except Exception as e:
+                    result = ActionResult(error=str(e))
+            report["actions"].append({"action": name, "seconds": round(time.perf_counter() - action_start, 3),
+                                      "substituted": substituted})
+            if result.error:
+                report["errors"].append(f"{name}: {result.error}")
+            if result.is_done:
+                break
+        report["total"] = round(time.perf_counter() - start, 3)
+        return report
+
+    async def replay(self, steps: list[dict]) -> list[dict]:
+        reports = []
+        for n, step in enumerate(steps, start=1):
+            report = await self.replay_step(n, step)
+            logger.info(f"⏱️ Step {n}: state {report['state']}s, actions "
+                        f"{sum(action['seconds'] for action in report['actions']):.3f}s"
+                        + (f", {len(report['errors'])} errors" if report["errors"] else ""))
+            reports.append(report)
+        return reports
+
+
+def summarize_replay_timings(reports: list[dict]) -> dict:
+    """Mean, median and max seconds of the state capture, each state phase and each action type"""
+    samples: dict[str, list[float]] = {"step": [], "state": []}
+    for report in reports:
+        samples["step"].append(report["total"])
+        samples["state"].append(report["state"])
+        for phase, seconds in report["state_phases"].items():
+            if phase != "total":
+                samples.setdefault(f"state.{phase}", []).append(seconds)
+        for action in report["actions"]:
+            if not action["substituted"]:
+                samples.setdefault(f"action.{action['action']}", []).append(action["seconds"])
+    return {
+        "steps": len(reports),
+        "errors": sum(len(report["errors"]) for report in reports),
+        "unresolved_elements": sum(report["unresolved"] for report in reports),
+        "timings": {name: {"count": len(values), "mean": round(statistics.mean(values), 3),
+                           "median": round(statistics.median(values), 3), "max": round(max(values), 3)}
+                    for name, values in samples.items() if values},
+    }
+
+
+def format_replay_timings(summary: dict) -> str:
+    lines = [f"{summary['steps']} steps replayed, {summary['errors']} action errors, "
+             f"{summary['unresolved_elements']} elements not found by locator",
+             f"{'phase':<28}{'count':>7}{'mean':>9}{'median':>9}{'max':>9}"]
+    for name, timing in summary["timings"].items():
+        lines.append(f"{name:<28}{timing['count']:>7}{timing['mean']:>9.3f}{timing['median']:>9.3f}"
+                     f"{timing['max']:>9.3f}")
+    return "\n".join(lines)
+
+
+async def replay_history_files(history_files: list[str], repeat: int = 1, headless: bool = True) -> list[dict]:
+    """Replay every history file repeat times, each run in a fresh browser context"""
+    browser = CustomBrowser(config=BrowserConfig(headless=headless))
+    controller = CustomController()
+    reports = []
+    try:
+        for history_file in history_files:
+            steps = load_recorded_steps(history_file)
+            for _ in range(repeat):
+                browser_context = await browser.new_context(config=BrowserContextConfig(no_viewport=False))
+                try:
+                    reports.extend(await HistoryReplayer(controller, browser_context).replay(steps))
+                finally:
+                    await browser_context.close()
+    finally:
+        await browser.close()
+    return reports
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay saved agent histories and report browser timings")
+    parser.add_argument("history_files", nargs="+", help="agent history JSON files")
+    parser.add_argument("--repeat", type=int, default=1, help="replays per history file")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    parser.add_argument("--output", help="write the per-step timings to this JSON file")
+    args = parser.parse_args(argv)
+    reports = asyncio.run(replay_history_files(args.history_files, args.repeat, headless=not args.headed))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+    if not reports:
+        print("No recorded steps found")
+        return
+    print(format_replay_timings(summarize_replay_timings(reports)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import os
+from typing import AsyncIterator, Callable, Iterable, Mapping, Optional
+from urllib.parse import urlsplit
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+
+from .utils import capture_screenshot_bytes
+
+logger = logging.getLogger(__name__)
+
+BOUNDARY = "liveviewframe"
+STREAM_PATH = "/live_view/stream"
+FRAME_PATH = "/live_view/frame.jpg"
+
+
+class LiveView:
+    """MJPEG stream of the live browser view, served by the web UI app.
+
+    Frames are pushed with ``publish_frame`` (or pulled from a browser context
+    by ``feed``) and streamed to every connected client as
+    ``multipart/x-mixed-replace``. The routes are mounted next to the Gradio UI
+    (see ``mount_live_view``), so the UI embeds ``STREAM_PATH`` once in an
+    ``<img>`` tag and the stream works wherever the UI itself is reachable.
+    """
+
+    def __init__(self, fps: int = 20, allowed_origins: Iterable[str] = ()):
+        self.fps = fps
+        self.allowed_origins = set(allowed_origins)
+        self._frame: Optional[bytes] = None
+        self._frame_id = 0
+        self._frame_ready = asyncio.Condition()
+        self._clients = 0
+
+    async def publish_frame(self, frame: bytes) -> None:
+        """Publish a new JPEG frame to all connected clients"""
+        async with self._frame_ready:
+            self._frame = frame
+            self._frame_id += 1
+            self._frame_ready.notify_all()
+
+    async def feed(self, get_browser_context: Callable) -> None:
+        """Capture frames from the current browser context until cancelled.
+
+        Capturing is skipped while nobody is watching the stream.
+        """
+        interval = 1 / self.fps
+        while True:
+            if self._clients:
+                try:
+                    frame = await capture_screenshot_bytes(get_browser_context())
+                    if frame is not None:
+                        await self.publish_frame(frame)
+                except Exception as e:
+                    logger.debug(f"Live view capture failed: {e}")
+            await asyncio.sleep(interval)
+
+    def origin_allowed(self, headers: Mapping[str, str]) -> bool:
+        """Only pages served by this app (or LIVE_VIEW_ALLOWED_ORIGINS) may embed the stream"""
+        origin = headers.get("origin")
+        if origin is None:
+            # <img> requests carry no Origin, browsers still tell cross-site requests apart
+            return headers.get("sec-fetch-site") != "cross-site"
+        return urlsplit(origin).netloc == headers.get("host") or origin in self.allowed_origins
+
+    async def stream(self, request: Request) -> Response:
+        if not self.origin_allowed(request.headers):
+            logger.warning(f"Live view request from {request.headers.get('origin')} refused")
+            return Response(status_code=403)
+        return StreamingResponse(
+            self._frames(),
+            media_type=f"multipart/x-mixed-replace; boundary={BOUNDARY}",
+            headers={"Cache-Control": "no-cache"},
+        )
+
+    async def frame(self, request: Request) -> Response:
+        if not self.origin_allowed(request.headers):
+            return Response(status_code=403)
+        if self._frame is None:
+            return Response(status_code=404)
+        return Response(self._frame, media_type="image/jpeg", headers={"Cache-Control": "no-cache"})
+
+    async def _frames(self) -> AsyncIterator[bytes]:
+        self._clients += 1
+        last_frame_id = 0
+        try:
+            while True:
+                async with self._frame_ready:
+                    await self._frame_ready.wait_for(lambda: self._frame_id != last_frame_id)
+                    frame, last_frame_id = self._frame, self._frame_id
+                yield (
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(frame)}\r\n\r\n".encode()
+                    + frame
+                    + b"\r\n"
+                )
+        finally:
+            self._clients -= 1
+
+
+_live_view: Optional[LiveView] = None
+
+
+def get_live_view() -> LiveView:
+    """Return the shared live view"""
+    global _live_view
+    if _live_view is None:
+        allowed = os.getenv("LIVE_VIEW_ALLOWED_ORIGINS", "")
+        _live_view = LiveView(
+            fps=int(os.getenv("LIVE_VIEW_FPS", "20")),
+            allowed_origins=[origin.strip() for origin in allowed.split(",") if origin.strip()],
+        )
+    return _live_view
+
+
+def mount_live_view(app: FastAPI) -> None:
+    """Serve the live view stream from app, on the same host and port as the UI"""
+    live_view = get_live_view()
+    app.add_api_route(STREAM_PATH, live_view.stream, methods=["GET"], include_in_schema=False)
+    app.add_api_route(FRAME_PATH, live_view.frame, methods=["GET"], include_in_schema=False)
@@ -1,6 +1,12 @@
-from openai import OpenAI
+from openai import AsyncOpenAI
+import asyncio
+import logging
 import pdb
+import weakref
+
+import httpx
 from langchain_openai import ChatOpenAI
+from langchain_core.caches import BaseCache
 from langchain_core.globals import get_llm_cache
 from langchain_core.language_models.base import (
     BaseLanguageModel,
@@ -10,6 +16,7 @@ from langchain_core.language_models.base import (
 from langchain_core.load import dumpd, dumps
 from langchain_core.messages import (
     AIMessage,
+    AIMessageChunk,
     SystemMessage,
     AnyMessage,
     BaseMessage,
@@ -26,6 +33,7 @@ from langchain_core.outputs import (
     RunInfo,
 )
 from langchain_ollama import ChatOllama
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.output_parsers.base import OutputParserLike
 from langchain_core.runnables import Runnable, RunnableConfig
 from langchain_core.tools import BaseTool
@@ -33,6 +41,7 @@ from langchain_core.tools import BaseTool
 from typing import (
     TYPE_CHECKING,
     Any,
+    AsyncIterator,
     Callable,
     Literal,
     Optional,
@@ -40,40 +49,171 @@ from typing import (
     cast,
 )
 
+from .think_tags import JsonResponseMarkerStripper, ThinkTagSplitter, strip_json_response_marker
+from .rate_limiter import estimate_input_tokens, get_llm_scheduler, is_rate_limit_error
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_RETRIES = 4
+
+
+def has_native_async(llm: BaseChatModel) -> bool:
+    """Whether awaiting ``llm.ainvoke`` actually yields to the event loop.
+
+    Models can opt out with a ``native_async = False`` class attribute when
+    their ``ainvoke`` wraps a blocking client.
+    """
+    native_async = getattr(type(llm), "native_async", None)
+    if native_async is not None:
+        return native_async
+    return type(llm)._agenerate is not BaseChatModel._agenerate
+
+
+async def ainvoke_llm(
+        llm: BaseChatModel,
+        input: LanguageModelInput,
+        runnable: Optional[Runnable] = None,
+        **kwargs: Any,
+) -> Any:
+    """Invoke the model without blocking the event loop.
+
+    Uses the provider's native async path when there is one and falls back to
+    running the blocking ``invoke`` in a worker thread otherwise. Requests are
+    admitted by the shared per-model scheduler and retried with backoff when
+    the provider still answers 429. ``runnable`` (e.g. ``llm.with_structured_output``)
+    is invoked instead of the bare model when given.
+    """
+    runnable = runnable or llm
+    scheduler = get_llm_scheduler(llm)
+    estimated_tokens = estimate_input_tokens(llm, input)
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        try:
+            async with scheduler.slot(estimated_tokens):
+                if has_native_async(llm):
+                    message = await runnable.ainvoke(input, **kwargs)
+                else:
+                    message = await asyncio.to_thread(runnable.invoke, input, **kwargs)
+            break
+        except Exception as e:
+            if attempt == RATE_LIMIT_RETRIES or not is_rate_limit_error(e):
+                raise
+            await asyncio.sleep(min(30, 2 ** attempt))
+
+    usage = getattr(message.get("raw") if isinstance(message, dict) else message, "usage_metadata", None)
+    if usage:
+        scheduler.record_usage(estimated_tokens, usage.get("total_tokens", estimated_tokens))
+    return message
+
+
+# One pooled HTTP client per event loop, shared by every DeepSeekR1ChatOpenAI instance
+_async_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_shared_async_http_client() -> httpx.AsyncClient:
+    """Return the pooled async HTTP client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_http_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=120),
+            timeout=httpx.Timeout(60.0, connect=10.0),
+        )
+        _async_http_clients[loop] = client
+    return client
+
+
+def _to_openai_messages(input: LanguageModelInput) -> list[dict]:
+    message_history = []
+    for input_ in convert_to_messages(input):
+        if isinstance(input_, SystemMessage):
+            message_history.append({"role": "system", "content": input_.content})
+        elif isinstance(input_, AIMessage):
+            message_history.append({"role": "assistant", "content": input_.content})
+        else:
+            message_history.append({"role": "user", "content": input_.content})
+    return message_history
+
+
+def _cache_key(llm: BaseChatModel, input: LanguageModelInput, stop: Optional[list[str]]) -> Optional[tuple[str, str]]:
+    """(prompt, llm_string) key for the model's own cache, or None when it has none"""
+    if not isinstance(llm.cache, BaseCache):
+        return None
+    return dumps(convert_to_messages(input)), llm._get_llm_string(stop=stop)
+
+
 class DeepSeekR1ChatOpenAI(ChatOpenAI):
-    
+    """ChatOpenAI for deepseek-reasoner that keeps ``reasoning_content``.
+
+    Async calls stream the completion through ``AsyncOpenAI`` on a shared,
+    pooled HTTP client, so long reasoning phases neither block the event loop
+    nor run into read timeouts. Sync calls reuse the client ChatOpenAI owns.
+    """
+
     def __init__(self, *args: Any, **kwargs: Any) -> None:
+        kwargs.setdefault("timeout", httpx.Timeout(60.0, connect=10.0))
+        kwargs.setdefault("max_retries", 3)
         super().__init__(*args, **kwargs)
-        self.client = OpenAI(
-            base_url=kwargs.get("base_url"),
-            api_key=kwargs.get("api_key")
-        ) 
-        
-    async def ainvoke(
+
+    def _get_async_openai_client(self) -> AsyncOpenAI:
+        return AsyncOpenAI(
+            base_url=self.openai_api_base,
+            api_key=self.openai_api_key.get_secret_value() if self.openai_api_key else None,
+            timeout=self.request_timeout,
+            max_retries=self.max_retries,
+            http_client=get_shared_async_http_client(),
+        )
+
+    async def astream(
         self,
         input: LanguageModelInput,
         config: Optional[RunnableConfig] = None,
         *,
         stop: Optional[list[str]] = None,
         **kwargs: Any,
-    ) -> AIMessage:
-        message_history = []
-        for input_ in input:
-            if isinstance(input_, SystemMessage):
-                message_history.append({"role": "system", "content": input_.content})
-            elif isinstance(input_, AIMessage):
-                message_history.append({"role": "assistant", "content": input_.content})
-            else:
-                message_history.append({"role": "user", "content": input_.content})
-        
-        response = self.client.chat.completions.create(
+    ) -> AsyncIterator[AIMessageChunk]:
+        """Stream the completion; reasoning deltas are put in additional_kwargs["reasoning_content"]"""
+        client = self._get_async_openai_client()
+        stream = await client.chat.completions.create(
             model=self.model_name,
-            messages=message_history
+            messages=_to_openai_messages(input),
+            **({"stop": stop} if stop else {}),
+            stream=True,
         )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            reasoning_content = getattr(delta, "reasoning_content", None)
+            yield AIMessageChunk(
+                content=delta.content or "",
+                additional_kwargs={"reasoning_content": reasoning_content} if reasoning_content else {},
+            )
 
-        reasoning_content = response.choices[0].message.reasoning_content
-        content = response.choices[0].message.content
-        return AIMessage(content=content, reasoning_content=reasoning_content)
+    async def ainvoke(
+        self,
+        input: LanguageModelInput,
+        config: Optional[RunnableConfig] = None,
+        *,
+        stop: Optional[list[str]] = None,
+        **kwargs: Any,
+    ) -> AIMessage:
+        cache_key = _cache_key(self, input, stop)
+        if cache_key:
+            cached = await self.cache.alookup(*cache_key)
+            if cached:
+                return cached[0].message
+
+        reasoning_parts = []
+        content_parts = []
+        async for chunk in self.astream(input, config, stop=stop):
+            if "reasoning_content" in chunk.additional_kwargs:
+                reasoning_parts.append(chunk.additional_kwargs["reasoning_content"])
+            content_parts.append(chunk.content)
+        ai_message = AIMessage(content="".join(content_parts), reasoning_content="".join(reasoning_parts))
+
+        if cache_key:
+            await self.cache.aupdate(*cache_key, [ChatGeneration(message=ai_message)])
+        return ai_message
     
     def invoke(
         self,
@@ -83,26 +223,97 @@ class DeepSeekR1ChatOpenAI(ChatOpenAI):
         stop: Optional[list[str]] = None,
         **kwargs: Any,
     ) -> AIMessage:
-        message_history = []
-        for input_ in input:
-            if isinstance(input_, SystemMessage):
-                message_history.append({"role": "system", "content": input_.content})
-            elif isinstance(input_, AIMessage):
-                message_history.append({"role": "assistant", "content": input_.content})
-            else:
-                message_history.append({"role": "user", "content": input_.content})
-        
-        response = self.client.chat.completions.create(
+        cache_key = _cache_key(self, input, stop)
+        if cache_key:
+            cached = self.cache.lookup(*cache_key)
+            if cached:
+                return cached[0].message
+
+        response = self.root_client.chat.completions.create(
             model=self.model_name,
-            messages=message_history
+            messages=_to_openai_messages(input),
+            **({"stop": stop} if stop else {}),
         )
 
-        reasoning_content = response.choices[0].message.reasoning_content
+        reasoning_content = getattr(response.choices[0].message, "reasoning_content", None)
         content = response.choices[0].message.content
-        return AIMessage(content=content, reasoning_content=reasoning_content)
+        ai_message = AIMessage(content=content, reasoning_content=reasoning_content)
+
+        if cache_key:
+            self.cache.update(*cache_key, [ChatGeneration(message=ai_message)])
+        return ai_message
     
 class DeepSeekR1ChatOllama(ChatOllama):
-        
+    """ChatOllama for deepseek-r1 that separates ``<think>`` reasoning from the answer.
+
+    The completion is streamed and split on the fly, so the answer can be
+    parsed as soon as ``</think>`` has passed; ``astream`` yields only the
+    answer as content, which lets the agent stream actions from it. With ``keep_reasoning=False``
+    the reasoning is dropped as it arrives instead of being kept on the
+    message (and logged by the agent).
+    """
+
+    keep_reasoning: bool = True
+
+    def _to_chunk(self, reasoning: str, content: str) -> Optional[AIMessageChunk]:
+        if not self.keep_reasoning:
+            reasoning = ""
+        if not reasoning and not content:
+            return None
+        return AIMessageChunk(
+            content=content,
+            additional_kwargs={"reasoning_content": reasoning} if reasoning else {},
+        )
+
+    async def astream(
+        self,
+        input: LanguageModelInput,
+        config: Optional[RunnableConfig] = None,
+        *,
+        stop: Optional[list[str]] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[AIMessageChunk]:
+        """Stream the answer; reasoning deltas are put in additional_kwargs["reasoning_content"]"""
+        splitter = ThinkTagSplitter()
+        marker = JsonResponseMarkerStripper()
+        unclosed_reasoning = []
+        async for chunk in super().astream(input, config, stop=stop, **kwargs):
+            reasoning, content = splitter.feed(chunk.content)
+            if splitter.in_content:
+                unclosed_reasoning.clear()
+            else:
+                unclosed_reasoning.append(reasoning)
+            split_chunk = self._to_chunk(reasoning, marker.feed(content))
+            if split_chunk is not None:
+                yield split_chunk
+        reasoning, content = splitter.finish()
+        if not splitter.in_content:
+            # </think> never arrived: hand the reasoning over as the answer so it can still be parsed
+            content = "".join(unclosed_reasoning) + reasoning
+        split_chunk = self._to_chunk(reasoning, marker.feed(content) + marker.finish())
+        if split_chunk is not None:
+            yield split_chunk
+        logger.debug(f"deepseek-r1 reasoning: {splitter.reasoning_chars} chars")
+
+    def _accumulate(
+            self, deltas: tuple[str, str], splitter: ThinkTagSplitter, reasoning_parts: list[str], content_parts: list[str]
+    ) -> None:
+        reasoning, content = deltas
+        reasoning_parts.append(reasoning)
+        content_parts.append(content)
+        if not self.keep_reasoning and splitter.in_content and reasoning_parts:
+            # reasoning is only held as a fallback until </think> arrives
+            reasoning_parts.clear()
+
+    def _to_message(self, reasoning_parts: list[str], content_parts: list[str], closed: bool) -> AIMessage:
+        if not closed:
+            # </think> never arrived: the reasoning is all we have, let the caller try to parse it
+            content_parts, reasoning_parts = reasoning_parts, []
+        content = strip_json_response_marker("".join(content_parts))
+        if not self.keep_reasoning:
+            return AIMessage(content=content)
+        return AIMessage(content=content, reasoning_content="".join(reasoning_parts))
+
     async def ainvoke(
         self,
         input: LanguageModelInput,
@@ -111,14 +322,24 @@ class DeepSeekR1ChatOllama(ChatOllama):
         stop: Optional[list[str]] = None,
         **kwargs: Any,
     ) -> AIMessage:
-        org_ai_message = await super().ainvoke(input=input)
-        org_content = org_ai_message.content
-        reasoning_content = org_content.split("</think>")[0].replace("<think>", "")
-        content = org_content.split("</think>")[1]
-        if "**JSON Response:**" in content:
-            content = content.split("**JSON Response:**")[-1]
-        return AIMessage(content=content, reasoning_content=reasoning_content)
-    
+        cache_key = _cache_key(self, input, stop)
+        if cache_key:
+            cached = await self.cache.alookup(*cache_key)
+            if cached:
+                return cached[0].message
+
+        splitter = ThinkTagSplitter()
+        reasoning_parts = []
+        content_parts = []
+        async for chunk in super().astream(input, config, stop=stop, **kwargs):
+            self._accumulate(splitter.feed(chunk.content), splitter, reasoning_parts, content_parts)
+        self._accumulate(splitter.finish(), splitter, reasoning_parts, content_parts)
+        ai_message = self._to_message(reasoning_parts, content_parts, splitter.in_content)
+
+        if cache_key:
+            await self.cache.aupdate(*cache_key, [ChatGeneration(message=ai_message)])
+        return ai_message
+
     def invoke(
         self,
         input: LanguageModelInput,
@@ -127,10 +348,20 @@ class DeepSeekR1ChatOllama(ChatOllama):
         stop: Optional[list[str]] = None,
         **kwargs: Any,
     ) -> AIMessage:
-        org_ai_message = super().invoke(input=input)
-        org_content = org_ai_message.content
-        reasoning_content = org_content.split("</think>")[0].replace("<think>", "")
-        content = org_content.split("</think>")[1]
-        if "**JSON Response:**" in content:
-            content = content.split("**JSON Response:**")[-1]
-        return AIMessage(content=content, reasoning_content=reasoning_content)
\ No newline at end of file
+        cache_key = _cache_key(self, input, stop)
+        if cache_key:
+            cached = self.cache.lookup(*cache_key)
+            if cached:
+                return cached[0].message
+
+        splitter = ThinkTagSplitter()
+        reasoning_parts = []
+        content_parts = []
+        for chunk in super().stream(input, config, stop=stop, **kwargs):
+            self._accumulate(splitter.feed(chunk.content), splitter, reasoning_parts, content_parts)
+        self._accumulate(splitter.finish(), splitter, reasoning_parts, content_parts)
+        ai_message = self._to_message(reasoning_parts, content_parts, splitter.in_content)
+
+        if cache_key:
+            self.cache.update(*cache_key, [ChatGeneration(message=ai_message)])
+        return ai_message
@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import warnings
+from typing import Any, Optional, Sequence
+
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+logger = logging.getLogger(__name__)
+
+# Inline images are keyed by digest so a prompt hash does not depend on re-encoding
+_IMAGE_DATA_PATTERN = re.compile(r"data:image/[a-zA-Z+.-]+;base64,([A-Za-z0-9+/=]+)")
+
+
+def _image_digest(match: re.Match) -> str:
+    return "image-sha256:" + hashlib.sha256(match.group(1).encode()).hexdigest()
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Content-addressed key over the model/parameter string and the normalized messages"""
+    normalized_prompt = _IMAGE_DATA_PATTERN.sub(_image_digest, prompt)
+    digest = hashlib.sha256()
+    digest.update(llm_string.encode())
+    digest.update(b"\0")
+    digest.update(normalized_prompt.encode())
+    return digest.hexdigest()
+
+
+class SQLiteLLMCache(BaseCache):
+    """Disk-backed LLM response cache with size- and age-based eviction.
+
+    Plugged into a chat model via its ``cache`` field, so every invoke/ainvoke
+    that goes through langchain's generate path is looked up here first.
+    """
+
+    def __init__(
+            self,
+            database_path: str = "./tmp/llm_cache.sqlite",
+            max_bytes: int = 512 * 1024 * 1024,
+            max_age_seconds: float = 7 * 24 * 3600,
+    ):
+        os.makedirs(os.path.dirname(database_path) or ".", exist_ok=True)
+        self.database_path = database_path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(database_path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self._conn.commit()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age_seconds:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        logger.debug(f"LLM cache hit {key[:12]}")
+        with warnings.catch_warnings():
+            # loads is marked beta, but only reads back what dumps wrote here
+            warnings.simplefilter("ignore", LangChainBetaWarning)
+            return loads(row[0])
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        key = cache_key(prompt, llm_string)
+        value = dumps(list(return_val))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age_seconds,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": total,
+        }
+
+
+_response_cache: Optional[SQLiteLLMCache] = None
+
+
+def get_response_cache() -> SQLiteLLMCache:
+    """Return the shared response cache configured from the environment"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = SQLiteLLMCache(
+            database_path=os.getenv("LLM_CACHE_PATH", "./tmp/llm_cache.sqlite"),
+            max_bytes=int(os.getenv("LLM_CACHE_MAX_MB", "512")) * 1024 * 1024,
+            max_age_seconds=float(os.getenv("LLM_CACHE_MAX_AGE_HOURS", "168")) * 3600,
+        )
+    return _response_cache
@@ -0,0 +1,76 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def llm_registry_key(provider: str, api_key: str, **kwargs: Any) -> tuple:
+    """Key a model by provider and its construction arguments, with the API key hashed"""
+    key_hash = hashlib.sha256(api_key.encode()).hexdigest()[:16] if api_key else ""
+    params = tuple(sorted((name, repr(value)) for name, value in kwargs.items() if name != "api_key"))
+    return provider, key_hash, params
+
+
+class LLMRegistry:
+    """LRU registry of constructed chat models.
+
+    Reusing the model object reuses the HTTP connection pools it owns, so
+    repeated runs with the same configuration skip TLS handshakes and cold
+    connection setup. The counters count model objects served from the
+    registry, not HTTP connections. Entries idle for longer than
+    ``max_idle_seconds`` are dropped.
+    """
+
+    def __init__(self, max_entries: int = 16, max_idle_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.max_idle_seconds = max_idle_seconds
+        self.model_hits = 0
+        self.models_created = 0
+        self._entries: "OrderedDict[Hashable, tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        now = time.time()
+        with self._lock:
+            self._evict_stale(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], now)
+                self._entries.move_to_end(key)
+                self.model_hits += 1
+                logger.info(f"Reusing cached {key[0]} model object (model cache hits: {self.model_hits})")
+                return entry[0]
+
+        llm = factory()
+        with self._lock:
+            self.models_created += 1
+            self._entries[key] = (llm, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return llm
+
+    def _evict_stale(self, now: float) -> None:
+        stale = [key for key, (_, last_used) in self._entries.items() if now - last_used > self.max_idle_seconds]
+        for key in stale:
+            del self._entries[key]
+
+    def evict(self, provider: Optional[str] = None) -> int:
+        """Drop all entries, or only those of one provider; returns how many were dropped"""
+        with self._lock:
+            keys = [key for key in self._entries if provider is None or key[0] == provider]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "model_hits": self.model_hits,
+                    "models_created": self.models_created}
+
+
+llm_registry = LLMRegistry()
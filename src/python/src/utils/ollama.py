@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import os
+from typing import Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEEP_ALIVE = "30m"
+DEFAULT_NUM_PREDICT = 1024
+# num_ctx is rounded up to whole steps, so small budget changes do not reload the model
+NUM_CTX_STEP = 1024
+MIN_NUM_CTX = 2048
+MIN_INPUT_TOKENS = 1024
+
+# (base_url, model, num_ctx) of the last successful warm-up
+_warmed_up: Optional[tuple[str, str, int]] = None
+
+
+def get_ollama_keep_alive() -> str:
+    """How long Ollama keeps the model loaded after the last request"""
+    return os.getenv("OLLAMA_KEEP_ALIVE", DEFAULT_KEEP_ALIVE)
+
+
+def size_num_ctx(max_input_tokens: int, num_predict: Optional[int] = None,
+                 num_ctx: Optional[int] = None) -> tuple[int, int]:
+    """``(num_ctx, input token budget)`` sized from the prompt budget plus the output.
+
+    A configured num_ctx caps the input budget; the KV cache is then sized for
+    that budget plus num_predict, rounded up to NUM_CTX_STEP and at least
+    MIN_NUM_CTX. The input budget never drops below MIN_INPUT_TOKENS, even if
+    that needs a larger num_ctx than configured.
+    """
+    num_predict = num_predict or DEFAULT_NUM_PREDICT
+    input_budget = max_input_tokens
+    if num_ctx:
+        input_budget = min(input_budget, num_ctx - num_predict)
+    if input_budget < MIN_INPUT_TOKENS:
+        logger.warning(f"num_ctx={num_ctx} leaves {input_budget} input tokens next to num_predict={num_predict}, "
+                       f"raising it to fit {MIN_INPUT_TOKENS}")
+        input_budget = MIN_INPUT_TOKENS
+    sized = -(-(input_budget + num_predict) // NUM_CTX_STEP) * NUM_CTX_STEP
+    return max(MIN_NUM_CTX, sized), input_budget
+
+
+def _warm_up(base_url: str, model: str, num_ctx: int, keep_alive: str) -> None:
+    # An empty prompt makes Ollama load the model (with this num_ctx) without generating anything
+    response = requests.post(
+        f"{base_url}/api/generate",
+        json={"model": model, "prompt": "", "keep_alive": keep_alive, "options": {"num_ctx": num_ctx}},
+        timeout=300,
+    )
+    response.raise_for_status()
+
+
+def get_ollama_load_state(base_url: str, model: str) -> dict:
+    """Report whether the model is loaded, its memory footprint and when it will be unloaded"""
+    try:
+        response = requests.get(f"{base_url}/api/ps", timeout=5)
+        response.raise_for_status()
+    except Exception as e:
+        return {"model": model, "loaded": False, "error": str(e)}
+    for loaded_model in response.json().get("models", []):
+        if loaded_model.get("name") == model or loaded_model.get("model") == model:
+            return {
+                "model": model,
+                "loaded": True,
+                "size_bytes": loaded_model.get("size"),
+                "size_vram_bytes": loaded_model.get("size_vram"),
+                "expires_at": loaded_model.get("expires_at"),
+            }
+    return {"model": model, "loaded": False}
+
+
+async def warm_up_ollama_model(
+        model: str,
+        num_ctx: int,
+        base_url: Optional[str] = None,
+        keep_alive: Optional[str] = None,
+) -> dict:
+    """Pre-load an Ollama model so the first agent step does not pay the load time.
+
+    Nothing is sent when the same model and num_ctx are already loaded, since
+    a request with a different num_ctx makes Ollama reload the model.
+    """
+    global _warmed_up
+    base_url = base_url or os.getenv("OLLAMA_ENDPOINT", "http://localhost:11434")
+    keep_alive = keep_alive or get_ollama_keep_alive()
+    key = (base_url, model, int(num_ctx))
+    if key == _warmed_up:
+        state = await asyncio.to_thread(get_ollama_load_state, base_url, model)
+        if state.get("loaded"):
+            return state
+    logger.info(f"Warming up Ollama model {model} (num_ctx={num_ctx}, keep_alive={keep_alive})")
+    try:
+        await asyncio.to_thread(_warm_up, base_url, model, int(num_ctx), keep_alive)
+    except Exception as e:
+        logger.warning(f"Could not warm up Ollama model {model}: {e}")
+        return {"model": model, "loaded": False, "error": str(e)}
+    _warmed_up = key
+    return await asyncio.to_thread(get_ollama_load_state, base_url, model)
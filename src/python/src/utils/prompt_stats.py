@@ -0,0 +1,67 @@
+"""Summarize the per-step prompt composition recorded in agent history files.
+
+Usage: python -m src.utils.prompt_stats <history.json> [<history.json> ...]
+"""
+import argparse
+import json
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def load_prompt_stats(history_path: str) -> list[dict]:
+    """Per-step prompt stats of a history file written by CustomAgent.save_history"""
+    with open(history_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [item["prompt_stats"] for item in data.get("history", []) if item.get("prompt_stats")]
+
+
+def summarize_prompt_stats(steps: list[dict]) -> dict:
+    """Total, mean and max tokens per prompt section, and each section's share of all state tokens"""
+    sections: dict[str, dict] = {}
+    for step in steps:
+        for name, section in step.get("sections", {}).items():
+            summary = sections.setdefault(name, {"tokens": 0, "chars": 0, "bytes": 0, "max_tokens": 0, "steps": 0})
+            summary["tokens"] += section.get("tokens", 0)
+            summary["chars"] += section.get("chars", 0)
+            summary["bytes"] += section.get("bytes", 0)
+            summary["max_tokens"] = max(summary["max_tokens"], section.get("tokens", 0))
+            summary["steps"] += 1
+    total_tokens = sum(summary["tokens"] for summary in sections.values())
+    for summary in sections.values():
+        summary["mean_tokens"] = round(summary["tokens"] / summary["steps"])
+        summary["share"] = round(summary["tokens"] / total_tokens, 3) if total_tokens else 0.0
+    return {
+        "steps": len(steps),
+        "total_tokens": total_tokens,
+        "peak_history_tokens": max((step.get("history_tokens", 0) for step in steps), default=0),
+        "sections": dict(sorted(sections.items(), key=lambda item: item[1]["tokens"], reverse=True)),
+    }
+
+
+def format_prompt_stats(summary: dict) -> str:
+    lines = [f"{summary['steps']} steps, {summary['total_tokens']} state-message tokens, "
+             f"peak history {summary['peak_history_tokens']} tokens",
+             f"{'section':<18}{'share':>8}{'tokens':>10}{'mean':>8}{'max':>8}{'bytes':>12}"]
+    for name, section in summary["sections"].items():
+        lines.append(f"{name:<18}{section['share']:>8.1%}{section['tokens']:>10}{section['mean_tokens']:>8}"
+                     f"{section['max_tokens']:>8}{section['bytes'] or '':>12}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Summarize prompt composition of saved agent histories")
+    parser.add_argument("history_files", nargs="+", help="agent history JSON files")
+    args = parser.parse_args(argv)
+    steps = []
+    for history_file in args.history_files:
+        steps.extend(load_prompt_stats(history_file))
+    if not steps:
+        print("No prompt stats found; histories must be saved by CustomAgent")
+        return
+    print(format_prompt_stats(summarize_prompt_stats(steps)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from .token_counter import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+# Rough cost of an image part before the provider reports real usage
+IMAGE_TOKENS = 800
+
+
+def estimate_input_tokens(llm: BaseChatModel, messages: Any) -> int:
+    """Input tokens of messages for llm, counted with its TokenCounter"""
+    counter = TokenCounter(llm)
+    if isinstance(messages, str):
+        return counter.count(messages)
+    tokens = 0
+    for message in messages:
+        content = getattr(message, "content", message)
+        if isinstance(content, str):
+            tokens += counter.count(content)
+        elif isinstance(content, list):
+            for part in content:
+                if isinstance(part, dict) and part.get("type") == "image_url":
+                    tokens += IMAGE_TOKENS
+                elif isinstance(part, dict):
+                    tokens += counter.count(part.get("text", ""))
+    return tokens
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    if getattr(error, "status_code", None) == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "rate_limit" in message
+
+
+class TokenBucket:
+    """Per-minute budget that refills continuously"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.tokens = per_minute
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount
+
+
+@dataclass
+class _LoopSlots:
+    """Admission primitives of one event loop; asyncio locks cannot be shared between loops"""
+
+    admission: asyncio.Lock = field(default_factory=asyncio.Lock)  # FIFO: waiters are woken in arrival order
+    slot_released: asyncio.Condition = field(default_factory=asyncio.Condition)
+    in_flight: int = 0
+
+
+class LLMScheduler:
+    """Coordinates requests to one provider/model across all agents.
+
+    Callers are admitted in FIFO order, subject to request- and
+    token-per-minute buckets and an AIMD concurrency window: the window grows
+    by roughly one slot per window of successful requests and is halved on a
+    429 (and trimmed on latency spikes). The buckets and the window are shared
+    by every event loop; requests in flight are admitted per loop.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            requests_per_minute: Optional[float] = None,
+            tokens_per_minute: Optional[float] = None,
+            max_concurrency: int = 8,
+            initial_concurrency: float = 4,
+    ):
+        self.name = name
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max_concurrency
+        self.concurrency = min(initial_concurrency, max_concurrency)
+        self.latency_ewma: Optional[float] = None
+        self.rate_limited = 0
+        self._loop_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopSlots]" = \
+            weakref.WeakKeyDictionary()
+
+    @property
+    def in_flight(self) -> int:
+        return sum(slots.in_flight for slots in self._loop_slots.values())
+
+    def _slots(self) -> _LoopSlots:
+        loop = asyncio.get_running_loop()
+        slots = self._loop_slots.get(loop)
+        if slots is None:
+            slots = self._loop_slots[loop] = _LoopSlots()
+        return slots
+
+    async def _acquire(self, estimated_tokens: int) -> None:
+        slots = self._slots()
+        async with slots.admission:
+            async with slots.slot_released:
+                await slots.slot_released.wait_for(lambda: slots.in_flight < int(self.concurrency))
+                slots.in_flight += 1
+            try:
+                while True:
+                    wait = max(
+                        self.request_bucket.wait_time(1) if self.request_bucket else 0.0,
+                        self.token_bucket.wait_time(estimated_tokens) if self.token_bucket else 0.0,
+                    )
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+            except BaseException:
+                await self._release()
+                raise
+            if self.request_bucket:
+                self.request_bucket.consume(1)
+            if self.token_bucket:
+                self.token_bucket.consume(estimated_tokens)
+
+    async def _release(self) -> None:
+        slots = self._slots()
+        async with slots.slot_released:
+            slots.in_flight -= 1
+            slots.slot_released.notify_all()
+
+    def _on_success(self, latency: float) -> None:
+        if self.latency_ewma is not None and latency > 2 * self.latency_ewma:
+            # Latency spike: the provider is queueing us, back off a little
+            self.concurrency = max(1.0, self.concurrency * 0.9)
+        else:
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+        self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+
+    def on_rate_limited(self) -> None:
+        self.rate_limited += 1
+        self.concurrency = max(1.0, self.concurrency / 2)
+        logger.warning(f"Rate limited by {self.name}, concurrency window now {self.concurrency:.1f}")
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket once the provider reports real usage"""
+        if self.token_bucket:
+            self.token_bucket.consume(actual_tokens - estimated_tokens)
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int = 0):
+        await self._acquire(estimated_tokens)
+        start = time.monotonic()
+        try:
+            yield
+            self._on_success(time.monotonic() - start)
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self.on_rate_limited()
+            raise
+        finally:
+            await self._release()
+
+
+_schedulers: dict[tuple, LLMScheduler] = {}
+
+
+def get_llm_scheduler(llm: BaseChatModel) -> LLMScheduler:
+    """Return the shared scheduler for the model's provider endpoint and model name"""
+    model_name = getattr(llm, "model_name", None) or getattr(llm, "model", "")
+    base_url = getattr(llm, "openai_api_base", None) or getattr(llm, "base_url", None) or ""
+    key = (type(llm).__name__, str(base_url), model_name)
+    scheduler = _schedulers.get(key)
+    if scheduler is None:
+        rpm = os.getenv("LLM_RPM_LIMIT")
+        tpm = os.getenv("LLM_TPM_LIMIT")
+        scheduler = LLMScheduler(
+            name=f"{type(llm).__name__}/{model_name}",
+            requests_per_minute=float(rpm) if rpm else None,
+            tokens_per_minute=float(tpm) if tpm else None,
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+        )
+        _schedulers[key] = scheduler
+    return scheduler
@@ -0,0 +1,114 @@
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+JSON_RESPONSE_MARKER = "**JSON Response:**"
+
+
+class ThinkTagSplitter:
+    """Split a streamed ``<think>...</think>answer`` completion into reasoning and content.
+
+    ``feed`` returns the ``(reasoning, content)`` deltas of each chunk as soon
+    as they are unambiguous; only a possible partial tag at the end of a chunk
+    is held back. Some chat templates already put ``<think>`` in the prompt,
+    so a completion that does not start with it is held back until a bare
+    ``</think>`` marks everything before it as reasoning, or until ``finish``
+    hands it all over as content. If a ``<think>`` is never closed,
+    ``in_content`` stays False after ``finish`` and callers decide what to do
+    with the reasoning.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._state = "start"  # start -> reasoning | untagged -> content
+        self.reasoning_chars = 0
+
+    @property
+    def in_content(self) -> bool:
+        return self._state == "content"
+
+    def feed(self, text: str) -> tuple[str, str]:
+        self._buffer += text
+        reasoning = content = ""
+        if self._state == "start":
+            stripped = self._buffer.lstrip()
+            if stripped.startswith(THINK_OPEN):
+                self._buffer = stripped[len(THINK_OPEN):]
+                self._state = "reasoning"
+            elif THINK_OPEN.startswith(stripped):
+                return "", ""  # not enough text yet to tell
+            else:
+                self._state = "untagged"
+        if self._state == "untagged":
+            if THINK_CLOSE not in self._buffer:
+                return "", ""
+            self._state = "reasoning"
+        if self._state == "reasoning":
+            end = self._buffer.find(THINK_CLOSE)
+            if end == -1:
+                keep = _partial_suffix(self._buffer, THINK_CLOSE)
+                reasoning, self._buffer = self._buffer[:len(self._buffer) - keep], self._buffer[len(self._buffer) - keep:]
+                self.reasoning_chars += len(reasoning)
+                return reasoning, ""
+            reasoning, self._buffer = self._buffer[:end], self._buffer[end + len(THINK_CLOSE):]
+            self.reasoning_chars += len(reasoning)
+            self._state = "content"
+        content, self._buffer = self._buffer, ""
+        return reasoning, content
+
+    def finish(self) -> tuple[str, str]:
+        """Flush the text held back at the end of the stream"""
+        rest, self._buffer = self._buffer, ""
+        if self._state == "reasoning":
+            self.reasoning_chars += len(rest)
+            return rest, ""
+        # start or untagged: no </think> came, it was all answer
+        self._state = "content"
+        return "", rest
+
+
+def _partial_suffix(text: str, tag: str) -> int:
+    """Length of the longest suffix of text that is a prefix of tag"""
+    for length in range(min(len(tag) - 1, len(text)), 0, -1):
+        if tag.startswith(text[-length:]):
+            return length
+    return 0
+
+
+class JsonResponseMarkerStripper:
+    """Drop the ``**JSON Response:**`` lead-in deepseek-r1 writes before its JSON answer.
+
+    Streamed content is held back until the first ``{``; the text before it is
+    cut after the last marker. Everything from the ``{`` on passes unchanged.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._started = False
+
+    def feed(self, text: str) -> str:
+        if self._started:
+            return text
+        self._buffer += text
+        brace = self._buffer.find("{")
+        if brace == -1:
+            return ""
+        head, rest = self._buffer[:brace], self._buffer[brace:]
+        self._buffer, self._started = "", True
+        return _after_marker(head) + rest
+
+    def finish(self) -> str:
+        """Flush content that never reached a ``{``"""
+        rest, self._buffer = self._buffer, ""
+        self._started = True
+        return _after_marker(rest)
+
+
+def _after_marker(text: str) -> str:
+    if JSON_RESPONSE_MARKER in text:
+        return text.split(JSON_RESPONSE_MARKER)[-1]
+    return text
+
+
+def strip_json_response_marker(content: str) -> str:
+    """Strip a complete answer the same way JsonResponseMarkerStripper strips a stream"""
+    stripper = JsonResponseMarkerStripper()
+    return stripper.feed(content) + stripper.finish()
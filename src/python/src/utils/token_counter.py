@@ -0,0 +1,94 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from langchain_anthropic import ChatAnthropic
+from langchain_core.language_models import BaseChatModel
+from langchain_openai import ChatOpenAI
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken ships with langchain-openai, but keep the estimator usable without it
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Characters per token for families without a local tokenizer, measured on DOM-heavy prompts
+CHARS_PER_TOKEN = {
+    "anthropic": 3.5,
+}
+
+
+class TokenCounter:
+    """Token counting with a local tokenizer per model family and an LRU memo.
+
+    OpenAI-compatible models are counted with tiktoken; other families use a
+    per-family characters-per-token estimate, so counting never calls the
+    provider. Counts are memoized by a digest of the text, shared by all
+    counters with the same tokenizer, so repeated content costs one hash.
+    """
+
+    _memo: "OrderedDict[tuple[str, bytes], int]" = OrderedDict()
+    _memo_lock = threading.Lock()
+    max_memo_entries = 4096
+    # model name -> tiktoken encoding (None when unavailable), looked up once per process
+    _encodings: dict = {}
+
+    def __init__(self, llm: BaseChatModel, estimated_characters_per_token: float = 3):
+        self.family = self._model_family(llm)
+        self.chars_per_token = CHARS_PER_TOKEN.get(self.family, estimated_characters_per_token)
+        self._encoding = self._get_encoding(llm) if self.family == "openai" else None
+        self._namespace = self._encoding.name if self._encoding is not None else self.family
+
+    @staticmethod
+    def _model_family(llm: BaseChatModel) -> str:
+        if isinstance(llm, ChatOpenAI):
+            return "openai"
+        if isinstance(llm, ChatAnthropic):
+            return "anthropic"
+        return "default"
+
+    @classmethod
+    def _get_encoding(cls, llm: BaseChatModel):
+        if tiktoken is None:
+            return None
+        if llm.model_name not in cls._encodings:
+            cls._encodings[llm.model_name] = cls._load_encoding(llm)
+        return cls._encodings[llm.model_name]
+
+    @staticmethod
+    def _load_encoding(llm: BaseChatModel):
+        try:
+            try:
+                return tiktoken.encoding_for_model(llm.model_name)
+            except KeyError:
+                return tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            # tiktoken downloads its encodings on first use, which fails offline
+            logger.warning(f"No tokenizer available for {llm.model_name}, estimating token counts: {e}")
+            return None
+
+    def count(self, text: str) -> int:
+        key = (self._namespace, hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest())
+        with self._memo_lock:
+            tokens = self._memo.get(key)
+            if tokens is not None:
+                self._memo.move_to_end(key)
+                return tokens
+
+        tokens = self._count_uncached(text)
+        with self._memo_lock:
+            self._memo[key] = tokens
+            if len(self._memo) > self.max_memo_entries:
+                self._memo.popitem(last=False)
+        return tokens
+
+    def _count_uncached(self, text: str) -> int:
+        if self._encoding is not None:
+            try:
+                return len(self._encoding.encode(text, disallowed_special=()))
+            except Exception as e:
+                logger.debug(f"Tokenizer failed, falling back to estimate: {e}")
+        return int(len(text) / self.chars_per_token)
@@ -13,6 +13,9 @@ from langchain_openai import AzureChatOpenAI, ChatOpenAI
 import gradio as gr
 
 from .llm import DeepSeekR1ChatOpenAI, DeepSeekR1ChatOllama
+from .llm_cache import get_response_cache
+from .llm_registry import llm_registry, llm_registry_key
+from .ollama import get_ollama_keep_alive
 
 PROVIDER_DISPLAY_NAMES = {
     "openai": "OpenAI",
@@ -28,9 +31,24 @@ def get_llm_model(provider: str, **kwargs):
     """
     获取LLM 模型
     :param provider: 模型类型
-    :param kwargs:
+    :param kwargs: use_cache=True (or LLM_CACHE_ENABLED=true) enables the disk-backed response cache
     :return:
     """
+    use_cache = kwargs.pop("use_cache", os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true")
+    api_key = kwargs.get("api_key", "") or os.getenv(f"{provider.upper()}_API_KEY", "")
+    key = llm_registry_key(provider, api_key, use_cache=use_cache, **kwargs)
+
+    def create():
+        llm = _create_llm_model(provider, **kwargs)
+        if use_cache:
+            llm.cache = get_response_cache()
+        return llm
+
+    # Models are reused across runs so their HTTP connection pools stay warm
+    return llm_registry.get_or_create(key, create)
+
+
+def _create_llm_model(provider: str, **kwargs):
     if provider not in ["ollama"]:
         env_var = f"{provider.upper()}_API_KEY"
         api_key = kwargs.get("api_key", "") or os.getenv(env_var, "")
@@ -115,6 +133,10 @@ def get_llm_model(provider: str, **kwargs):
                 model=kwargs.get("model_name", "deepseek-r1:14b"),
                 temperature=kwargs.get("temperature", 0.0),
                 num_ctx=kwargs.get("num_ctx", 32000),
+                keep_alive=get_ollama_keep_alive(),
+                keep_reasoning=kwargs.get(
+                    "keep_reasoning", os.getenv("OLLAMA_KEEP_REASONING", "true").lower() == "true"
+                ),
                 base_url=base_url,
             )
         else:
@@ -123,6 +145,7 @@ def get_llm_model(provider: str, **kwargs):
                 temperature=kwargs.get("temperature", 0.0),
                 num_ctx=kwargs.get("num_ctx", 32000),
                 num_predict=kwargs.get("num_predict", 1024),
+                keep_alive=get_ollama_keep_alive(),
                 base_url=base_url,
             )
     elif provider == "azure_openai":
@@ -231,6 +254,38 @@ def get_latest_files(directory: str, file_types: list = ['.webm', '.zip']) -> Di
     return latest_files
 async def capture_screenshot(browser_context):
     """Capture and encode a screenshot"""
+    screenshot = await capture_screenshot_bytes(browser_context)
+    if screenshot is None:
+        return None
+    return base64.b64encode(screenshot).decode('utf-8')
+
+
+async def capture_screenshot_bytes(browser_context):
+    """Capture a JPEG screenshot of the active page as raw bytes"""
+    active_page = None
+
+    # Prefer the page the agent published through the active page tracker
+    if hasattr(browser_context, "get_active_page"):
+        active_page = browser_context.get_active_page()
+
+    if active_page is None:
+        active_page = _find_active_page(browser_context)
+    if active_page is None:
+        return None
+
+    # Take screenshot
+    try:
+        return await active_page.screenshot(
+            type='jpeg',
+            quality=75,
+            scale="css"
+        )
+    except Exception as e:
+        return None
+
+
+def _find_active_page(browser_context):
+    """Fallback for contexts without a tracker: pick the last non-blank page of the first context"""
     # Extract the Playwright browser instance
     playwright_browser = browser_context.browser.playwright_browser  # Ensure this is correct.
 
@@ -253,15 +308,4 @@ async def capture_screenshot(browser_context):
                 active_page = page
     else:
         return None
-
-    # Take screenshot
-    try:
-        screenshot = await active_page.screenshot(
-            type='jpeg',
-            quality=75,
-            scale="css"
-        )
-        encoded = base64.b64encode(screenshot).decode('utf-8')
-        return encoded
-    except Exception as e:
-        return None
+    return active_page
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from browser_use.agent.views import ActionResult
+
+from src.agent.action_stream import IncrementalActionParser
+from src.agent.custom_agent import CustomAgent
+
+ACTIONS = [
+    {"input_text": {"index": 2, "text": "say \"action\": [1, {2}] \\ done"}},
+    {"click_element": {"index": 5}},
+    {"scroll_down": {}},
+]
+RESPONSE = json.dumps({
+    "current_state": {"summary": "the action list: [{\"click\": 1}]", "action": "not this one"},
+    "action": ACTIONS,
+})
+
+
+def feed_in_chunks(text, size):
+    parser = IncrementalActionParser()
+    actions = []
+    for i in range(0, len(text), size):
+        actions += parser.feed(text[i:i + size])
+    return parser, actions
+
+
+def test_actions_in_split_chunks():
+    for size in (1, 2, 7, 50, len(RESPONSE)):
+        parser, actions = feed_in_chunks(RESPONSE, size)
+        assert actions == ACTIONS
+        assert parser.done
+
+
+def test_actions_are_returned_as_soon_as_complete():
+    parser = IncrementalActionParser()
+    first_end = RESPONSE.index('{"click_element"')
+    assert parser.feed(RESPONSE[:first_end - 3]) == []
+    assert parser.feed(RESPONSE[first_end - 3:first_end]) == [ACTIONS[0]]
+    assert not parser.done
+
+
+def test_partial_action_is_held_back():
+    parser, actions = feed_in_chunks(RESPONSE[:RESPONSE.index('"index": 5') + 5], 3)
+    assert actions == [ACTIONS[0]]
+    assert not parser.done
+
+
+def test_nested_strings_and_escapes_do_not_open_the_array():
+    # "action" as a string value and brackets inside strings must not be taken for the action array
+    text = '{"current_state": {"thought": "\\"action\\": [{\\"x\\": 1}]"}, "note": "action", "action": [{"done": {"text": "}]"}}]}'
+    _, actions = feed_in_chunks(text, 4)
+    assert actions == [{"done": {"text": "}]"}}]
+
+
+def test_trailing_garbage_is_ignored():
+    parser, actions = feed_in_chunks(RESPONSE + "\n```\nHope this helps! {\"action\": [{\"x\": {}}]}", 5)
+    assert actions == ACTIONS
+    assert parser.done
+
+
+def test_broken_action_is_repaired():
+    text = '{"current_state": {}, "action": [{"click_element": {"index": 5,}}, {"go_back": {}}]}'
+    _, actions = feed_in_chunks(text, 3)
+    assert actions == [{"click_element": {"index": 5}}, {"go_back": {}}]
+
+
+def test_failed_model_call_keeps_results_of_streamed_actions():
+    async def act_stream(queue):
+        results = []
+        while (action := await queue.get()) is not None:
+            results.append(ActionResult(extracted_content=f"ran {action}"))
+        return results
+
+    async def run():
+        queue = asyncio.Queue()
+        act_task = asyncio.create_task(act_stream(queue))
+        queue.put_nowait("click")
+        queue.put_nowait(None)  # the model stream failed after one action
+        return await CustomAgent._drain_act_task(act_task)
+
+    assert [r.extracted_content for r in asyncio.run(run())] == ["ran click"]
+
+
+if __name__ == "__main__":
+    test_actions_in_split_chunks()
+    test_actions_are_returned_as_soon_as_complete()
+    test_partial_action_is_held_back()
+    test_nested_strings_and_escapes_do_not_open_the_array()
+    test_trailing_garbage_is_ignored()
+    test_broken_action_is_repaired()
+    test_failed_model_call_keeps_results_of_streamed_actions()
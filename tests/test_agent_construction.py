@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from browser_use.browser.browser import Browser
+from langchain_openai import ChatOpenAI
+
+from src.agent.custom_agent import CustomAgent
+from src.agent.custom_prompts import CustomAgentMessagePrompt, CustomSystemPrompt
+from src.agent.custom_views import _custom_output_models
+from src.controller.cached_registry import CachedRegistry
+from src.controller.custom_controller import CustomController
+
+llm = ChatOpenAI(model="gpt-4o", api_key="test")
+browser = Browser()
+
+
+def make_agent(controller, sensitive_data=None):
+    return CustomAgent(task="find the cheapest flight", llm=llm, browser=browser, controller=controller,
+                       system_prompt_class=CustomSystemPrompt, agent_prompt_class=CustomAgentMessagePrompt,
+                       sensitive_data=sensitive_data, generate_gif=False)
+
+
+def system_prompt(agent):
+    return agent.message_manager.history.messages[0].message.content
+
+
+def test_sensitive_data_filtering_does_not_leak_into_other_agents():
+    clean = system_prompt(make_agent(CustomController()))
+    filtered = system_prompt(make_agent(CustomController(), sensitive_data={"word": "element"}))
+    assert "<secret>word</secret>" in filtered
+    assert system_prompt(make_agent(CustomController())) == clean
+    assert "<secret>" not in clean
+
+
+def clear_caches():
+    CachedRegistry._prompt_descriptions.clear()
+    CachedRegistry._action_models.clear()
+    CustomSystemPrompt._system_messages.clear()
+    _custom_output_models.clear()
+
+
+def test_agent_construction_benchmark(n_agents=20):
+    shared_controller = CustomController()
+    make_agent(shared_controller)
+    for label, make_controller, cold in (("same controller", lambda: shared_controller, False),
+                                         ("new controller", CustomController, False),
+                                         ("new controller, cold caches", CustomController, True)):
+        controllers = [make_controller() for _ in range(n_agents)]
+        elapsed = 0.0
+        for controller in controllers:
+            if cold:
+                clear_caches()
+            start = time.perf_counter()
+            make_agent(controller)
+            elapsed += time.perf_counter() - start
+        print(f"{label}: {elapsed / n_agents * 1000:.1f} ms/agent")
+
+
+if __name__ == "__main__":
+    test_sensitive_data_filtering_does_not_leak_into_other_agents()
+    test_agent_construction_benchmark()
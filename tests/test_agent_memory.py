@@ -0,0 +1,98 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.agent.agent_memory import AgentMemory
+
+
+def count_tokens(text):
+    return len(text.split())
+
+
+def fill(memory, n_notes, step=1):
+    for i in range(n_notes):
+        memory.add(f"Flight {i} costs {100 + i} EUR. Departs at noon.", step)
+
+
+class SummaryModel(BaseChatModel):
+    summary: str = "flights 0-4 cost 100-104 EUR"
+
+    @property
+    def _llm_type(self) -> str:
+        return "summary-test-model"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.summary))])
+
+
+def test_duplicate_lines_are_dropped():
+    memory = AgentMemory(count_tokens=count_tokens)
+    assert memory.add("Cheapest flight: 120 EUR\nBook via Lufthansa", 1) == \
+           ["Cheapest flight: 120 EUR", "Book via Lufthansa"]
+    assert memory.add("  cheapest   FLIGHT: 120 eur \n\nReturn is 80 EUR", 2) == ["Return is 80 EUR"]
+    assert memory.render() == "Cheapest flight: 120 EUR\nBook via Lufthansa\nReturn is 80 EUR\n"
+    assert memory.total_tokens == 11
+
+
+def test_extractive_compaction_fits_budget():
+    memory = AgentMemory(token_budget=40, count_tokens=count_tokens)
+    fill(memory, 10)
+    assert memory.over_budget
+    asyncio.run(memory.compact())
+    assert not memory.over_budget
+    assert memory.compactions >= 1
+    assert memory.total_tokens == sum(count_tokens(entry.text) for entry in memory.entries)
+    # the condensed note keeps the first sentence of every older note
+    assert "Flight 0 costs 100 EUR." in memory.entries[0].text
+    assert "Departs at noon" not in memory.entries[0].text
+
+
+def test_llm_summary_is_used_when_shorter():
+    memory = AgentMemory(token_budget=40, count_tokens=count_tokens, summary_llm=SummaryModel())
+    fill(memory, 10)
+    asyncio.run(memory.compact())
+    assert memory.entries[0].text == "flights 0-4 cost 100-104 EUR"
+    assert not memory.over_budget
+
+
+def test_condensed_lines_are_not_added_again():
+    memory = AgentMemory(token_budget=40, count_tokens=count_tokens)
+    fill(memory, 10)
+    asyncio.run(memory.compact())
+    compactions = memory.compactions
+    assert "Flight 0 costs" not in memory.render().split("\n", 1)[1]
+    # the fact lives on in the condensed note, collecting it again would grow the memory back
+    assert memory.add("Flight 0 costs 100 EUR. Departs at noon.", 2) == []
+    assert memory.add("Flight 9 costs 109 EUR. Departs at noon.", 2) == []
+    assert not memory.over_budget
+    asyncio.run(memory.compact())
+    assert memory.compactions == compactions
+
+
+def test_condensed_hashes_are_bounded():
+    from src.agent import agent_memory
+
+    original, agent_memory.MAX_CONDENSED_HASHES = agent_memory.MAX_CONDENSED_HASHES, 3
+    try:
+        memory = AgentMemory(token_budget=40, count_tokens=count_tokens)
+        fill(memory, 10)
+        asyncio.run(memory.compact())
+    finally:
+        agent_memory.MAX_CONDENSED_HASHES = original
+    assert len(memory._condensed_hashes) == 3
+    # the oldest condensed line was forgotten, so it is accepted again
+    assert memory.add("Flight 0 costs 100 EUR. Departs at noon.", 2) == ["Flight 0 costs 100 EUR. Departs at noon."]
+
+
+if __name__ == "__main__":
+    test_duplicate_lines_are_dropped()
+    test_extractive_compaction_fits_budget()
+    test_llm_summary_is_used_when_shorter()
+    test_condensed_lines_are_not_added_again()
+    test_condensed_hashes_are_bounded()
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from browser_use.agent.views import ActionResult
+from browser_use.browser.views import BrowserState
+from browser_use.dom.views import DOMElementNode
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_openai import ChatOpenAI
+
+from src.agent.custom_agent import CustomAgent
+from src.agent.custom_prompts import CustomAgentMessagePrompt, CustomSystemPrompt
+from src.agent.custom_views import CustomAgentStepInfo
+from src.agent.step_latency import format_step_latency, summarize_step_latency
+from src.controller.custom_controller import CustomController
+
+# simulated phase latencies in seconds; the planner is slower than the model, as with a reasoning planner
+MODEL, PLANNER, STATE, ACT = 0.2, 0.5, 0.04, 0.12
+N_STEPS = 5
+PLAN = '{"next_steps": "scroll"}'
+BRAIN = {"prev_action_evaluation": "", "important_contents": "", "task_progress": "", "future_plans": "",
+         "thought": "", "summary": ""}
+
+
+class SlowPlanner(BaseChatModel):
+    @property
+    def _llm_type(self) -> str:
+        return "slow-planner"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(PLANNER)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=PLAN))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(PLANNER)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=PLAN))])
+
+
+class SlowBrowserContext:
+    async def get_state(self, use_vision=True):
+        await asyncio.sleep(STATE)
+        body = DOMElementNode(tag_name="body", xpath="/body", attributes={}, children=[], is_visible=True, parent=None)
+        return BrowserState(element_tree=body, selector_map={}, url="https://example.com", title="Example", tabs=[])
+
+    async def close(self):
+        pass
+
+
+def test_slow_planner_answers_sync_and_async():
+    planner = SlowPlanner()
+    assert planner.invoke("plan").content == asyncio.run(planner.ainvoke("plan")).content == PLAN
+
+
+def make_agent(concurrent_planner):
+    controller = CustomController()
+
+    async def multi_act(actions, browser_context, **kwargs):
+        await asyncio.sleep(ACT)
+        return [ActionResult()]
+
+    controller.multi_act = multi_act
+    agent = CustomAgent(task="scroll down", llm=ChatOpenAI(model="gpt-4o", api_key="test"),
+                        browser_context=SlowBrowserContext(), controller=controller,
+                        system_prompt_class=CustomSystemPrompt, agent_prompt_class=CustomAgentMessagePrompt,
+                        generate_gif=False, use_vision=False, planner_llm=SlowPlanner(), planner_interval=1,
+                        concurrent_planner=concurrent_planner)
+
+    async def get_next_action(input_messages, action_queue=None):
+        await asyncio.sleep(MODEL)
+        agent.n_steps += 1
+        return agent.AgentOutput.model_validate({"current_state": BRAIN, "action": [{"scroll_down": {}}]})
+
+    agent.get_next_action = get_next_action
+    return agent
+
+
+async def run_steps(agent):
+    plans = []
+    append_to_state_message = agent.message_manager.append_to_state_message
+
+    def record_plan(text):
+        plans.append(text)
+        append_to_state_message(text)
+
+    agent.message_manager.append_to_state_message = record_plan
+    step_info = CustomAgentStepInfo(step_number=1, max_steps=N_STEPS, task="scroll down", add_infos="", memory="",
+                                    task_progress="", future_plans="")
+    for _ in range(N_STEPS):
+        await agent.step(step_info)
+    if agent._planner_task is not None:
+        agent._planner_task.cancel()
+    return sum("Planning Agent outputs plans" in plan for plan in plans)
+
+
+def test_concurrent_planner_step_latency():
+    means = {}
+    for concurrent in (False, True):
+        agent = make_agent(concurrent)
+        plans = asyncio.run(run_steps(agent))
+        assert agent.consecutive_failures == 0
+        # the concurrent plan reaches the prompt one step later, so the first step has none
+        assert plans == (N_STEPS - 1 if concurrent else N_STEPS)
+        means[concurrent] = sum(latency["total"] for latency in agent.step_latencies) / N_STEPS
+        label = "concurrent" if concurrent else "serial"
+        print(f"{label}: {format_step_latency(summarize_step_latency(agent.step_latencies))}, "
+              f"mean step {means[concurrent]:.2f}s")
+    # serial: state + planner + model + act; concurrent: the planner overlaps model and actions
+    assert means[False] >= STATE + PLANNER + MODEL + ACT
+    assert means[True] < means[False] - (MODEL + ACT) / 2
+
+
+if __name__ == "__main__":
+    test_slow_planner_answers_sync_and_async()
+    test_concurrent_planner_step_latency()
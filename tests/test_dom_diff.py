@@ -0,0 +1,135 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from browser_use.agent.prompts import SystemPrompt
+from browser_use.browser.views import BrowserState, TabInfo
+from browser_use.dom.views import DOMElementNode, DOMTextNode
+from langchain_core.messages import AIMessage
+from langchain_openai import ChatOpenAI
+
+from src.agent.custom_message_manager import CustomMessageManager
+from src.agent.custom_prompts import CustomAgentMessagePrompt
+from src.agent.custom_views import CustomAgentStepInfo
+from src.agent.dom_diff import ElementDiffEncoder
+from src.agent.element_list import element_index, split_elements
+
+PAGE = "\n".join([
+    "[0]<a>Apples",
+    "$ 7.99 price</a>",
+    "[1]<a>Pears",
+    "$ 3.49 price</a>",
+    "[]Free delivery over $ 50",
+    "[2]<button>Checkout</button>",
+] + [f"[{i}]<a>Product {i}</a>" for i in range(3, 30)])
+
+
+def test_split_elements_groups_continuation_lines():
+    elements = split_elements(PAGE)
+    assert elements[0] == "[0]<a>Apples\n$ 7.99 price</a>"
+    assert elements[2] == "[]Free delivery over $ 50"
+    assert [element_index(element) for element in elements[:4]] == [0, 1, None, 2]
+    assert split_elements("... 12 more elements not shown ...\n[4]<a>x</a>") == \
+           ["... 12 more elements not shown ...", "[4]<a>x</a>"]
+
+
+def test_first_visit_is_full_snapshot():
+    encoder = ElementDiffEncoder(full_snapshot_interval=5)
+    assert encoder.encode("0", "https://shop", PAGE, step=1) == (PAGE, None)
+
+
+def test_changed_text_line_is_reported_with_its_element():
+    encoder = ElementDiffEncoder(full_snapshot_interval=5)
+    encoder.encode("0", "https://shop", PAGE, step=1)
+    text, base_step = encoder.encode("0", "https://shop", PAGE.replace("$ 7.99", "$ 8.49"), step=2)
+    assert base_step == 1
+    assert text == "~ [0]<a>Apples\n$ 8.49 price</a>"
+
+
+def test_added_and_removed_elements():
+    encoder = ElementDiffEncoder(full_snapshot_interval=5)
+    encoder.encode("0", "https://shop", PAGE, step=1)
+    page = PAGE.replace("[2]<button>Checkout</button>", "[]Cart is empty") + "\n[30]<a>Product 30</a>"
+    text, base_step = encoder.encode("0", "https://shop", page, step=2)
+    assert base_step == 1
+    assert text.splitlines() == [
+        "+ [30]<a>Product 30</a>",
+        "+ []Cart is empty",
+        "- [2]<button>Checkout</button>",
+    ]
+
+
+def test_unchanged_page():
+    encoder = ElementDiffEncoder(full_snapshot_interval=5)
+    encoder.encode("0", "https://shop", PAGE, step=1)
+    assert encoder.encode("0", "https://shop", PAGE, step=2) == ("(no changes)", 1)
+
+
+def test_full_snapshot_after_navigation_interval_and_forget():
+    encoder = ElementDiffEncoder(full_snapshot_interval=3)
+    encoder.encode("0", "https://shop", PAGE, step=1)
+    assert encoder.encode("0", "https://shop/cart", PAGE, step=2)[1] is None
+    assert encoder.encode("0", "https://shop/cart", PAGE, step=5)[1] is None
+    encoder.forget("0")
+    assert encoder.encode("0", "https://shop/cart", PAGE, step=6)[1] is None
+
+
+def test_large_diff_falls_back_to_full_list():
+    encoder = ElementDiffEncoder(full_snapshot_interval=5, max_diff_ratio=0.5)
+    encoder.encode("0", "https://shop", PAGE, step=1)
+    page = PAGE.replace("Product", "Item")
+    assert encoder.encode("0", "https://shop", page, step=2) == (page, None)
+    stats = encoder.stats()
+    assert stats["full_snapshots"] == 2 and stats["diffs"] == 0
+
+
+def make_state(prices):
+    body = DOMElementNode(tag_name="body", xpath="/body", attributes={}, children=[], is_visible=True, parent=None)
+    for i, price in enumerate(prices):
+        link = DOMElementNode(tag_name="a", xpath=f"/body/a[{i + 1}]", attributes={}, children=[],
+                              is_visible=True, parent=body, highlight_index=i)
+        link.children.append(DOMTextNode(text=f"Product {i} $ {price}", is_visible=True, parent=link))
+        body.children.append(link)
+    return BrowserState(element_tree=body, selector_map={}, url="https://shop", title="Shop",
+                        tabs=[TabInfo(page_id=0, url="https://shop", title="Shop")])
+
+
+def add_step(manager, step, prices):
+    step_info = CustomAgentStepInfo(step_number=step, max_steps=10, task="buy", add_infos="", memory="",
+                                    task_progress="", future_plans="")
+    manager.add_state_message(make_state(prices), step_info=step_info, use_vision=False)
+    manager.cut_messages()
+    state_text = manager.history.messages[-1].message.content
+    manager._add_message_with_tokens(AIMessage(content=f"answer {step} " * 50))
+    manager.remove_state_message()
+    return state_text
+
+
+def test_manager_keeps_snapshot_and_resends_full_list_once_it_is_trimmed():
+    manager = CustomMessageManager(
+        llm=ChatOpenAI(model="gpt-4o", api_key="test"), task="buy", action_descriptions="",
+        system_prompt_class=SystemPrompt, agent_prompt_class=CustomAgentMessagePrompt, dom_diff_interval=10,
+    )
+    prices = [str(i) for i in range(40)]
+    assert "changes since" not in add_step(manager, 1, prices)
+    assert "changes since the full list of step 1" in add_step(manager, 2, prices[:-1] + ["99"])
+    # only the snapshot state message stays in history, the diff message is removed
+    assert sum("Interactive elements" in str(m.message.content) for m in manager.history.messages) == 1
+
+    # leave room for the newest messages only, so the snapshot is trimmed away
+    manager.max_input_tokens = manager.history.total_tokens
+    state_text = add_step(manager, 3, prices[:-1] + ["98"])
+    assert "changes since" not in state_text
+    assert "Product 0 $ 0" in state_text
+
+
+if __name__ == "__main__":
+    test_split_elements_groups_continuation_lines()
+    test_first_visit_is_full_snapshot()
+    test_changed_text_line_is_reported_with_its_element()
+    test_added_and_removed_elements()
+    test_unchanged_page()
+    test_full_snapshot_after_navigation_interval_and_forget()
+    test_large_diff_falls_back_to_full_list()
+    test_manager_keeps_snapshot_and_resends_full_list_once_it_is_trimmed()
@@ -0,0 +1,84 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from src.agent.element_budget import ElementBudgeter
+from src.agent.element_list import split_elements
+from src.controller.custom_controller import CustomController
+
+
+def count_tokens(text):
+    return len(text) // 4
+
+
+def make_page(n_products=60):
+    lines = ["[0]<input type=\"search\"></input>"]
+    for i in range(1, n_products + 1):
+        lines += [f"[{i}]<a>Product {i}", f"$ {i}.99 price</a>"]
+    lines.append(f"[{n_products + 1}]<a>Banana bread</a>")
+    return "\n".join(lines)
+
+
+def test_small_list_is_unchanged():
+    budgeter = ElementBudgeter(token_budget=10000, count_tokens=count_tokens)
+    page = make_page(5)
+    assert budgeter.budget(page, {}, "buy bananas") == page
+    assert budgeter.overflow_pages == []
+
+
+def test_elements_are_kept_whole():
+    budgeter = ElementBudgeter(token_budget=150, count_tokens=count_tokens)
+    text = budgeter.budget(make_page(), {}, "buy banana bread")
+    *shown, marker = split_elements(text)
+    for element in shown:
+        # every kept element comes with its own price line, no orphan text
+        assert element.startswith("[")
+        if "Product" in element:
+            assert element.endswith("price</a>") and "\n" in element
+    omitted = sum(len(split_elements(page)) for page in budgeter.overflow_pages)
+    assert len(shown) + omitted == 62
+    assert marker.startswith(f"... {omitted} more elements not shown")
+    for page in budgeter.overflow_pages:
+        assert not page.startswith("$")
+
+
+def test_relevant_elements_are_kept_first():
+    budgeter = ElementBudgeter(token_budget=150, count_tokens=count_tokens)
+    text = budgeter.budget(make_page(), {}, "buy banana bread")
+    assert "[61]<a>Banana bread</a>" in text
+    assert "[0]<input" in text
+
+
+def test_pages():
+    budgeter = ElementBudgeter(token_budget=150, count_tokens=count_tokens)
+    budgeter.budget(make_page(), {}, "buy banana bread")
+    assert budgeter.get_page(1).startswith(f"More elements (page 1/{len(budgeter.overflow_pages)}):\n[")
+    assert budgeter.get_page(0).startswith("Page 0 does not exist")
+
+
+def test_show_more_elements_only_with_a_budget():
+    from browser_use.browser.browser import Browser
+    from langchain_openai import ChatOpenAI
+    from src.agent.custom_agent import CustomAgent
+    from src.agent.custom_prompts import CustomAgentMessagePrompt, CustomSystemPrompt
+
+    def actions(max_element_tokens):
+        agent = CustomAgent(task="buy bananas", llm=ChatOpenAI(model="gpt-4o", api_key="test"), browser=Browser(),
+                            controller=CustomController(), system_prompt_class=CustomSystemPrompt,
+                            agent_prompt_class=CustomAgentMessagePrompt, max_element_tokens=max_element_tokens)
+        return agent.ActionModel.model_fields, agent.message_manager.system_prompt.content
+
+    fields, prompt = actions(0)
+    assert "show_more_elements" not in fields and "show_more_elements" not in prompt
+    fields, prompt = actions(2000)
+    assert "show_more_elements" in fields and "show_more_elements" in prompt
+    assert "show_more_elements" in CustomController(element_paging=True).registry.registry.actions
+
+
+if __name__ == "__main__":
+    test_small_list_is_unchanged()
+    test_elements_are_kept_whole()
+    test_relevant_elements_are_kept_first()
+    test_pages()
+    test_show_more_elements_only_with_a_budget()
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from src.utils.hedging import LLMHedger
+
+# primary latencies cycle through 10ms..100ms, so its p90 is about 90ms
+PRIMARY_LATENCIES = [0.01 * i for i in range(1, 11)]
+SECONDARY_LATENCY = 0.002
+
+
+def make_invoke():
+    calls = {"primary": 0}
+
+    async def invoke(llm, messages):
+        if llm == "primary":
+            latency = PRIMARY_LATENCIES[calls["primary"] % len(PRIMARY_LATENCIES)]
+            calls["primary"] += 1
+        else:
+            latency = SECONDARY_LATENCY
+        await asyncio.sleep(latency)
+        return llm, llm
+
+    return invoke
+
+
+async def run_requests(hedger, n_requests):
+    invoke = make_invoke()
+    winners = []
+    for _ in range(n_requests):
+        _, winner = await hedger.ainvoke("primary", [], invoke)
+        winners.append(winner)
+    return winners
+
+
+def test_threshold_stays_stable_when_hedges_win():
+    hedger = LLMHedger("secondary", percentile=0.9, min_samples=5, initial_delay=0.5)
+    asyncio.run(run_requests(hedger, 30))
+    early_threshold = hedger.threshold()
+    winners = asyncio.run(run_requests(hedger, 60))
+    # a fast secondary wins every hedge; without the cancelled primaries the threshold would decay
+    # towards the fastest primary and nearly every request would be hedged
+    assert hedger.threshold() >= 0.08
+    assert hedger.threshold() >= early_threshold - 0.01
+    assert winners[-20:].count("secondary") <= 8
+    assert hedger.stats()["hedge_rate"] < 0.4
+
+
+def test_failed_primary_falls_back_without_latency_sample():
+    async def invoke(llm, messages):
+        if llm == "primary":
+            raise ValueError("could not parse")
+        return llm, llm
+
+    hedger = LLMHedger("secondary", initial_delay=1.0)
+    assert asyncio.run(hedger.ainvoke("primary", [], invoke)) == ("secondary", "secondary")
+    assert len(hedger.primary_latencies) == 0
+
+
+if __name__ == "__main__":
+    test_threshold_stays_stable_when_hedges_win()
+    test_failed_primary_falls_back_without_latency_sample()
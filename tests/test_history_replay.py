@@ -0,0 +1,86 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from browser_use.agent.views import ActionResult
+from browser_use.browser.views import BrowserState
+from browser_use.dom.views import DOMElementNode
+
+from src.controller.custom_controller import CustomController
+from src.utils.history_replay import (HistoryReplayer, format_replay_timings, load_recorded_steps,
+                                      summarize_replay_timings)
+
+# saved with AgentHistoryList.save_to_file: go to a page, search, extract the prices, done
+HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "agent_history.json")
+
+
+class ReplayContext:
+    """Serves a page where the search box moved to another index and the search button is gone"""
+
+    def __init__(self):
+        self.last_state_timings = {}
+
+    async def get_state(self, use_vision=True):
+        self.last_state_timings = {"dom": 0.02, "screenshot": 0.01, "total": 0.02}
+        body = DOMElementNode(tag_name="body", xpath="html/body", attributes={}, children=[], is_visible=True,
+                              parent=None)
+        search = DOMElementNode(tag_name="input", xpath="html/body/form/input",
+                                attributes={"name": "q", "type": "search"}, children=[], is_visible=True,
+                                parent=body, highlight_index=8)
+        body.children.append(search)
+        return BrowserState(element_tree=body, selector_map={8: search}, url="https://example.com/", title="Example",
+                            tabs=[])
+
+
+def replay():
+    controller = CustomController()
+    executed = []
+
+    async def act(action, browser_context, *args, **kwargs):
+        name, params = next(iter(action.model_dump(exclude_unset=True).items()))
+        executed.append((name, params.get("index")))
+        return ActionResult(is_done=name == "done")
+
+    controller.act = act
+    steps = load_recorded_steps(HISTORY)
+    return steps, executed, asyncio.run(HistoryReplayer(controller, ReplayContext()).replay(steps))
+
+
+def test_recorded_steps_are_loaded():
+    steps = load_recorded_steps(HISTORY)
+    # the last item has no model output and is skipped
+    assert [[next(iter(action)) for action in step["actions"]] for step in steps] == \
+           [["go_to_url"], ["input_text", "click_element"], ["extract_content"], ["done"]]
+    assert steps[1]["elements"][0]["xpath"] == "html/body/form/input"
+    assert steps[0]["elements"] == [None]
+
+
+def test_replay_relocates_elements_and_substitutes_llm_actions():
+    steps, executed, reports = replay()
+    # the search box is found by its locator, the missing button keeps its recorded index
+    assert executed == [("go_to_url", None), ("input_text", 8), ("click_element", 5), ("done", None)]
+    assert [report["unresolved"] for report in reports] == [0, 1, 0, 0]
+    extract = reports[2]["actions"][0]
+    assert extract["action"] == "extract_content" and extract["substituted"]
+
+
+def test_replay_summary():
+    _, _, reports = replay()
+    summary = summarize_replay_timings(reports)
+    assert summary["steps"] == 4 and summary["errors"] == 0 and summary["unresolved_elements"] == 1
+    assert summary["timings"]["state.dom"] == {"count": 4, "mean": 0.02, "median": 0.02, "max": 0.02}
+    assert "state.total" not in summary["timings"]
+    # substituted actions are not timed
+    assert "action.extract_content" not in summary["timings"]
+    assert summary["timings"]["action.input_text"]["count"] == 1
+    text = format_replay_timings(summary)
+    assert text.startswith("4 steps replayed, 0 action errors, 1 elements not found by locator")
+    assert "action.click_element" in text
+
+
+if __name__ == "__main__":
+    test_recorded_steps_are_loaded()
+    test_replay_relocates_elements_and_substitutes_llm_actions()
+    test_replay_summary()
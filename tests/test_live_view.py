@@ -0,0 +1,62 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.utils.live_view import BOUNDARY, FRAME_PATH, STREAM_PATH, LiveView, get_live_view, mount_live_view
+
+
+def make_client():
+    app = FastAPI()
+    mount_live_view(app)
+    return TestClient(app, base_url="http://ui.example:7788")
+
+
+def test_origin_check():
+    live_view = LiveView(allowed_origins=["https://proxy.example"])
+    assert live_view.origin_allowed({"host": "ui.example:7788", "origin": "http://ui.example:7788"})
+    assert live_view.origin_allowed({"host": "ui.example:7788", "origin": "https://proxy.example"})
+    assert live_view.origin_allowed({"host": "ui.example:7788", "sec-fetch-site": "same-origin"})
+    assert not live_view.origin_allowed({"host": "ui.example:7788", "origin": "https://evil.example"})
+    assert not live_view.origin_allowed({"host": "ui.example:7788", "sec-fetch-site": "cross-site"})
+
+
+def test_routes_are_served_by_the_ui_app():
+    client = make_client()
+    assert client.get(FRAME_PATH).status_code == 404
+    asyncio.run(get_live_view().publish_frame(b"jpeg"))
+    response = client.get(FRAME_PATH, headers={"Origin": "http://ui.example:7788"})
+    assert response.status_code == 200 and response.content == b"jpeg"
+    assert client.get(STREAM_PATH, headers={"Origin": "https://evil.example"}).status_code == 403
+    assert client.get(FRAME_PATH, headers={"Sec-Fetch-Site": "cross-site"}).status_code == 403
+
+
+def test_stream_yields_published_frames():
+    live_view = LiveView()
+
+    async def first_parts():
+        frames = live_view._frames()
+        first = asyncio.create_task(anext(frames))
+        await asyncio.sleep(0)
+        assert live_view._clients == 1
+        await live_view.publish_frame(b"one")
+        part = await first
+        await live_view.publish_frame(b"two")
+        second = await anext(frames)
+        await frames.aclose()
+        return part, second
+
+    part, second = asyncio.run(first_parts())
+    assert part.startswith(f"--{BOUNDARY}\r\nContent-Type: image/jpeg".encode()) and part.endswith(b"one\r\n")
+    assert second.endswith(b"two\r\n")
+    assert live_view._clients == 0
+
+
+if __name__ == "__main__":
+    test_origin_check()
+    test_routes_are_served_by_the_ui_app()
+    test_stream_yields_published_frames()
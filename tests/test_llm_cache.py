@@ -0,0 +1,79 @@
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from src.utils.llm_cache import SQLiteLLMCache, cache_key
+
+LLM_STRING = "ChatOpenAI model=gpt-4o temperature=0"
+
+
+def answer(text):
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+def make_cache(**kwargs):
+    return SQLiteLLMCache(database_path=os.path.join(tempfile.mkdtemp(), "llm_cache.sqlite"), **kwargs)
+
+
+def test_hit_and_miss():
+    cache = make_cache()
+    assert cache.lookup("click the button", LLM_STRING) is None
+    cache.update("click the button", LLM_STRING, answer('{"action": []}'))
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        hit = cache.lookup("click the button", LLM_STRING)
+    assert hit[0].message.content == '{"action": []}'
+    assert caught == []
+    assert cache.stats() | {"bytes": 0} == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1, "bytes": 0}
+
+
+def test_keys_are_isolated_by_llm_string():
+    cache = make_cache()
+    cache.update("click the button", LLM_STRING, answer("gpt-4o"))
+    assert cache.lookup("click the button", LLM_STRING.replace("temperature=0", "temperature=1")) is None
+    cache.update("click the button", "ChatAnthropic model=claude", answer("claude"))
+    assert cache.lookup("click the button", LLM_STRING)[0].message.content == "gpt-4o"
+    assert cache.lookup("click the button", "ChatAnthropic model=claude")[0].message.content == "claude"
+    # the same screenshot hashes to the same key
+    image = "data:image/png;base64,iVBORw0KGgo="
+    assert cache_key(f"look at {image}", LLM_STRING) == cache_key(f"look at {image}", LLM_STRING)
+    assert cache_key(f"look at {image}", LLM_STRING) != cache_key("look at data:image/png;base64,AAAA", LLM_STRING)
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = make_cache()
+    cache.update("a", LLM_STRING, answer("a" * 1000))
+    entry_bytes = cache.stats()["bytes"]
+    cache.max_bytes = 2 * entry_bytes
+    time.sleep(0.01)
+    cache.update("b", LLM_STRING, answer("b" * 1000))
+    time.sleep(0.01)
+    assert cache.lookup("a", LLM_STRING) is not None
+    time.sleep(0.01)
+    cache.update("c", LLM_STRING, answer("c" * 1000))
+    assert cache.lookup("b", LLM_STRING) is None
+    assert cache.lookup("a", LLM_STRING) is not None and cache.lookup("c", LLM_STRING) is not None
+    assert cache.stats()["entries"] == 2
+
+
+def test_expired_entries_are_misses_and_evicted():
+    cache = make_cache(max_age_seconds=0.05)
+    cache.update("a", LLM_STRING, answer("a"))
+    time.sleep(0.1)
+    assert cache.lookup("a", LLM_STRING) is None
+    cache.update("b", LLM_STRING, answer("b"))
+    assert cache.stats()["entries"] == 1
+
+
+if __name__ == "__main__":
+    test_hit_and_miss()
+    test_keys_are_isolated_by_llm_string()
+    test_least_recently_used_entries_are_evicted()
+    test_expired_entries_are_misses_and_evicted()
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.utils.llm import ainvoke_llm, has_native_async
+
+LATENCY = 0.2
+# fits the scheduler's initial concurrency window of 4, so all calls overlap in the timing comparison
+N_AGENTS = 4
+
+
+def answer():
+    return ChatResult(generations=[ChatGeneration(message=AIMessage(content='{"action": []}'))])
+
+
+class BlockingModel(BaseChatModel):
+    """Provider with only a blocking client, like the LLMs the agent used to call with invoke"""
+
+    name: str = "blocking"
+
+    @property
+    def _llm_type(self) -> str:
+        return "blocking-test-model"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(LATENCY)
+        return answer()
+
+
+class AsyncModel(BlockingModel):
+    name: str = "async"
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(LATENCY)
+        return answer()
+
+
+async def parallel_agents(call):
+    """Wall time of N_AGENTS model calls gathered like deep_research's parallel agents"""
+    start = time.perf_counter()
+    await asyncio.gather(*(call([HumanMessage(content=f"agent {i}")]) for i in range(N_AGENTS)))
+    return time.perf_counter() - start
+
+
+def measure(llm):
+    async def blocking(messages):
+        return llm.invoke(messages)
+
+    async def awaited(messages):
+        return await ainvoke_llm(llm, messages)
+
+    return asyncio.run(parallel_agents(blocking)), asyncio.run(parallel_agents(awaited))
+
+
+def test_parallel_agents_overlap():
+    for llm in (AsyncModel(), BlockingModel()):
+        blocking, awaited = measure(llm)
+        path = "native ainvoke" if has_native_async(llm) else "invoke in a thread"
+        print(f"{N_AGENTS} agents, {LATENCY * 1000:.0f} ms model ({path}): "
+              f"blocking invoke {blocking:.2f}s, ainvoke_llm {awaited:.2f}s")
+        assert blocking >= N_AGENTS * LATENCY
+        assert awaited < 2 * LATENCY
+
+
+def test_event_loop_stays_responsive():
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await ainvoke_llm(BlockingModel(), [HumanMessage(content="hi")])
+        task.cancel()
+        return ticks
+
+    # the live stream and stop handling keep running while the model thinks
+    assert asyncio.run(run()) >= LATENCY / 0.01 / 2
+
+
+def test_more_calls_than_the_window_on_two_loops():
+    llm = AsyncModel(name="two-loops")
+
+    async def many_calls():
+        start = time.perf_counter()
+        await asyncio.gather(*(ainvoke_llm(llm, [HumanMessage(content=f"agent {i}")]) for i in range(3 * N_AGENTS)))
+        return time.perf_counter() - start
+
+    # every asyncio.run is a new event loop sharing the same scheduler; waiters must not cross loops
+    for _ in range(2):
+        assert asyncio.run(many_calls()) >= 2 * LATENCY
+
+
+if __name__ == "__main__":
+    test_parallel_agents_overlap()
+    test_event_loop_stays_responsive()
+    test_more_calls_than_the_window_on_two_loops()
@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from src.utils.llm_registry import LLMRegistry, llm_registry_key
+
+
+def test_model_objects_are_reused_per_key():
+    registry = LLMRegistry(max_entries=2)
+    openai = llm_registry_key("openai", "sk-test", model_name="gpt-4o", base_url="https://api.openai.com/v1")
+    assert openai == llm_registry_key("openai", "sk-test", base_url="https://api.openai.com/v1", model_name="gpt-4o")
+    assert "sk-test" not in repr(openai)
+    first = registry.get_or_create(openai, object)
+    assert registry.get_or_create(openai, object) is first
+    other_model = llm_registry_key("openai", "sk-test", model_name="gpt-4o-mini", base_url="https://api.openai.com/v1")
+    assert registry.get_or_create(other_model, object) is not first
+    assert registry.stats() == {"entries": 2, "model_hits": 1, "models_created": 2}
+
+
+def test_least_recently_used_model_is_dropped():
+    registry = LLMRegistry(max_entries=2)
+    keys = [llm_registry_key("ollama", "", model_name=name) for name in ("qwen2.5:7b", "llama3.1:8b", "phi4")]
+    first = registry.get_or_create(keys[0], object)
+    registry.get_or_create(keys[1], object)
+    registry.get_or_create(keys[0], object)
+    registry.get_or_create(keys[2], object)
+    assert registry.get_or_create(keys[0], object) is first
+    assert registry.stats()["models_created"] == 3
+    assert registry.evict("ollama") == 2 and registry.stats()["entries"] == 0
+
+
+if __name__ == "__main__":
+    test_model_objects_are_reused_per_key()
+    test_least_recently_used_model_is_dropped()
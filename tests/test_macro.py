@@ -0,0 +1,99 @@
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from browser_use.dom.history_tree_processor.service import HistoryTreeProcessor
+from browser_use.dom.views import DOMElementNode
+
+from src.agent.macro import LOCATOR_FIELDS, _fill, _parameterize, locate_element, record_macro
+
+PARAMETERS = {"item": "bananas", "size": "L"}
+
+
+def make_element(xpath, highlight_index, tag_name="input", **attributes):
+    body = DOMElementNode(tag_name="body", xpath="/body", attributes={}, children=[], is_visible=True, parent=None)
+    element = DOMElementNode(tag_name=tag_name, xpath=xpath, attributes=attributes, children=[], is_visible=True,
+                             parent=body, highlight_index=highlight_index)
+    body.children.append(element)
+    return element
+
+
+def make_locator(element):
+    recorded = HistoryTreeProcessor.convert_dom_element_to_history_element(element).to_dict()
+    return {key: recorded[key] for key in LOCATOR_FIELDS if key in recorded}
+
+
+def selector_map(*elements):
+    return {element.highlight_index: element for element in elements}
+
+
+LOCATOR = make_locator(make_element("/body/form/input[1]", 4, id="search", type="text"))
+
+
+def test_dom_hash_is_tried_first():
+    changed = make_element("/body/form/input[1]", 1, id="search", type="search")
+    same = make_element("/body/form/input[1]", 2, id="search", type="text")
+    assert locate_element(LOCATOR, selector_map(changed, same)) is same
+
+
+def test_xpath_before_attributes():
+    by_attributes = make_element("/body/div/input[1]", 1, id="search", type="search")
+    by_xpath = make_element("/body/form/input[1]", 2, type="search")
+    assert locate_element(LOCATOR, selector_map(by_attributes, by_xpath)) is by_xpath
+
+
+def test_unique_identifying_attributes_last():
+    moved = make_element("/body/div/input[1]", 1, id="search", type="search")
+    other = make_element("/body/div/input[2]", 2, id="email", type="text")
+    assert locate_element(LOCATOR, selector_map(other, moved)) is moved
+
+
+def test_no_guess_when_ambiguous_or_other_tag():
+    first = make_element("/body/div/input[1]", 1, id="search")
+    second = make_element("/body/div/input[2]", 2, id="search")
+    assert locate_element(LOCATOR, selector_map(first, second)) is None
+    button = make_element("/body/form/input[1]", 3, tag_name="button", id="search", type="text")
+    assert locate_element(LOCATOR, selector_map(button)) is None
+
+
+def test_only_text_of_input_actions_is_parameterized():
+    assert _parameterize({"input_text": {"index": 4, "text": "organic bananas"}}, PARAMETERS) == \
+           {"input_text": {"index": 4, "text": "organic {item}"}}
+    click = {"click_element": {"index": 12}}
+    assert _parameterize(click, PARAMETERS) == click
+    link = {"go_to_url": {"url": "https://shop.example/bananas"}}
+    assert _parameterize(link, PARAMETERS) == link
+    assert _fill(_parameterize({"search_google": {"query": "bananas price"}}, PARAMETERS), {"item": "kiwis"}) == \
+           {"search_google": {"query": "kiwis price"}}
+
+
+def test_short_parameters_are_not_recorded():
+    history = {"history": [{
+        "model_output": {"action": [{"input_text": {"index": 4, "text": "bananas size L"}},
+                                    {"click_element": {"index": 5}}, {"done": {"text": "ok"}}]},
+        "result": [{"is_done": False}, {"is_done": False}, {"is_done": True}],
+        "state": {"url": "https://shop.example/bananas", "interacted_element": [LOCATOR, None, None]},
+    }]}
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(history, f)
+    try:
+        macro = record_macro(f.name, PARAMETERS)
+    finally:
+        os.remove(f.name)
+    assert macro.parameters == {"item": "bananas"}
+    step = macro.steps[0]
+    assert step.url == "https://shop.example/bananas"
+    assert step.actions == [{"input_text": {"index": 4, "text": "{item} size L"}}, {"click_element": {"index": 5}}]
+    assert step.elements == [LOCATOR, None]
+
+
+if __name__ == "__main__":
+    test_dom_hash_is_tried_first()
+    test_xpath_before_attributes()
+    test_unique_identifying_attributes_last()
+    test_no_guess_when_ambiguous_or_other_tag()
+    test_only_text_of_input_actions_is_parameterized()
+    test_short_parameters_are_not_recorded()
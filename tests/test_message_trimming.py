@@ -0,0 +1,98 @@
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from browser_use.agent.prompts import SystemPrompt
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_openai import ChatOpenAI
+
+from src.agent.custom_message_manager import CustomMessageManager
+from src.agent.custom_prompts import CustomAgentMessagePrompt
+
+
+def make_manager(max_input_tokens=20000, n_messages=500):
+    manager = CustomMessageManager(
+        llm=ChatOpenAI(model="gpt-4o", api_key="test"),
+        task="find the cheapest flight",
+        action_descriptions="",
+        system_prompt_class=SystemPrompt,
+        agent_prompt_class=CustomAgentMessagePrompt,
+        max_input_tokens=max_input_tokens,
+    )
+    for i in range(n_messages):
+        manager._add_message_with_tokens(AIMessage(content=f"step {i}: " + "clicked the search button " * 20))
+    manager._add_message_with_tokens(HumanMessage(content="current state " * 200))
+    return manager
+
+
+def cut_messages_one_by_one(manager):
+    """The trimming loop cut_messages replaced, kept for comparison"""
+    min_message_len = 2 if manager.message_context is not None else 1
+    diff = manager.history.total_tokens - manager.max_input_tokens
+    while diff > 0 and len(manager.history.messages) > min_message_len:
+        manager.history.remove_message(min_message_len)
+        diff = manager.history.total_tokens - manager.max_input_tokens
+
+
+def test_cut_messages_matches_one_by_one():
+    manager, reference = make_manager(), make_manager()
+    manager.cut_messages()
+    cut_messages_one_by_one(reference)
+    assert [m.message.content for m in manager.history.messages] == \
+           [m.message.content for m in reference.history.messages]
+    assert manager.history.total_tokens == reference.history.total_tokens <= manager.max_input_tokens
+
+
+def test_cut_messages_keeps_current_state():
+    manager = make_manager(n_messages=50)
+    # room for the system prompt and half of the current state
+    manager.max_input_tokens = (manager.history.messages[0].metadata.input_tokens
+                                + manager.history.messages[-1].metadata.input_tokens // 2)
+    current = manager.history.messages[-1].message.content
+    manager.cut_messages()
+    assert len(manager.history.messages) == 2
+    assert current.startswith(manager.history.messages[-1].message.content)
+    assert manager.history.total_tokens <= manager.max_input_tokens
+
+
+def test_ollama_num_ctx_caps_history():
+    from browser_use.browser.browser import Browser
+    from langchain_ollama import ChatOllama
+    from src.agent.custom_agent import CustomAgent
+    from src.agent.custom_prompts import CustomSystemPrompt
+    from src.controller.custom_controller import CustomController
+
+    agent = CustomAgent(task="find the cheapest flight", llm=ChatOllama(model="qwen2.5:7b", num_ctx=8192),
+                        browser=Browser(), controller=CustomController(), system_prompt_class=CustomSystemPrompt,
+                        agent_prompt_class=CustomAgentMessagePrompt, generate_gif=False)
+    manager = agent.message_manager
+    assert manager.max_input_tokens == 8192 - 1024
+    for i in range(200):
+        manager._add_message_with_tokens(AIMessage(content=f"step {i}: " + "clicked the search button " * 20))
+    manager._add_message_with_tokens(HumanMessage(content="current state " * 200))
+    manager.cut_messages()
+    assert manager.history.total_tokens <= 8192 - 1024
+
+
+def test_cut_messages_benchmark(n_runs=200):
+    template = make_manager()
+    messages, total_tokens = list(template.history.messages), template.history.total_tokens
+
+    def run(cut):
+        template.history.messages = list(messages)
+        template.history.total_tokens = total_tokens
+        cut(template)
+
+    one_pass = timeit.timeit(lambda: run(CustomMessageManager.cut_messages), number=n_runs) / n_runs
+    one_by_one = timeit.timeit(lambda: run(cut_messages_one_by_one), number=n_runs) / n_runs
+    print(f"500 messages trimmed to 20k tokens: one pass {one_pass * 1e6:.0f}us, "
+          f"one by one {one_by_one * 1e6:.0f}us")
+
+
+if __name__ == "__main__":
+    test_cut_messages_matches_one_by_one()
+    test_cut_messages_keeps_current_state()
+    test_ollama_num_ctx_caps_history()
+    test_cut_messages_benchmark()
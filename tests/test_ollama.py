@@ -0,0 +1,66 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from browser_use.browser.browser import Browser
+from langchain_ollama import ChatOllama
+
+from src.agent.custom_agent import CustomAgent
+from src.agent.custom_prompts import CustomAgentMessagePrompt, CustomSystemPrompt
+from src.controller.custom_controller import CustomController
+from src.utils import ollama
+from src.utils.ollama import MIN_INPUT_TOKENS, size_num_ctx, warm_up_ollama_model
+
+
+def test_num_ctx_is_sized_from_the_prompt_budget():
+    # a small prompt budget shrinks the configured context window
+    assert size_num_ctx(6000, None, 32000) == (7168, 6000)
+    # the configured num_ctx caps the prompt
+    assert size_num_ctx(128000, 1024, 8192) == (8192, 7168)
+    # rounded up to whole steps
+    assert size_num_ctx(7200, 1024, 32000) == (9216, 7200)
+
+
+def test_small_num_ctx_keeps_a_positive_input_budget():
+    num_ctx, input_budget = size_num_ctx(128000, 4096, 2048)
+    assert input_budget == MIN_INPUT_TOKENS
+    assert num_ctx >= input_budget + 4096
+
+
+def test_agent_sizes_ollama_num_ctx():
+    llm = ChatOllama(model="qwen2.5:7b", num_ctx=32000)
+    agent = CustomAgent(task="find the cheapest flight", llm=llm, browser=Browser(), controller=CustomController(),
+                        system_prompt_class=CustomSystemPrompt, agent_prompt_class=CustomAgentMessagePrompt,
+                        generate_gif=False, max_input_tokens=6000)
+    assert agent.llm.num_ctx == 7168 and agent.page_extraction_llm is agent.llm
+    assert agent.message_manager.max_input_tokens == 6000
+    # the caller's model is left alone
+    assert llm.num_ctx == 32000
+
+
+def test_warm_up_is_skipped_when_already_loaded():
+    requests = []
+
+    def warm_up(base_url, model, num_ctx, keep_alive):
+        requests.append(num_ctx)
+
+    def load_state(base_url, model):
+        return {"model": model, "loaded": True}
+
+    original = ollama._warm_up, ollama.get_ollama_load_state, ollama._warmed_up
+    ollama._warm_up, ollama.get_ollama_load_state = warm_up, load_state
+    try:
+        for num_ctx in (8192, 8192, 8192, 16384):
+            assert asyncio.run(warm_up_ollama_model("qwen2.5:7b", num_ctx, base_url="http://ollama:11434"))["loaded"]
+    finally:
+        ollama._warm_up, ollama.get_ollama_load_state, ollama._warmed_up = original
+    assert requests == [8192, 16384]
+
+
+if __name__ == "__main__":
+    test_num_ctx_is_sized_from_the_prompt_budget()
+    test_small_num_ctx_keeps_a_positive_input_budget()
+    test_agent_sizes_ollama_num_ctx()
+    test_warm_up_is_skipped_when_already_loaded()
@@ -0,0 +1,84 @@
+import base64
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from browser_use.agent.prompts import SystemPrompt
+from browser_use.browser.views import BrowserState
+from browser_use.dom.views import DOMElementNode
+from langchain_openai import ChatOpenAI
+
+from src.agent.custom_message_manager import CustomMessageManager
+from src.agent.custom_prompts import CustomAgentMessagePrompt
+from src.agent.custom_views import CustomAgentStepInfo
+from src.utils import prompt_stats
+from src.utils.prompt_stats import load_prompt_stats, summarize_prompt_stats
+
+SCREENSHOT = base64.b64encode(b"\x89PNG" + bytes(3000)).decode()
+
+
+def make_state():
+    body = DOMElementNode(tag_name="body", xpath="html/body", attributes={}, children=[], is_visible=True, parent=None)
+    for i in range(20):
+        body.children.append(DOMElementNode(tag_name="button", xpath=f"html/body/button[{i + 1}]", attributes={},
+                                            children=[], is_visible=True, parent=body, highlight_index=i))
+    return BrowserState(element_tree=body, selector_map={}, url="https://example.com", title="Example", tabs=[],
+                        screenshot=SCREENSHOT)
+
+
+def state_message_stats():
+    manager = CustomMessageManager(
+        llm=ChatOpenAI(model="gpt-4o", api_key="test"),
+        task="find the cheapest flight",
+        action_descriptions="",
+        system_prompt_class=SystemPrompt,
+        agent_prompt_class=CustomAgentMessagePrompt,
+    )
+    step_info = CustomAgentStepInfo(step_number=1, max_steps=10, task="find the cheapest flight", add_infos="",
+                                    memory="Cheapest so far: 120 EUR\n", task_progress="", future_plans="")
+    manager.add_state_message(make_state(), step_info=step_info, use_vision=True)
+    return manager, manager.last_prompt_stats
+
+
+def test_sections_of_the_state_message():
+    manager, stats = state_message_stats()
+    sections = stats["sections"]
+    # empty sections (hints, previous actions) are left out
+    assert set(sections) == {"task", "memory", "tabs", "elements", "screenshot"}
+    assert sections["task"] == {"chars": len("find the cheapest flight"),
+                                "tokens": manager._count_text_tokens("find the cheapest flight")}
+    assert sections["memory"]["chars"] == len("Cheapest so far: 120 EUR\n")
+    assert sections["elements"]["chars"] > 20 * len("[0]<button>") and sections["elements"]["tokens"] > 0
+    assert sections["screenshot"] == {"bytes": 3004, "tokens": manager.IMG_TOKENS}
+    assert stats["state_message_tokens"] == manager.history.messages[-1].metadata.input_tokens
+    assert stats["history_tokens"] == manager.history.total_tokens
+
+
+def test_summary_cli():
+    _, stats = state_message_stats()
+    history_path = os.path.join(tempfile.mkdtemp(), "history.json")
+    with open(history_path, "w", encoding="utf-8") as f:
+        json.dump({"history": [{"prompt_stats": stats}, {"prompt_stats": None}, {"prompt_stats": stats}]}, f)
+    steps = load_prompt_stats(history_path)
+    assert len(steps) == 2
+    summary = summarize_prompt_stats(steps)
+    assert summary["sections"]["task"]["tokens"] == 2 * stats["sections"]["task"]["tokens"]
+    assert summary["sections"]["screenshot"]["bytes"] == 2 * 3004
+    assert sum(section["share"] for section in summary["sections"].values()) > 0.99
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        prompt_stats.main([history_path])
+    lines = output.getvalue().splitlines()
+    assert lines[0].startswith(f"2 steps, {summary['total_tokens']} state-message tokens")
+    # sections are listed by their token share, largest first
+    assert [line.split()[0] for line in lines[2:]] == list(summary["sections"])
+
+
+if __name__ == "__main__":
+    test_sections_of_the_state_message()
+    test_summary_cli()
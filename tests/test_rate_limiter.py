@@ -0,0 +1,130 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from langchain_core.messages import HumanMessage
+from langchain_openai import ChatOpenAI
+
+from src.utils import rate_limiter
+from src.utils.rate_limiter import IMAGE_TOKENS, LLMScheduler, TokenBucket, estimate_input_tokens
+from src.utils.token_counter import TokenCounter
+
+
+class FakeClock:
+    """Stands in for the time module of rate_limiter while used as a context manager"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __enter__(self):
+        self._time = rate_limiter.time
+        rate_limiter.time = SimpleNamespace(monotonic=lambda: self.now)
+        return self
+
+    def __exit__(self, *exc_info):
+        rate_limiter.time = self._time
+
+
+def test_token_bucket_waits_and_refills():
+    with FakeClock() as clock:
+        bucket = TokenBucket(60)
+        assert bucket.wait_time(60) == 0.0
+        bucket.consume(60)
+        assert bucket.wait_time(1) == 1.0
+        clock.now += 30
+        assert bucket.wait_time(30) == 0.0
+        # refills never exceed one minute of budget
+        clock.now += 600
+        bucket.wait_time(1)
+        assert bucket.tokens == 60
+
+
+def test_token_bucket_caps_oversized_requests():
+    with FakeClock():
+        bucket = TokenBucket(60)
+        bucket.consume(30)
+        # a request larger than the whole budget only waits for a full bucket
+        assert bucket.wait_time(1000) == 30.0
+
+
+def test_token_bucket_corrects_usage():
+    with FakeClock():
+        scheduler = LLMScheduler("test", tokens_per_minute=600)
+        scheduler.token_bucket.consume(100)
+        scheduler.record_usage(100, 400)
+        assert scheduler.token_bucket.tokens == 200
+
+
+def test_aimd_window():
+    scheduler = LLMScheduler("test", max_concurrency=8, initial_concurrency=4)
+    for _ in range(4):
+        scheduler._on_success(1.0)
+    # additive increase: about one slot per window of successes
+    assert 4.9 < scheduler.concurrency < 5.0
+    scheduler.on_rate_limited()
+    assert 2.4 < scheduler.concurrency < 2.5
+    for _ in range(3):
+        scheduler.on_rate_limited()
+    assert scheduler.concurrency == 1.0
+    for _ in range(200):
+        scheduler._on_success(1.0)
+    assert scheduler.concurrency == 8
+    # a latency spike trims the window a little
+    scheduler._on_success(5.0)
+    assert scheduler.concurrency == 8 * 0.9
+
+
+def test_window_limits_requests_in_flight():
+    async def run():
+        scheduler = LLMScheduler("test", initial_concurrency=2)
+        in_flight = []
+
+        async def request():
+            async with scheduler.slot():
+                in_flight.append(scheduler.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(request() for _ in range(6)))
+        return scheduler, in_flight
+
+    scheduler, in_flight = asyncio.run(run())
+    assert max(in_flight) == 2
+    assert scheduler.in_flight == 0
+
+
+def test_rate_limit_error_halves_window_and_frees_slot():
+    class RateLimitError(Exception):
+        status_code = 429
+
+    async def run():
+        scheduler = LLMScheduler("test", initial_concurrency=4)
+        try:
+            async with scheduler.slot():
+                raise RateLimitError()
+        except RateLimitError:
+            pass
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert scheduler.concurrency == 2 and scheduler.rate_limited == 1 and scheduler.in_flight == 0
+
+
+def test_estimate_uses_the_model_token_counter():
+    llm = ChatOpenAI(model="gpt-4o", api_key="test")
+    text = "Click the search button and type the destination"
+    image = {"type": "image_url", "image_url": {"url": "data:image/png;base64,AAAA"}}
+    messages = [HumanMessage(content=text), HumanMessage(content=[{"type": "text", "text": text}, image])]
+    assert estimate_input_tokens(llm, messages) == 2 * TokenCounter(llm).count(text) + IMAGE_TOKENS
+
+
+if __name__ == "__main__":
+    test_token_bucket_waits_and_refills()
+    test_token_bucket_caps_oversized_requests()
+    test_token_bucket_corrects_usage()
+    test_aimd_window()
+    test_window_limits_requests_in_flight()
+    test_rate_limit_error_halves_window_and_frees_slot()
+    test_estimate_uses_the_model_token_counter()
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from browser_use.agent.views import ActionResult
+from browser_use.browser.views import BrowserState
+from browser_use.dom.views import DOMElementNode
+from langchain_openai import ChatOpenAI
+
+from src.agent.custom_agent import CustomAgent
+from src.agent.custom_prompts import CustomAgentMessagePrompt, CustomSystemPrompt
+from src.agent.custom_views import CustomAgentStepInfo
+from src.agent.step_latency import summarize_state_timings
+from src.browser.custom_context import CustomBrowserContext
+from src.controller.custom_controller import CustomController
+
+BRAIN = {"prev_action_evaluation": "", "important_contents": "", "task_progress": "", "future_plans": "",
+         "thought": "", "summary": ""}
+
+
+class RecordingContext(CustomBrowserContext):
+    """Answers get_state without a browser and records whether a screenshot was asked for"""
+
+    def __init__(self):
+        self.session = None
+        self.use_vision_calls = []
+        self.last_state_timings = {}
+
+    async def get_state(self, use_vision: bool = True):
+        self.use_vision_calls.append(use_vision)
+        self.last_state_timings = {"dom": 0.2, "scroll": 0.01, "total": 0.2}
+        if use_vision:
+            self.last_state_timings["screenshot"] = 0.1
+        body = DOMElementNode(tag_name="body", xpath="/body", attributes={}, children=[], is_visible=True, parent=None)
+        return BrowserState(element_tree=body, selector_map={}, url="https://example.com", title="Example", tabs=[])
+
+
+def run_step(**agent_kwargs):
+    controller = CustomController()
+
+    async def multi_act(actions, browser_context, **kwargs):
+        return [ActionResult()]
+
+    controller.multi_act = multi_act
+    context = RecordingContext()
+    agent = CustomAgent(task="scroll down", llm=ChatOpenAI(model="gpt-4o", api_key="test"), browser_context=context,
+                        controller=controller, system_prompt_class=CustomSystemPrompt,
+                        agent_prompt_class=CustomAgentMessagePrompt, **agent_kwargs)
+
+    async def get_next_action(input_messages, action_queue=None):
+        agent.n_steps += 1
+        return agent.AgentOutput.model_validate({"current_state": BRAIN, "action": [{"scroll_down": {}}]})
+
+    agent.get_next_action = get_next_action
+    step_info = CustomAgentStepInfo(step_number=1, max_steps=2, task="scroll down", add_infos="", memory="",
+                                    task_progress="", future_plans="")
+    asyncio.run(agent.step(step_info))
+    return agent, context
+
+
+def test_no_screenshot_without_vision_by_default():
+    agent, context = run_step(use_vision=False)
+    assert context.use_vision_calls == [False]
+
+
+def test_screenshot_for_requested_gif():
+    _, context = run_step(use_vision=False, generate_gif="run.gif")
+    assert context.use_vision_calls == [True]
+
+
+def test_state_timings_are_recorded():
+    agent, _ = run_step(use_vision=False)
+    timings = {"dom": 0.2, "scroll": 0.01, "total": 0.2}
+    assert agent.history.history[-1].state_timings == timings
+    assert agent.history.history[-1].model_dump()["state_timings"] == timings
+    assert summarize_state_timings(agent.step_latencies) == timings
+
+
+if __name__ == "__main__":
+    test_no_screenshot_without_vision_by_default()
+    test_screenshot_for_requested_gif()
+    test_state_timings_are_recorded()
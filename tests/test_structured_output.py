@@ -0,0 +1,74 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from browser_use.browser.browser import Browser
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_openai import ChatOpenAI
+
+from src.agent.custom_agent import CustomAgent
+from src.agent.custom_prompts import CustomAgentMessagePrompt, CustomSystemPrompt
+from src.controller.custom_controller import CustomController
+
+BRAIN = {"prev_action_evaluation": "Unknown", "important_contents": "", "task_progress": "", "future_plans": "",
+         "thought": "", "summary": "scroll"}
+ANSWER = {"current_state": BRAIN, "action": [{"scroll_down": {}}]}
+
+
+class FakeOpenAI(ChatOpenAI):
+    """Answers with a tool call when tool_call_name is set, with the answer as text otherwise"""
+
+    tool_call_name: str = ""
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.tool_call_name:
+            message = AIMessage(content="", tool_calls=[{"name": self.tool_call_name, "args": ANSWER, "id": "call_1"}])
+        else:
+            message = AIMessage(content=json.dumps(ANSWER))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def make_agent(llm, native_structured_output=False):
+    return CustomAgent(task="scroll down", llm=llm, browser=Browser(), controller=CustomController(),
+                       system_prompt_class=CustomSystemPrompt, agent_prompt_class=CustomAgentMessagePrompt,
+                       native_structured_output=native_structured_output)
+
+
+def test_native_structured_output_is_opt_in():
+    llm = ChatOpenAI(model="gpt-4o", api_key="test")
+    agent = make_agent(llm)
+    assert agent._structured_output_method(llm) is None
+    agent.native_structured_output = True
+    assert agent._structured_output_method(llm) == "function_calling"
+
+
+def test_native_parse_is_timed():
+    llm = FakeOpenAI(model="gpt-4o", api_key="test")
+    agent = make_agent(llm, native_structured_output=True)
+    llm.tool_call_name = agent.AgentOutput.__name__
+    message, parsed = asyncio.run(agent._invoke_and_parse(llm, [HumanMessage(content="scroll down")]))
+    assert parsed.action[0].model_dump(exclude_unset=True) == {"scroll_down": {}}
+    assert json.loads(message.content)["current_state"] == BRAIN
+    stats = agent.parse_stats
+    assert stats["native"] == 1 and stats["repair"] == 0
+    assert stats["native_seconds"] > 0 and stats["repair_seconds"] == 0
+
+
+def test_answer_without_tool_call_is_repaired():
+    llm = FakeOpenAI(model="gpt-4o", api_key="test")
+    agent = make_agent(llm, native_structured_output=True)
+    _, parsed = asyncio.run(agent._invoke_and_parse(llm, [HumanMessage(content="scroll down")]))
+    assert parsed.action[0].model_dump(exclude_unset=True) == {"scroll_down": {}}
+    stats = agent.parse_stats
+    assert stats["native_failures"] == 1 and stats["repair"] == 1 and stats["repair_failures"] == 0
+    assert stats["native_seconds"] > 0 and stats["repair_seconds"] > 0
+
+
+if __name__ == "__main__":
+    test_native_structured_output_is_opt_in()
+    test_native_parse_is_timed()
+    test_answer_without_tool_call_is_repaired()
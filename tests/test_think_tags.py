@@ -0,0 +1,121 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from langchain_core.messages import AIMessageChunk
+from langchain_ollama import ChatOllama
+
+from src.utils.llm import DeepSeekR1ChatOllama
+from src.utils.think_tags import JsonResponseMarkerStripper, ThinkTagSplitter, strip_json_response_marker
+
+BRAIN = {"prev_action_evaluation": "Unknown", "important_contents": "", "task_progress": "", "future_plans": "",
+         "thought": "", "summary": "click {the} button"}
+ANSWER = json.dumps({"current_state": BRAIN, "action": [{"click_element": {"index": 3}}]})
+COMPLETION = "<think>I should click {the} button.</think>\n**JSON Response:**\n" + ANSWER
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_splitter_handles_tags_split_across_chunks():
+    for size in (1, 3, 7, 100):
+        splitter = ThinkTagSplitter()
+        reasoning, content = "", ""
+        for chunk in chunked(COMPLETION, size) + [None]:
+            r, c = splitter.finish() if chunk is None else splitter.feed(chunk)
+            reasoning += r
+            content += c
+        assert reasoning == "I should click {the} button."
+        assert content == "\n**JSON Response:**\n" + ANSWER
+
+
+def test_missing_open_tag_is_reclassified_as_reasoning():
+    splitter = ThinkTagSplitter()
+    assert splitter.feed('reasoning</think>{"a":1}') == ("reasoning", '{"a":1}')
+    assert splitter.in_content
+    for size in (1, 3, 7, 100):
+        splitter = ThinkTagSplitter()
+        deltas = [splitter.feed(chunk) for chunk in chunked(COMPLETION[len("<think>"):], size)] + [splitter.finish()]
+        assert "".join(r for r, _ in deltas) == "I should click {the} button."
+        assert "".join(c for _, c in deltas) == "\n**JSON Response:**\n" + ANSWER
+    # without any tag the answer is handed over unchanged at the end
+    splitter = ThinkTagSplitter()
+    assert splitter.feed(ANSWER) == ("", "")
+    assert splitter.finish() == ("", ANSWER) and splitter.in_content
+
+
+def test_marker_is_stripped_the_same_streamed_and_whole():
+    for text in ("\n**JSON Response:**\n" + ANSWER, ANSWER, "no json here", "**JSON Response:** plain"):
+        for size in (1, 4, 100):
+            stripper = JsonResponseMarkerStripper()
+            streamed = "".join(stripper.feed(chunk) for chunk in chunked(text, size)) + stripper.finish()
+            assert streamed == strip_json_response_marker(text)
+    assert strip_json_response_marker("**JSON Response:**\n" + ANSWER) == "\n" + ANSWER
+
+
+class FakeOllamaStream(ChatOllama):
+    """Streams a fixed completion in small chunks instead of calling Ollama"""
+
+    completion: str = ""
+
+    async def astream(self, input, config=None, *, stop=None, **kwargs):
+        for chunk in chunked(self.completion, 5):
+            yield AIMessageChunk(content=chunk)
+
+
+class FakeR1(DeepSeekR1ChatOllama, FakeOllamaStream):
+    pass
+
+
+def run_both_paths(completion, keep_reasoning=True):
+    llm = FakeR1(model="deepseek-r1:14b", completion=completion, keep_reasoning=keep_reasoning)
+
+    async def collect():
+        chunks = [chunk async for chunk in llm.astream("hi")]
+        return chunks, await llm.ainvoke("hi")
+
+    return asyncio.run(collect())
+
+
+def test_astream_and_ainvoke_return_the_same_answer():
+    chunks, message = run_both_paths(COMPLETION)
+    assert "".join(chunk.content for chunk in chunks) == message.content == "\n" + ANSWER
+    reasoning = "".join(chunk.additional_kwargs.get("reasoning_content", "") for chunk in chunks)
+    assert reasoning == message.reasoning_content == "I should click {the} button."
+
+
+def test_unclosed_think_is_handed_over_as_answer():
+    chunks, message = run_both_paths("<think>**JSON Response:**" + ANSWER, keep_reasoning=False)
+    assert "".join(chunk.content for chunk in chunks) == message.content == ANSWER
+
+
+def test_agent_streams_actions_from_r1_answer():
+    from browser_use.browser.browser import Browser
+    from src.agent.custom_agent import CustomAgent
+    from src.agent.custom_prompts import CustomAgentMessagePrompt, CustomSystemPrompt
+    from src.controller.custom_controller import CustomController
+
+    llm = FakeR1(model="deepseek-r1:14b", completion=COMPLETION)
+    agent = CustomAgent(task="click the button", llm=llm, browser=Browser(), controller=CustomController(),
+                        system_prompt_class=CustomSystemPrompt, agent_prompt_class=CustomAgentMessagePrompt,
+                        generate_gif=False, stream_actions=True)
+    assert agent.stream_actions
+    queue = asyncio.Queue()
+    message = asyncio.run(agent._astream_next_action([], queue))
+    assert queue.qsize() == 1
+    assert message.content == "\n" + ANSWER and message.reasoning_content == "I should click {the} button."
+    assert agent._parse_model_output(message).action[0].model_dump(exclude_unset=True) == \
+           {"click_element": {"index": 3}}
+
+
+if __name__ == "__main__":
+    test_splitter_handles_tags_split_across_chunks()
+    test_missing_open_tag_is_reclassified_as_reasoning()
+    test_marker_is_stripped_the_same_streamed_and_whole()
+    test_astream_and_ainvoke_return_the_same_answer()
+    test_unclosed_think_is_handed_over_as_answer()
+    test_agent_streams_actions_from_r1_answer()
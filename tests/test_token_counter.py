@@ -0,0 +1,75 @@
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "python"))
+
+from langchain_anthropic import ChatAnthropic
+from langchain_ollama import ChatOllama
+from langchain_openai import ChatOpenAI
+
+from src.utils.token_counter import TokenCounter
+
+DOM = "\n".join(f"[{i}]<a href=\"/product/{i}\">Product {i} - $ {i}.99</a>" for i in range(5000))
+
+
+class FakeEncoding:
+    """Word-level tokenizer standing in for a tiktoken encoding, which cannot be downloaded offline"""
+
+    name = "fake_base"
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text, disallowed_special=()):
+        self.calls += 1
+        return re.findall(r"\w+|\S", text)
+
+
+def openai_counter(model_name, encoding):
+    TokenCounter._encodings[model_name] = encoding
+    return TokenCounter(ChatOpenAI(model=model_name, api_key="test"))
+
+
+def test_exact_count_or_estimate_per_family():
+    text = "Click the search button"
+    encoding = FakeEncoding()
+    counter = openai_counter("gpt-test-exact", encoding)
+    assert counter.count(text) == 4 and encoding.calls == 1
+    # no encoding for the model: estimate like every other family
+    assert openai_counter("gpt-test-offline", None).count(text) == len(text) // 3
+    assert TokenCounter(ChatAnthropic(model="claude-3-5-sonnet-latest", api_key="test")).count(text) == \
+           int(len(text) / 3.5)
+    assert TokenCounter(ChatOllama(model="qwen2.5:7b"), estimated_characters_per_token=4).count(text) == \
+           len(text) // 4
+
+
+def test_counts_are_memoized_per_tokenizer():
+    encoding = FakeEncoding()
+    counter = openai_counter("gpt-test-memo", encoding)
+    text = "Search results for cheap flights to Lisbon"
+    assert counter.count(text) == counter.count(text) == 7
+    # another counter with the same tokenizer shares the memo
+    assert openai_counter("gpt-test-memo", encoding).count(text) == 7
+    assert encoding.calls == 1
+    # the estimate of another family is not mixed up with the exact count
+    assert TokenCounter(ChatOllama(model="qwen2.5:7b")).count(text) == len(text) // 3
+
+
+def test_memo_hit_is_cheaper_than_tokenizing():
+    counter = openai_counter("gpt-test-timing", FakeEncoding())
+    start = time.perf_counter()
+    tokens = counter.count(DOM)
+    uncached = time.perf_counter() - start
+    start = time.perf_counter()
+    assert counter.count(DOM) == tokens
+    cached = time.perf_counter() - start
+    print(f"{tokens} tokens: tokenized in {uncached * 1000:.2f}ms, memo hit in {cached * 1000:.2f}ms")
+    assert cached < uncached / 2
+
+
+if __name__ == "__main__":
+    test_exact_count_or_estimate_per_family()
+    test_counts_are_memoized_per_tokenizer()
+    test_memo_hit_is_cheaper_than_tokenizing()